@@ -0,0 +1,142 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("provision-traccar-drivers")
+@pass_context
+def provision_traccar_drivers(context):
+	"Create every Driver in Traccar that isn't there yet"
+	import frappe
+
+	from fleet.fleet.traccar import provision_traccar_drivers as provision
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		result = provision()
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	if not result:
+		click.echo("Traccar Integration is not enabled")
+		return
+	click.echo(
+		f"{result['created']} created, {result['existing']} already in Traccar, "
+		f"{result['failed']} failed"
+	)
+
+
+@click.command("reconcile-traccar-devices")
+@pass_context
+def reconcile_traccar_devices(context):
+	"Create or update Traccar devices for every Vehicle that differs from Traccar"
+	import frappe
+
+	from fleet.fleet.traccar import reconcile_traccar_devices as reconcile
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		result = reconcile()
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	if not result:
+		click.echo("Traccar Integration is not enabled")
+		return
+	click.echo(
+		f"{result['created']} created, {result['updated']} updated, "
+		f"{result['unchanged']} unchanged, {result['failed']} failed"
+	)
+
+
+@click.command("reconcile-geofence-permissions")
+@pass_context
+def reconcile_geofence_permissions(context):
+	"Link and unlink Traccar devices and geofences to match every Location's Geofenced Vehicles"
+	import frappe
+
+	from fleet.fleet.traccar import reconcile_geofence_permissions as reconcile
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		result = reconcile()
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	if not result:
+		click.echo("Traccar Integration is not enabled")
+		return
+	click.echo(
+		f"{result['linked']} linked, {result['unlinked']} unlinked, "
+		f"{result['unchanged']} unchanged, {result['failed']} devices failed"
+	)
+
+
+@click.command("reconcile-traccar")
+@click.option("--apply", is_flag=True, default=False, help="Apply the differences to both sides")
+@pass_context
+def reconcile_traccar(context, apply=False):
+	"Report the differences between ERPNext and Traccar, and with --apply reconcile them"
+	import json
+
+	import frappe
+
+	from fleet.fleet.reconcile import reconcile
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		report = reconcile(dry_run=not apply)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	if not report:
+		click.echo("Traccar Integration is not enabled")
+		return
+	click.echo(json.dumps(report, indent=2, default=str))
+
+
+@click.command("backfill-vehicle-logs")
+@click.option("--from", "from_datetime", required=True, help="Start of the range, system timezone")
+@click.option("--to", "to_datetime", required=True, help="End of the range, system timezone")
+@click.option("--vehicle", "vehicles", multiple=True, help="Vehicle to backfill, repeatable")
+@pass_context
+def backfill_vehicle_logs(context, from_datetime, to_datetime, vehicles=None):
+	"Enqueue backfill jobs for positions missed between two datetimes"
+	import frappe
+
+	from fleet.fleet.traccar import backfill_vehicle_logs as backfill
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		enqueued = backfill(from_datetime, to_datetime, list(vehicles) or None)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+	click.echo(f"Backfill enqueued for {len(enqueued)} vehicles")
+
+
+commands = [
+	provision_traccar_drivers,
+	reconcile_traccar_devices,
+	reconcile_geofence_permissions,
+	reconcile_traccar,
+	backfill_vehicle_logs,
+]
@@ -3,12 +3,12 @@
 
 from frappe.model.document import Document
 
-# from base64
+from fleet.fleet.traccar import get_traccar_client
 
 
 class TraccarIntegration(Document):
 	def client(self):
-		pass
+		return get_traccar_client(self)
 
 
 # username = doc.username or ''
@@ -0,0 +1,9 @@
+# Copyright (c) 2025, AgriTheory and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestTraccarOutbox(FrappeTestCase):
+	pass
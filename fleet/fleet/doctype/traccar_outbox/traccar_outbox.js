@@ -0,0 +1,8 @@
+// Copyright (c) 2025, AgriTheory and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Traccar Outbox", {
+// 	refresh(frm) {
+
+// 	},
+// });
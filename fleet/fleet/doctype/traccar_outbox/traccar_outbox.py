@@ -0,0 +1,254 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import datetime
+import json
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils.data import get_datetime, now_datetime
+
+OUTBOX_DRAIN_FLAG_KEY = "fleet:traccar_outbox_drain_scheduled"
+OUTBOX_DRAIN_FLAG_TTL = 300  # seconds
+OUTBOX_DRAIN_LOCK_KEY = "fleet:traccar_outbox_drain_lock"
+OUTBOX_DRAIN_TIMEOUT = 1500  # seconds
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_BASE_BACKOFF = 30  # seconds
+OUTBOX_MAX_BACKOFF = 3600  # seconds
+
+
+class TraccarOutbox(Document):
+	pass
+
+
+def add_to_traccar_outbox(reference_doctype, reference_name, payload=None):
+	"""
+	Records a Traccar write in the current transaction, so it is only sent if the document it
+	belongs to is saved, and schedules `drain_traccar_outbox` for once the transaction commits.
+
+	:param reference_doctype: str; "Vehicle", "Driver" or "Location"
+	:param reference_name: str; name of the document to sync
+	:param payload: dict | None; details of the change beyond the document's saved state
+	:return: None
+	"""
+	entry = frappe.new_doc("Traccar Outbox")
+	entry.reference_doctype = reference_doctype
+	entry.reference_name = reference_name
+	entry.payload = json.dumps(payload) if payload else None
+	entry.next_attempt = now_datetime()
+	# the document may be in before_save of its first insert, so it isn't in the database yet
+	entry.insert(ignore_permissions=True, ignore_links=True)
+	frappe.db.after_commit.add(schedule_traccar_outbox_drain)
+
+
+def schedule_traccar_outbox_drain():
+	"""
+	Enqueues `drain_traccar_outbox` on the traccar queue unless a drain is already pending, so a
+	burst of saves is sent together.
+	"""
+	flag_key = frappe.cache.make_key(OUTBOX_DRAIN_FLAG_KEY)
+	if not frappe.cache.set(flag_key, 1, nx=True, ex=OUTBOX_DRAIN_FLAG_TTL):
+		return
+	frappe.enqueue(
+		method=drain_traccar_outbox,
+		queue="traccar",
+		job_name="fleet.fleet.doctype.traccar_outbox.traccar_outbox.drain_traccar_outbox",
+	)
+
+
+def drain_traccar_outbox():
+	"""
+	Sends the pending Traccar Outbox entries of documents that are due, OUTBOX_BATCH_SIZE
+	documents at a time. All pending entries for the same document are coalesced into one write,
+	so they are applied in the order they were recorded. Vehicles and Drivers are synced in bulk,
+	and Locations one at a time. Sent entries are deleted. Documents that fail are retried with
+	exponential backoff, and their entries marked Failed after OUTBOX_MAX_ATTEMPTS.
+
+	Runs every minute to pick up retries, and shortly after any save that adds to the outbox. A
+	cache lock keeps two drains from running at once.
+	"""
+	# clear the pending flag first so entries added while draining schedule another run
+	frappe.cache.delete_value(OUTBOX_DRAIN_FLAG_KEY)
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings.enable_traccar:
+		return
+
+	lock_key = frappe.cache.make_key(OUTBOX_DRAIN_LOCK_KEY)
+	if not frappe.cache.set(lock_key, 1, nx=True, ex=OUTBOX_DRAIN_TIMEOUT):
+		return
+	try:
+		while True:
+			references = get_due_references(limit=OUTBOX_BATCH_SIZE)
+			if not references:
+				return
+			drain_entries(get_pending_entries(references))
+	finally:
+		frappe.cache.delete(lock_key)
+
+
+def get_due_references(limit):
+	"""
+	Returns the documents with pending entries that are all due, oldest first. A document with an
+	entry still backing off is held back as a whole, so a newer entry can't overtake an older one
+	that failed.
+
+	:param limit: int; maximum number of documents
+	:return: list; (reference doctype, reference name) tuples
+	"""
+	now = now_datetime()
+	references = frappe.get_all(
+		"Traccar Outbox",
+		filters={"status": "Pending"},
+		fields=[
+			"reference_doctype",
+			"reference_name",
+			"min(creation) as first_created",
+			"max(next_attempt) as next_attempt",
+		],
+		group_by="reference_doctype, reference_name",
+		order_by="first_created asc",
+	)
+	return [
+		(r.reference_doctype, r.reference_name)
+		for r in references
+		if not r.next_attempt or get_datetime(r.next_attempt) <= now
+	][:limit]
+
+
+def get_pending_entries(references):
+	"""
+	:param references: list; (reference doctype, reference name) tuples
+	:return: list; every pending entry for the documents, oldest first
+	"""
+	references = set(references)
+	entries = frappe.get_all(
+		"Traccar Outbox",
+		filters={"status": "Pending", "reference_name": ["in", [r[1] for r in references]]},
+		fields=["name", "reference_doctype", "reference_name", "payload", "attempts"],
+		order_by="creation asc",
+	)
+	return [e for e in entries if (e.reference_doctype, e.reference_name) in references]
+
+
+def drain_entries(entries):
+	"""
+	Sends a batch of outbox entries, grouped by doctype and coalesced per document, committing
+	after each doctype.
+
+	:param entries: list; outbox entries, oldest first
+	"""
+	by_doctype = {}
+	for entry in entries:
+		references = by_doctype.setdefault(entry.reference_doctype, {})
+		references.setdefault(entry.reference_name, []).append(entry)
+
+	for doctype, references in by_doctype.items():
+		try:
+			errors = send_references(doctype, references)
+		except Exception:
+			# Traccar is unreachable or the batch couldn't be sent at all
+			frappe.db.rollback()
+			error = frappe.get_traceback()
+			errors = {name: error for name in references}
+
+		sent, failed = [], {}
+		for name, reference_entries in references.items():
+			if name in errors:
+				failed[name] = (reference_entries, errors[name])
+			else:
+				sent.extend(e.name for e in reference_entries)
+		if sent:
+			frappe.db.delete("Traccar Outbox", {"name": ["in", sent]})
+		if failed:
+			retry_entries(doctype, failed)
+		frappe.db.commit()
+
+
+def send_references(doctype, references):
+	"""
+	Sends the coalesced writes for one doctype.
+
+	:param doctype: str; reference doctype of the entries
+	:param references: dict; document name to its outbox entries, oldest first
+	:return: dict; document name to error for each document that couldn't be synced
+	"""
+	from fleet.fleet.overrides.location import apply_traccar_geofence
+	from fleet.fleet.traccar import reconcile_traccar_devices, sync_traccar_drivers
+
+	if doctype == "Vehicle":
+		result = reconcile_traccar_devices(list(references)) or {}
+		error = "Failed to create or update the device in Traccar, see Error Log"
+		return {name: error for name in result.get("failed_vehicles") or []}
+
+	if doctype == "Driver":
+		result = sync_traccar_drivers(list(references)) or {}
+		error = "Failed to create the driver in Traccar, see Error Log"
+		return {name: error for name in result.get("failed_drivers") or []}
+
+	if doctype == "Location":
+		errors = {}
+		for name, entries in references.items():
+			try:
+				apply_traccar_geofence(name, coalesce_geofence_changes(entries))
+				frappe.db.commit()
+			except Exception:
+				frappe.db.rollback()
+				errors[name] = frappe.get_traceback()
+		return errors
+
+	return {name: f"Unsupported reference doctype {doctype}" for name in references}
+
+
+def coalesce_geofence_changes(entries):
+	"""
+	Folds the geofence changes recorded by successive saves of a Location into one: the area
+	changed if any save changed it, and each Vehicle's latest link or unlink wins.
+
+	:param entries: list; outbox entries for one Location, oldest first
+	:return: dict; "area", "link" and "unlink" as recorded by `sync_traccar_geofence`
+	"""
+	area, links = False, {}
+	for entry in entries:
+		payload = json.loads(entry.payload or "{}")
+		area = area or bool(payload.get("area"))
+		links.update({v: True for v in payload.get("link") or []})
+		links.update({v: False for v in payload.get("unlink") or []})
+	return {
+		"area": area,
+		"link": sorted(v for v, linked in links.items() if linked),
+		"unlink": sorted(v for v, linked in links.items() if not linked),
+	}
+
+
+def retry_entries(doctype, failed):
+	"""
+	Schedules every entry of each failed document for another attempt with exponential backoff,
+	or marks them Failed once the document reaches OUTBOX_MAX_ATTEMPTS. Backoff is per document
+	so its entries stay together.
+
+	:param doctype: str; reference doctype of the entries
+	:param failed: dict; document name to (its outbox entries, error)
+	"""
+	now = now_datetime()
+	updates, given_up = {}, []
+	for name, (entries, error) in failed.items():
+		attempts = max(e.attempts or 0 for e in entries) + 1
+		backoff = min(OUTBOX_BASE_BACKOFF * 2 ** (attempts - 1), OUTBOX_MAX_BACKOFF)
+		values = {
+			"attempts": attempts,
+			"error": error,
+			"next_attempt": now + datetime.timedelta(seconds=backoff),
+		}
+		if attempts >= OUTBOX_MAX_ATTEMPTS:
+			values["status"] = "Failed"
+			given_up.append(f"{doctype} {name}")
+		updates.update({e.name: values for e in entries})
+	frappe.db.bulk_update("Traccar Outbox", updates, update_modified=False)
+
+	if given_up:
+		frappe.log_error(
+			title="Traccar Integration Error",
+			message=f"Gave up syncing {', '.join(sorted(given_up))} with Traccar after "
+			f"{OUTBOX_MAX_ATTEMPTS} attempts, see Traccar Outbox",
+		)
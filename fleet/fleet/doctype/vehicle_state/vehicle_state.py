@@ -0,0 +1,143 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class VehicleState(Document):
+	pass
+
+
+def update_vehicle_state(log, method=None):
+	"""
+	Upserts the Vehicle State for a submitted Vehicle Log's vehicle so the latest position,
+	battery, driver, geofences and odometer can be read without scanning Vehicle Log. Logs older
+	than the current state (backfilled history) are ignored, as are empty readings on manual logs.
+
+	:param log: Vehicle Log doc
+	:param method: str | None; method name function is called from
+	:return: None
+	"""
+	vehicle = log.license_plate
+	state = frappe.db.get_value(
+		"Vehicle State", vehicle, ["traccar_fix_time", "employee"], as_dict=True
+	)
+	if state and state.traccar_fix_time and log.get("traccar_fix_time"):
+		if frappe.utils.get_datetime(log.traccar_fix_time) < state.traccar_fix_time:
+			return
+
+	values = {"vehicle_log": log.name, "odometer": log.odometer}
+	for fieldname in (
+		"traccar_position_id",
+		"traccar_fix_time",
+		"latitude",
+		"longitude",
+		"speed",
+		"ignition",
+		"battery_level",
+		"employee",
+		"geofence_ids",
+	):
+		if log.get(fieldname) is not None:
+			values[fieldname] = log.get(fieldname)
+	if is_moving(log.get("speed"), log.get("ignition")):
+		values["last_moved"] = log.get("traccar_fix_time") or frappe.utils.now_datetime()
+	if values.get("employee") and (not state or state.employee != values["employee"]):
+		values["driver"] = frappe.db.get_value("Driver", {"employee": values["employee"]})
+
+	if state:
+		frappe.db.set_value("Vehicle State", vehicle, values, update_modified=False)
+	else:
+		doc = frappe.new_doc("Vehicle State")
+		doc.vehicle = vehicle
+		doc.update(values)
+		doc.insert(ignore_permissions=True)
+
+
+def rebuild_vehicle_state(log, method=None):
+	"""
+	Recomputes the Vehicle State when a Vehicle Log is cancelled.
+
+	:param log: Vehicle Log doc
+	:param method: str | None; method name function is called from
+	:return: None
+	"""
+	refresh_vehicle_state(log.license_plate)
+
+
+def refresh_vehicle_state(vehicle):
+	"""
+	Rebuilds a Vehicle's state from its latest submitted Vehicle Log, preferring logs from Traccar.
+
+	:param vehicle: str; Vehicle name
+	:return: None
+	"""
+	frappe.db.delete("Vehicle State", vehicle)
+	latest = frappe.get_all(
+		"Vehicle Log",
+		{"license_plate": vehicle, "docstatus": 1},
+		order_by="traccar_fix_time desc, creation desc",
+		limit=1,
+		pluck="name",
+	)
+	if not latest:
+		return
+	update_vehicle_state(frappe.get_doc("Vehicle Log", latest[0]))
+
+	# the latest log only tells when the vehicle last moved if it was moving
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	last_moving = frappe.get_all(
+		"Vehicle Log",
+		filters={"license_plate": vehicle, "docstatus": 1},
+		or_filters={
+			"ignition": 1,
+			"speed": [">", frappe.utils.flt(traccar_settings.moving_speed_threshold)],
+		},
+		fields=["traccar_fix_time", "creation"],
+		order_by="traccar_fix_time desc, creation desc",
+		limit=1,
+	)
+	if last_moving:
+		last_moved = last_moving[0].traccar_fix_time or last_moving[0].creation
+		frappe.db.set_value(
+			"Vehicle State", vehicle, "last_moved", last_moved, update_modified=False
+		)
+
+
+def rename_vehicle_state(vehicle_doc, method=None, old_name=None, new_name=None, merge=False):
+	"""
+	Moves a renamed Vehicle's state to its new name, rebuilding it from the Vehicle Logs, which are
+	already relinked by the time after_rename runs. Also drops the position watermark cached under
+	the old name.
+
+	:param vehicle_doc: Vehicle doc
+	:param method: str | None; method name function is called from
+	:param old_name: str; the Vehicle's previous name
+	:param new_name: str; the Vehicle's new name
+	:param merge: bool; whether the Vehicle was merged into an existing one
+	:return: None
+	"""
+	from fleet.fleet.traccar import POSITION_WATERMARK_KEY
+
+	frappe.db.delete("Vehicle State", old_name)
+	refresh_vehicle_state(new_name)
+	frappe.cache.hdel(POSITION_WATERMARK_KEY, old_name)
+	frappe.db.after_commit.add(lambda: frappe.cache.hdel(POSITION_WATERMARK_KEY, new_name))
+
+
+def is_moving(speed, ignition, traccar_settings=None):
+	"""
+	Whether a reading shows the vehicle moving: the ignition is on or the speed is above the
+	Moving Speed Threshold in Traccar Integration.
+
+	:param speed: float | None; speed in knots as reported by Traccar
+	:param ignition: int | None
+	:param traccar_settings: Traccar Integration doc | None
+	:return: bool
+	"""
+	if ignition:
+		return True
+	if not traccar_settings:
+		traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	return frappe.utils.flt(speed) > frappe.utils.flt(traccar_settings.moving_speed_threshold)
@@ -0,0 +1,181 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+
+import threading
+import time
+from contextlib import contextmanager
+
+import frappe
+from werkzeug.wrappers import Response
+
+METRICS_KEY = "fleet:metrics"
+METRICS_FLUSH_INTERVAL = 5  # seconds
+# seconds; spans sub-millisecond cache lookups up to Traccar timeouts and multi-minute lag
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900)
+
+METRIC_HELP = {
+	"fleet_sync_duration_seconds": ("histogram", "Duration of a sync job"),
+	"fleet_traccar_request_seconds": ("histogram", "Latency of Traccar API requests"),
+	"fleet_vehicle_log_phase_seconds": (
+		"histogram",
+		"Time spent in each phase of creating a Vehicle Log",
+	),
+	"fleet_position_lag_seconds": (
+		"histogram",
+		"Delay between a position's fix time and its Vehicle Log being written",
+	),
+	"fleet_positions_ingested_total": ("counter", "Positions written as Vehicle Logs"),
+	"fleet_positions_duplicate_total": ("counter", "Positions skipped as already logged"),
+	"fleet_sync_errors_total": ("counter", "Errors raised while syncing with Traccar"),
+}
+
+# metrics are buffered per process and site, then added to the cache in one round trip
+_lock = threading.Lock()
+_buffers: dict[str, dict] = {}
+
+
+def incr(name, value=1, **labels):
+	"""
+	Adds to a counter.
+
+	:param name: str; metric name, ending in _total
+	:param value: int | float
+	:param labels: str; Prometheus labels
+	"""
+	with _lock:
+		buffer = get_buffer()
+		field = f"{name}{format_labels(labels)}"
+		buffer["values"][field] = buffer["values"].get(field, 0) + value
+	maybe_flush()
+
+
+def observe(name, value, **labels):
+	"""
+	Records a value in a histogram with DEFAULT_BUCKETS.
+
+	:param name: str; metric name, ending in _seconds
+	:param value: float
+	:param labels: str; Prometheus labels
+	"""
+	with _lock:
+		values = get_buffer()["values"]
+		for le in DEFAULT_BUCKETS:
+			if value <= le:
+				field = f"{name}_bucket{format_labels(labels, le=le)}"
+				values[field] = values.get(field, 0) + 1
+		for field, amount in (
+			(f"{name}_bucket{format_labels(labels, le='+Inf')}", 1),
+			(f"{name}_sum{format_labels(labels)}", value),
+			(f"{name}_count{format_labels(labels)}", 1),
+		):
+			values[field] = values.get(field, 0) + amount
+	maybe_flush()
+
+
+@contextmanager
+def timer(name, **labels):
+	"""
+	Observes the time spent in the block, whether or not it raises.
+
+	with timer("fleet_vehicle_log_phase_seconds", phase="submit"):
+		log.submit()
+	"""
+	start = time.perf_counter()
+	try:
+		yield
+	finally:
+		observe(name, time.perf_counter() - start, **labels)
+
+
+def get_buffer():
+	site = frappe.local.site
+	if site not in _buffers:
+		_buffers[site] = {"values": {}, "flushed": time.monotonic()}
+	return _buffers[site]
+
+
+def maybe_flush():
+	if time.monotonic() - get_buffer()["flushed"] >= METRICS_FLUSH_INTERVAL:
+		flush()
+
+
+def flush():
+	"""
+	Adds this process's buffered metrics to the cache. Hooked to the end of every job and request,
+	and called at most every METRICS_FLUSH_INTERVAL seconds while recording in long-running jobs.
+	"""
+	with _lock:
+		buffer = get_buffer()
+		values, buffer["values"] = buffer["values"], {}
+		buffer["flushed"] = time.monotonic()
+	if not values:
+		return
+
+	key = frappe.cache.make_key(METRICS_KEY)
+	pipe = frappe.cache.pipeline()
+	for field, value in values.items():
+		pipe.hincrbyfloat(key, field, value)
+	pipe.execute()
+
+
+def format_labels(labels, le=None):
+	# le goes last so a histogram's buckets sort together
+	pairs = [f'{k}="{str(v).replace(chr(34), "")}"' for k, v in sorted(labels.items())]
+	if le is not None:
+		pairs.append(f'le="{le}"')
+	return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def get_metric_name(field):
+	name = field.split("{", 1)[0]
+	for suffix in ("_bucket", "_sum", "_count"):
+		if name.endswith(suffix) and name[: -len(suffix)] in METRIC_HELP:
+			return name[: -len(suffix)]
+	return name
+
+
+def render():
+	"""
+	Returns every metric recorded for the site in the Prometheus text exposition format.
+
+	:return: str
+	"""
+	flush()
+	# read through a pipeline, RedisWrapper.hgetall expects pickled values
+	pipe = frappe.cache.pipeline()
+	pipe.hgetall(frappe.cache.make_key(METRICS_KEY))
+	(stored,) = pipe.execute()
+	by_metric = {}
+	for field, value in stored.items():
+		field = field.decode()
+		by_metric.setdefault(get_metric_name(field), []).append((field, float(value)))
+
+	lines = []
+	for name in sorted(by_metric):
+		metric_type, help_text = METRIC_HELP.get(name, ("untyped", ""))
+		lines.append(f"# HELP {name} {help_text}")
+		lines.append(f"# TYPE {name} {metric_type}")
+		for field, value in sorted(by_metric[name], key=sort_key):
+			lines.append(f"{field} {int(value) if value.is_integer() else value}")
+	return "\n".join(lines) + "\n"
+
+
+def sort_key(sample):
+	# order histogram buckets numerically with +Inf last, as Prometheus expects
+	field = sample[0]
+	if 'le="' not in field:
+		return (field, 0)
+	series, le = field.rsplit('le="', 1)
+	le = le.split('"', 1)[0]
+	return (series, float("inf") if le == "+Inf" else float(le))
+
+
+@frappe.whitelist()
+def metrics():
+	"""
+	Prometheus scrape endpoint for sync metrics, authenticated with a System Manager or Fleet
+	Manager API key: /api/method/fleet.fleet.metrics.metrics
+	"""
+	frappe.only_for(["System Manager", "Fleet Manager"])
+	return Response(render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -6,16 +6,22 @@ import json
 
 import frappe
 from frappe import _
-from frappe.exceptions import ValidationError
-from frappe.utils import comma_and
+from frappe.utils import cint, comma_and
 
+from fleet.fleet.doctype.traccar_outbox.traccar_outbox import add_to_traccar_outbox
 from fleet.fleet.traccar import (
 	add_traccar_geofence,
+	clear_geofence_location_cache,
 	coords_list_to_wkt_format,
 	delete_traccar_geofence,
-	link_traccar_object,
-	unlink_traccar_object,
+	get_geofence_area_hash,
+	get_traccar_changes,
+	get_traccar_geofences,
+	get_vehicle_traccar_ids,
+	link_traccar_objects,
+	unlink_traccar_objects,
 	update_traccar_geofence,
+	update_traccar_geofence_mirror,
 )
 
 
@@ -46,11 +52,8 @@ def validate_geofence_geometry(doc, method=None):
 def validate_geofenced_vehicles_have_traccar_id(doc, method=None):
 	if not doc.geofenced_vehicle:
 		return
-	errors = []
-	for v in doc.geofenced_vehicle:
-		traccar_id = frappe.get_value("Vehicle", v.vehicle, "traccar_id")
-		if not traccar_id:
-			errors.append(v.vehicle)
+	traccar_ids = get_vehicle_traccar_ids(v.vehicle for v in doc.geofenced_vehicle)
+	errors = [v.vehicle for v in doc.geofenced_vehicle if not traccar_ids.get(v.vehicle)]
 	if errors:
 		frappe.throw(
 			_(
@@ -61,13 +64,9 @@ def validate_geofenced_vehicles_have_traccar_id(doc, method=None):
 
 def sync_traccar_geofence(doc, method=None):
 	"""
-	Syncs geofences and links vehicles to geofence if "sync_traccar_geofence" box checked.
-
-	If there's an existing synced geofence and "sync_traccar_geofence" is unchecked, deletes
-	geofence from Traccar.
-	If it's a synced geofence and the geometry changed in the "location" field, updates in Traccar
-	If it's a synced geofence and the vehicles changed, updates links in Traccar
-	If it's a new geofence, creates it in Traccar and links vehicles
+	Records the Location's geofence changes in the Traccar Outbox if "sync_traccar_geofence" box
+	checked, or was checked before, so the save doesn't wait on Traccar. The changes are made by
+	`apply_traccar_geofence` once the save is committed.
 	"""
 	if doc.doctype not in ["Address", "Location"]:
 		return
@@ -77,29 +76,60 @@ def sync_traccar_geofence(doc, method=None):
 			if link.link_doctype == "Location":
 				doc = frappe.get_doc("Location", link.link_name)
 	old_doc = doc.get_doc_before_save()
-	loc = json.loads(doc.location)
+	payload = None
 
 	if not doc.sync_traccar_geofence:
-		if old_doc and old_doc.sync_traccar_geofence and old_doc.traccar_geofence_id:
+		if not (old_doc and old_doc.sync_traccar_geofence and doc.traccar_geofence_id):
+			return
+
+	elif doc.traccar_geofence_id:
+		payload = {"area": doc.has_value_changed("location"), "link": [], "unlink": []}
+		if not doc.is_child_table_same("geofenced_vehicle") and old_doc:
+			old_vehicles = {v.vehicle for v in old_doc.geofenced_vehicle}
+			new_vehicles = {v.vehicle for v in doc.geofenced_vehicle}
+			payload["link"] = sorted(new_vehicles - old_vehicles)
+			payload["unlink"] = sorted(old_vehicles - new_vehicles)
+		if not any(payload.values()):
+			return
+
+	add_to_traccar_outbox("Location", doc.name, payload)
+
+
+def apply_traccar_geofence(location, changes=None):
+	"""
+	Syncs the Location's saved geofence with Traccar. Called when the Traccar Outbox is drained.
+
+	If there's a synced geofence and "sync_traccar_geofence" is unchecked, deletes geofence from
+	Traccar.
+	If it's a synced geofence and the geometry changed in the "location" field, updates in Traccar
+	If it's a synced geofence and the vehicles changed, updates links in Traccar
+	If it's a new geofence, creates it in Traccar and links vehicles
+
+	:param location: str; Location name
+	:param changes: dict | None; "area" if the geometry changed, and the Vehicles to "link" and
+	"unlink", as recorded by `sync_traccar_geofence`
+	:return: None (error raised if unsuccessful)
+	"""
+	if not frappe.db.exists("Location", location):
+		return
+	doc = frappe.get_doc("Location", location)
+	changes = changes or {}
+	loc = json.loads(doc.location or "{}")
+
+	if not doc.sync_traccar_geofence:
+		if doc.traccar_geofence_id:
 			# user un-checked a geofence that was synced with Traccar -> delete from Traccar
-			try:
-				delete_traccar_geofence(old_doc.traccar_geofence_id)
-				doc.traccar_geofence_id = ""
-				doc.geofenced_vehicle = []
-			except ValidationError as e:
-				frappe.log_error(
-					title=_(
-						f"Error deleting geofence from Traccar with ID {old_doc.traccar_geofence_id} for {doc.doctype} {doc.name}."
-					),
-					message=_(f"{e}\n\n{frappe.get_traceback()}"),
-					reference_doctype=doc.doctype,
-					reference_name=doc.name,
-				)
+			delete_traccar_geofence(doc.traccar_geofence_id)
+			frappe.db.set_value(
+				"Location", doc.name, "traccar_geofence_id", "", update_modified=False
+			)
+			frappe.db.delete("Geofence Vehicle", {"parenttype": "Location", "parent": doc.name})
+			clear_geofence_location_cache()
 
 	elif doc.traccar_geofence_id:
-		if doc.has_value_changed("location"):
+		if changes.get("area"):
 			# geometry in Location changed, update geofence
-			for feature in loc["features"]:
+			for feature in loc.get("features", []):
 				feat_type = feature.get("geometry", {}).get("type")
 				if feat_type not in ["LineString", "Polygon"]:
 					continue
@@ -109,34 +139,162 @@ def sync_traccar_geofence(doc, method=None):
 				data = {"area": new_area}
 				update_traccar_geofence(doc.traccar_geofence_id, data)
 
-		if not doc.is_child_table_same("geofenced_vehicle") and old_doc:
-			# vehicles to link geofence to changed, update Traccar links
-			old_vehicles = [v.vehicle for v in old_doc.geofenced_vehicle]
-			new_vehicles = [v.vehicle for v in doc.geofenced_vehicle]
-			added = set(new_vehicles) - set(old_vehicles)
-			removed = set(old_vehicles) - set(new_vehicles)
-			for added_v in added:
-				did = frappe.get_value("Vehicle", added_v, "traccar_id")
-				link_traccar_object("deviceId", did, "geofenceId", doc.traccar_geofence_id)
-			for removed_v in removed:
-				did = frappe.get_value("Vehicle", removed_v, "traccar_id")
-				unlink_traccar_object("deviceId", did, "geofenceId", doc.traccar_geofence_id)
-
-	elif not doc.traccar_geofence_id:
+		# vehicles to link geofence to changed, update Traccar links
+		added, removed = set(changes.get("link") or []), set(changes.get("unlink") or [])
+		traccar_ids = get_vehicle_traccar_ids(added | removed)
+		link_traccar_objects(
+			[
+				{"deviceId": cint(traccar_ids[v]), "geofenceId": cint(doc.traccar_geofence_id)}
+				for v in added
+				if traccar_ids.get(v)
+			]
+		)
+		unlink_traccar_objects(
+			[
+				{"deviceId": cint(traccar_ids[v]), "geofenceId": cint(doc.traccar_geofence_id)}
+				for v in removed
+				if traccar_ids.get(v)
+			]
+		)
+
+	else:
 		# new geofence, create in Traccar and link vehicles
-		for feature in loc["features"]:
+		for feature in loc.get("features", []):
 			feat_type = feature.get("geometry", {}).get("type")
 			if feat_type not in ["LineString", "Polygon"]:
 				continue
 			coords = []
 			flatten_coordinates(coord_list=coords, item=feature["geometry"]["coordinates"])
-			device_ids = []
-			if doc.geofenced_vehicle:
-				device_ids = [
-					frappe.get_value("Vehicle", v.vehicle, "traccar_id") for v in doc.geofenced_vehicle
-				]
+			traccar_ids = get_vehicle_traccar_ids(v.vehicle for v in doc.geofenced_vehicle)
+			device_ids = [
+				traccar_ids[v.vehicle] for v in doc.geofenced_vehicle if traccar_ids.get(v.vehicle)
+			]
 			geofence_id = add_traccar_geofence(doc, feat_type, coords, device_ids=device_ids)
-			doc.traccar_geofence_id = geofence_id
+			frappe.db.set_value(
+				"Location", doc.name, "traccar_geofence_id", geofence_id, update_modified=False
+			)
+			clear_geofence_location_cache()
+
+
+def reconcile_traccar_geofences(dry_run=False):
+	"""
+	Brings Traccar's geofences in line with the Locations, against a single /api/geofences listing
+	that also refreshes the geofence mirror. Synced Locations without a geofence in Traccar get one
+	through `apply_traccar_geofence`, geofences whose name or area differ are updated, and those of
+	Locations no longer synced are deleted. Traccar Geofence IDs that no longer exist in Traccar
+	are cleared. Each Location is applied on its own, so one failure doesn't stop the rest.
+
+	:param dry_run: bool; only report what would change
+	:return: dict; counts of geofences "created", "updated", "deleted", "cleared", "unchanged" and
+	"failed", and the names of the "failed_locations", None if Traccar is not enabled. A dry run
+	counts what would be done and lists the Locations to "create", the fields to "update" per
+	Location, the Locations to "delete" and "clear_id" of, and the ids of "orphaned" geofences.
+	"""
+	geofences = get_traccar_geofences()
+	if geofences is None:
+		return
+	update_traccar_geofence_mirror(*geofences)
+	geofences = {g["id"]: g for g in geofences}
+
+	locations = frappe.get_all(
+		"Location",
+		fields=["name", "location", "sync_traccar_geofence", "traccar_geofence_id"],
+		or_filters={"sync_traccar_geofence": 1, "traccar_geofence_id": ["is", "set"]},
+	)
+	create, update, delete, clear, unchanged = [], {}, [], [], 0
+	for location in locations:
+		geofence = geofences.get(cint(location.traccar_geofence_id))
+		if location.traccar_geofence_id and not geofence:
+			clear.append(location.name)
+		if not location.sync_traccar_geofence:
+			if geofence:
+				delete.append(location.name)
+			continue
+		area = get_geofence_area(location.location)
+		if not area:
+			continue
+		if not geofence:
+			create.append(location.name)
+			continue
+		changes = get_traccar_changes(geofence, {"name": location.name})
+		if get_geofence_area_hash(geofence.get("area") or "") != get_geofence_area_hash(area):
+			changes["area"] = area
+		if changes:
+			update[location.name] = changes
+		else:
+			unchanged += 1
+
+	if dry_run:
+		referenced = {cint(loc.traccar_geofence_id) for loc in locations}
+		return {
+			"created": len(create),
+			"updated": len(update),
+			"deleted": len(delete),
+			"cleared": len(clear),
+			"unchanged": unchanged,
+			"failed": 0,
+			"failed_locations": [],
+			"create": create,
+			"update": {name: sorted(changes) for name, changes in update.items()},
+			"delete": delete,
+			"clear_id": clear,
+			"orphaned": sorted(g for g in geofences if g not in referenced),
+		}
+
+	failed = []
+	steps = [(name, "clear") for name in clear]
+	steps += [(name, "apply") for name in create + delete]
+	steps += [(name, "update") for name in update]
+	for name, step in steps:
+		frappe.db.savepoint("reconcile_traccar_geofence")
+		try:
+			if step == "clear":
+				frappe.db.set_value(
+					"Location", name, "traccar_geofence_id", "", update_modified=False
+				)
+			elif step == "apply":
+				apply_traccar_geofence(name)
+			else:
+				location_id = frappe.db.get_value("Location", name, "traccar_geofence_id")
+				update_traccar_geofence(location_id, update[name])
+		except Exception:
+			frappe.db.rollback(save_point="reconcile_traccar_geofence")
+			frappe.clear_messages()
+			failed.append(name)
+	if clear:
+		clear_geofence_location_cache()
+
+	if failed:
+		frappe.log_error(
+			title="Traccar Integration Error",
+			message=_("Failed to reconcile the geofence(s) of Location(s) {0} with Traccar").format(
+				", ".join(sorted(set(failed)))
+			),
+		)
+	return {
+		"created": len([n for n in create if n not in failed]),
+		"updated": len([n for n in update if n not in failed]),
+		"deleted": len([n for n in delete if n not in failed]),
+		"cleared": len([n for n in clear if n not in failed]),
+		"unchanged": unchanged,
+		"failed": len(set(failed)),
+		"failed_locations": sorted(set(failed)),
+	}
+
+
+def get_geofence_area(location):
+	"""
+	Returns the area of the geofence feature in a Location's GeoJSON, in Traccar's WKT format.
+
+	:param location: str; GeoJSON from the Location's "location" field
+	:return: str | None; None if there is no polyline or polygon feature
+	"""
+	for feature in json.loads(location or "{}").get("features", []):
+		feat_type = feature.get("geometry", {}).get("type")
+		if feat_type in ["LineString", "Polygon"]:
+			coords = []
+			flatten_coordinates(coord_list=coords, item=feature["geometry"]["coordinates"])
+			return coords_list_to_wkt_format(feat_type, coords)
 
 
 def has_valid_feature_type(geojson):
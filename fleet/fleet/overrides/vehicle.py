@@ -3,7 +3,7 @@
 
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import frappe
 from croniter import croniter
@@ -15,13 +15,8 @@ from frappe.utils.data import get_datetime, now_datetime
 class FleetVehicle(Vehicle):
 	@property
 	def gps_location(self):
-		coords = frappe.db.get_value(
-			"Vehicle Log",
-			{"license_plate": self.name},
-			["longitude", "latitude"],
-			order_by="creation DESC",
-		)
-		if not coords:
+		coords = frappe.db.get_value("Vehicle State", self.name, ["longitude", "latitude"])
+		if not coords or None in coords:
 			return None
 		# encode to geojson, which uses (lon, lat) order
 		geojson = {
@@ -34,58 +29,177 @@ class FleetVehicle(Vehicle):
 
 	@property
 	def battery_level(self):
-		return frappe.db.get_value(
-			"Vehicle Log", {"license_plate": self.name}, "battery_level", order_by="creation DESC"
-		)
+		return frappe.db.get_value("Vehicle State", self.name, "battery_level")
 
 	@property
 	def most_recent_driver(self):
-		driver_emp = frappe.db.get_value(
-			"Vehicle Log",
-			{"license_plate": self.name},
-			["employee"],
-			order_by="creation DESC",
+		state = frappe.db.get_value(
+			"Vehicle State", self.name, ["driver", "employee"], as_dict=True
 		)
-		driver_docname = frappe.get_value("Driver", {"employee": driver_emp})
-		driver_emp_name = frappe.get_value("Employee", driver_emp, "employee_name")
-		return driver_docname, driver_emp_name
+		if not state:
+			return None, None
+		driver_emp_name = frappe.get_value("Employee", state.employee, "employee_name")
+		return state.driver, driver_emp_name
+
+
+# sorted set of Vehicle names scored by the timestamp of their next poll
+POLL_SCHEDULE_KEY = "fleet:vehicle_poll_schedule"
+POLL_BATCH_SIZE = 100
 
 
 def check_schedule_poll_frequency(doc, method=None):
+	"""
+	Reschedules the Vehicle when its poll frequency or polling mode changes and keeps the poll
+	schedule in step with the document once it is committed.
+	"""
 	old_value = doc.get_db_value("poll_frequency")
+	if old_value != doc.poll_frequency or doc.has_value_changed("adaptive_polling"):
+		doc.poll_frequency_next_execution = None
+	elif not (doc.has_value_changed("disabled") or doc.has_value_changed("traccar_imei")):
+		return
 
-	if old_value != doc.poll_frequency:
-		schedule_poll_frequency(doc, update=True)
+	vehicle, next_execution = doc.name, None
+	if is_poll_scheduled(doc):
+		next_execution = doc.poll_frequency_next_execution or get_first_poll(doc, now_datetime())
+		doc.poll_frequency_next_execution = next_execution
+	frappe.db.after_commit.add(lambda: update_poll_schedule(vehicle, next_execution))
 
 
-def schedule_poll_frequency(doc, update=False):
-	current_time = now_datetime()
-	last_execution = doc.poll_frequency_last_execution
-	next_execution = doc.poll_frequency_next_execution
+def remove_from_poll_schedule(doc, method=None):
+	update_poll_schedule(doc.name, None)
+
+
+def reschedule_renamed_vehicle(doc, method=None, *args):
+	rebuild_poll_schedule()
 
-	if doc.poll_frequency_last_execution:
-		last_execution = get_datetime(doc.poll_frequency_last_execution)
-	else:
-		last_execution = current_time
-		doc.db_set("poll_frequency_last_execution", last_execution, update_modified=False)
 
-	if doc.poll_frequency_next_execution and update is False:
-		next_execution = get_datetime(doc.poll_frequency_next_execution)
+def is_poll_scheduled(vehicle):
+	return bool(
+		(vehicle.poll_frequency or vehicle.adaptive_polling)
+		and vehicle.traccar_imei
+		and not vehicle.disabled
+	)
+
+
+def get_first_poll(vehicle, current_time):
+	# adaptive vehicles are polled on the next tick, then rescheduled from what it reports
+	if vehicle.adaptive_polling:
+		return current_time
+	return get_next_poll(vehicle.poll_frequency, current_time)
+
+
+def get_next_poll(poll_frequency, after):
+	return croniter(poll_frequency, get_datetime(after)).get_next(datetime)
+
+
+def update_poll_schedule(vehicle, next_execution):
+	"""
+	Adds, moves or (with no `next_execution`) removes a Vehicle in the poll schedule.
+
+	:param vehicle: str; Vehicle name
+	:param next_execution: datetime | str | None; time of the Vehicle's next poll
+	"""
+	key = frappe.cache.make_key(POLL_SCHEDULE_KEY)
+	if next_execution:
+		frappe.cache.zadd(key, {vehicle: get_datetime(next_execution).timestamp()})
 	else:
-		cron = croniter(doc.poll_frequency, last_execution)
-		next_execution = cron.get_next(datetime)
-		doc.db_set("poll_frequency_next_execution", next_execution, update_modified=False)
+		frappe.cache.zrem(key, vehicle)
+
+
+def get_poll_scheduled_vehicles(fields, filters=None):
+	return frappe.get_all(
+		"Vehicle",
+		filters={"disabled": 0, "traccar_imei": ["is", "set"], **(filters or {})},
+		or_filters={"poll_frequency": ["is", "set"], "adaptive_polling": 1},
+		fields=fields,
+	)
+
+
+def rebuild_poll_schedule():
+	"""
+	Loads every Vehicle with a poll frequency or adaptive polling into the poll schedule,
+	scheduling those that have never been scheduled.
+	"""
+	current_time = now_datetime()
+	vehicles = get_poll_scheduled_vehicles(
+		["name", "poll_frequency", "adaptive_polling", "poll_frequency_next_execution"]
+	)
+	unscheduled = {}
+	for v in vehicles:
+		if not v.poll_frequency_next_execution:
+			v.poll_frequency_next_execution = get_first_poll(v, current_time)
+			unscheduled[v.name] = {"poll_frequency_next_execution": v.poll_frequency_next_execution}
+	if unscheduled:
+		frappe.db.bulk_update("Vehicle", unscheduled, update_modified=False)
+
+	key = frappe.cache.make_key(POLL_SCHEDULE_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.delete(key)
+	if vehicles:
+		pipe.zadd(
+			key,
+			{v.name: get_datetime(v.poll_frequency_next_execution).timestamp() for v in vehicles},
+		)
+	pipe.execute()
+
+
+def run_poll_schedule():
+	"""
+	Polls the Vehicles whose next poll is due, in batches on the traccar queue, and advances their
+	next poll times: from the cron for a poll frequency, or from the last known state for adaptive
+	polling. Only due Vehicles are read, so the cost of a tick follows the number of due Vehicles
+	rather than the size of the fleet.
+	"""
+	from fleet.fleet.traccar import get_adaptive_poll_intervals
+
+	# RedisWrapper.exists prefixes the key itself
+	if not frappe.cache.exists(POLL_SCHEDULE_KEY):
+		rebuild_poll_schedule()
+
+	key = frappe.cache.make_key(POLL_SCHEDULE_KEY)
+
+	current_time = now_datetime()
+	# pop atomically so overlapping ticks can't poll a Vehicle twice
+	pipe = frappe.cache.pipeline()
+	pipe.zrangebyscore(key, "-inf", current_time.timestamp())
+	pipe.zremrangebyscore(key, "-inf", current_time.timestamp())
+	due, _removed = pipe.execute()
+	if not due:
+		return
+
+	# Vehicles disabled or cleared since they were scheduled drop out here
+	vehicles = get_poll_scheduled_vehicles(
+		["name", "traccar_id", "poll_frequency", "adaptive_polling"],
+		{"name": ["in", [v.decode() for v in due]]},
+	)
+	if not vehicles:
+		return
+
+	adaptive = [v.name for v in vehicles if v.adaptive_polling]
+	intervals = get_adaptive_poll_intervals(adaptive) if adaptive else {}
+	updates, schedule = {}, {}
+	for v in vehicles:
+		if v.adaptive_polling:
+			next_execution = current_time + timedelta(minutes=intervals[v.name])
+		else:
+			next_execution = get_next_poll(v.poll_frequency, current_time)
+		updates[v.name] = {
+			"poll_frequency_last_execution": current_time,
+			"poll_frequency_next_execution": next_execution,
+		}
+		schedule[v.name] = next_execution.timestamp()
+
+	frappe.db.bulk_update("Vehicle", updates, update_modified=False)
+	frappe.cache.zadd(key, schedule)
 
-	if current_time >= next_execution:
+	batch = [frappe._dict(name=v.name, traccar_id=v.traccar_id) for v in vehicles]
+	for i in range(0, len(batch), POLL_BATCH_SIZE):
 		frappe.enqueue(
-			method="fleet.fleet.traccar.sync_vehicle",
-			queue="long",
-			vehicle=doc.name,
+			method="fleet.fleet.traccar.sync_vehicle_positions",
+			queue="traccar",
+			vehicles=batch[i : i + POLL_BATCH_SIZE],
+			bulk=False,
 		)
-		cron = croniter(doc.poll_frequency, next_execution)
-		next_execution = cron.get_next(datetime)
-		doc.db_set("poll_frequency_last_execution", current_time, update_modified=False)
-		doc.db_set("poll_frequency_next_execution", next_execution, update_modified=False)
 
 
 def validate_poll_frequency_cron_format(doc, method=None):
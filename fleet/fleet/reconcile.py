@@ -0,0 +1,96 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+
+import json
+
+import frappe
+from frappe.utils.data import sbool
+
+from fleet.fleet.overrides.location import reconcile_traccar_geofences
+from fleet.fleet.traccar import (
+	get_traccar_client,
+	reconcile_geofence_permissions,
+	reconcile_traccar_devices,
+	sync_traccar_drivers,
+)
+
+# keys of the per-object reports that list differences rather than count them
+DRIFT_KEYS = (
+	"create",
+	"update",
+	"delete",
+	"clear_id",
+	"write_back_id",
+	"link",
+	"unlink",
+	"orphaned",
+)
+
+
+@frappe.whitelist()
+def reconcile_traccar(dry_run=True):
+	"""
+	Compares ERPNext with Traccar and returns the differences, applying them unless `dry_run`.
+	See `reconcile`.
+
+	:param dry_run: bool; only report the differences
+	:return: dict; reconciliation report
+	"""
+	frappe.only_for(["System Manager", "Fleet Manager"])
+	return reconcile(dry_run=sbool(dry_run))
+
+
+def reconcile(dry_run=True):
+	"""
+	Two-way reconciliation of Vehicles, Drivers and Locations with Traccar's devices, drivers,
+	geofences and device to geofence permissions. Runs the per-object reconcilers in order, so
+	objects created by one step can be linked by the next:
+
+	- `reconcile_traccar_devices`: devices created or updated, Traccar IDs written back
+	- `sync_traccar_drivers`: drivers created or renamed, Traccar User IDs written back
+	- `reconcile_traccar_geofences`: geofences created, updated or deleted, stale IDs cleared
+	- `reconcile_geofence_permissions`: devices linked and unlinked to match Geofenced Vehicles
+
+	Objects in Traccar that no Vehicle, Driver or Location accounts for are reported as orphaned
+	but left alone. A dry run only reports, and each step is compared against Traccar as it is, so
+	links to objects that a real run would create first are not counted.
+
+	:param dry_run: bool; only report the differences
+	:return: dict; each step's report by object type, None if Traccar is not enabled
+	"""
+	if not get_traccar_client():
+		return
+	return {
+		"dry_run": dry_run,
+		"devices": reconcile_traccar_devices(dry_run=dry_run),
+		"drivers": sync_traccar_drivers(dry_run=dry_run),
+		"geofences": reconcile_traccar_geofences(dry_run=dry_run),
+		"geofence_permissions": reconcile_geofence_permissions(dry_run=dry_run),
+	}
+
+
+def report_traccar_drift():
+	"""
+	Runs `reconcile` as a dry run and logs its report if ERPNext and Traccar differ, so drift the
+	hourly reconcilers don't repair is surfaced without changing anything. Runs daily.
+	"""
+	report = reconcile(dry_run=True)
+	if report and has_drift(report):
+		frappe.log_error(
+			title="Traccar Reconciliation Report",
+			message=json.dumps(report, indent=2, default=str),
+		)
+
+
+def has_drift(report):
+	"""
+	:param report: dict; from `reconcile` with dry_run
+	:return: bool; whether any step found something to change or an orphaned object
+	"""
+	return any(
+		result.get(key)
+		for result in report.values()
+		if isinstance(result, dict)
+		for key in DRIFT_KEYS
+	)
@@ -3,18 +3,83 @@
 
 
 import base64
+import contextvars
 import datetime
+import hashlib
+import hmac
+import itertools
 import json
+import re
 import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
+from zoneinfo import ZoneInfo
 
 import frappe
 import requests
+import websocket
 from dateutil import parser
 from frappe import _
+from frappe.model.naming import NamingSeries, getseries, set_new_name
+from frappe.utils.data import (
+	cint,
+	convert_utc_to_system_timezone,
+	flt,
+	get_datetime,
+	get_system_timezone,
+	now_datetime,
+)
 from frappe.utils.safe_exec import is_job_queued
-
-from fleet.fleet.overrides.vehicle import schedule_poll_frequency
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from werkzeug.exceptions import BadRequest
+
+from fleet.fleet import metrics
+from fleet.fleet.doctype.traccar_outbox.traccar_outbox import add_to_traccar_outbox
+from fleet.fleet.doctype.vehicle_state.vehicle_state import is_moving, update_vehicle_state
+from fleet.fleet.overrides.vehicle import run_poll_schedule
+
+POSITION_STREAM_QUEUE = "traccar_stream"
+POSITION_STREAM_RUNTIME = 3600  # seconds, the traccar_stream queue timeout is 8000
+POSITION_STREAM_BATCH_SIZE = 500
+POSITION_STREAM_FLUSH_INTERVAL = 5  # seconds
+POSITION_STREAM_MAX_BACKOFF = 300  # seconds
+POSITION_STREAM_HEARTBEAT_KEY = "fleet:traccar_position_stream"
+POSITION_STREAM_HEARTBEAT_TTL = 90  # seconds
+FORWARDED_POSITIONS_KEY = "fleet:traccar_forwarded_positions"
+FORWARDED_POSITIONS_FLUSH_KEY = "fleet:traccar_forwarded_positions_flush"
+FORWARDED_POSITIONS_FLUSH_TTL = 60  # seconds
+FORWARDED_POSITIONS_FLUSH_LOCK_KEY = "fleet:traccar_forwarded_positions_flush_lock"
+FORWARDED_POSITIONS_FLUSH_TIMEOUT = 1500  # seconds
+FORWARDED_POSITIONS_BATCH_SIZE = 500
+POSITION_WATERMARK_KEY = "fleet:traccar_position_watermark"
+BACKFILL_CHUNK = datetime.timedelta(hours=1)
+BACKFILL_PROGRESS_KEY = "fleet:traccar_backfill_progress"
+VEHICLE_LOG_INSERT_CHUNK_SIZE = 1000
+GEOFENCE_LOCATIONS_KEY = "fleet:traccar_geofence_locations"
+CIRCUIT_BREAKER_KEY = "fleet:traccar_circuit"
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_BASE_BACKOFF = 30  # seconds
+CIRCUIT_MAX_BACKOFF = 600  # seconds
+CIRCUIT_PROBE_TTL = 60  # seconds
+SYNC_SHARD_LOCK_KEY = "fleet:traccar_sync_shard_lock"
+SYNC_SHARD_STATS_KEY = "fleet:traccar_sync_shards"
+SYNC_SHARD_TIMEOUT = 600  # seconds
+TRACCAR_DRIVERS_KEY = "fleet:traccar_drivers"
+TRACCAR_DRIVERS_TTL = 3600  # seconds
+TRACCAR_DEVICES_KEY = "fleet:traccar_devices"
+TRACCAR_DEVICES_LOADED = "loaded"  # hash field marking a complete mirror
+TRACCAR_DEVICES_TTL = 3600  # seconds
+TRACCAR_DEVICE_IDS_KEY = "fleet:traccar_device_ids"  # uniqueId to ID index of the mirror
+TRACCAR_GEOFENCES_KEY = "fleet:traccar_geofences"
+TRACCAR_GEOFENCE_AREAS_KEY = "fleet:traccar_geofence_areas"
+TRACCAR_GEOFENCES_TTL = 3600  # seconds
+CUSTOMER_GEOFENCES_KEY = "fleet:traccar_customer_geofences"
+DRIVER_EMPLOYEES_KEY = "fleet:driver_employees"
+VEHICLE_DRIVERS_KEY = "fleet:vehicle_drivers"
+CACHED_MAP_TTL = 30  # seconds
+PERMISSIONS_BULK_SIZE = 500
 
 
 def sync_vehicles(traccar_settings=None):
@@ -24,24 +89,471 @@ def sync_vehicles(traccar_settings=None):
 	if not traccar_settings or not traccar_settings.enable_traccar:
 		return
 
-	custom_cron_vehicles = frappe.get_all(
+	with metrics.timer("fleet_sync_duration_seconds", job="sync_vehicles"):
+		_sync_vehicles(traccar_settings)
+
+
+def _sync_vehicles(traccar_settings):
+	# vehicles with their own poll frequency or adaptive polling are polled when due by the poll
+	# schedule
+	run_poll_schedule()
+
+	if traccar_settings.enable_position_stream and is_position_stream_alive():
+		# positions are already arriving over the socket, polling is only a fallback
+		return
+
+	if cint(traccar_settings.sync_shards) > 1:
+		enqueue_vehicle_shards(
+			cint(traccar_settings.sync_shards), bulk=traccar_settings.bulk_position_sync
+		)
+		return
+
+	sync_vehicle_positions(get_polled_vehicles(), bulk=traccar_settings.bulk_position_sync)
+
+
+def get_polled_vehicles():
+	"""
+	Returns the "name" and "traccar_id" of every enabled Vehicle synced on each scheduler tick,
+	which excludes those on the poll schedule.
+	"""
+	return frappe.get_all(
 		"Vehicle",
-		{"disabled": 0, "traccar_imei": ["is", "set"], "poll_frequency": ["is", "set"]},
-		pluck="name",
+		{
+			"disabled": 0,
+			"traccar_imei": ["is", "set"],
+			"poll_frequency": ["is", "not set"],
+			"adaptive_polling": 0,
+		},
+		["name", "traccar_id"],
 	)
 
-	other_vehicles = frappe.get_all(
-		"Vehicle",
-		{"disabled": 0, "traccar_imei": ["is", "set"], "poll_frequency": ["is", "not set"]},
-		pluck="name",
+
+def get_vehicle_shard(traccar_id, shards):
+	"""
+	Returns the shard a Traccar device belongs to. Stable across processes and restarts, unlike
+	hash(), so a device stays on the same shard while the shard count is unchanged.
+
+	:param traccar_id: int | str; Traccar device ID
+	:param shards: int; number of shards
+	:return: int
+	"""
+	return zlib.crc32(str(traccar_id).encode()) % shards
+
+
+def enqueue_vehicle_shards(shards, bulk=True):
+	"""
+	Enqueues one `sync_vehicle_shard` job per shard on the traccar queue, skipping shards whose
+	previous job is still queued or running. With `bulk`, every device's position is collected
+	here in a single request and each shard is passed its slice, so the fleet's positions are
+	downloaded once per tick rather than once per shard. The tick is skipped if Traccar can't be
+	reached.
+
+	:param shards: int; number of shards
+	:param bulk: bool; collect all positions in one request
+	"""
+	positions_by_shard = None
+	if bulk:
+		positions = collect_positions()
+		if positions is None:
+			return
+		positions_by_shard = {shard: [] for shard in range(shards)}
+		for position in positions:
+			if position.get("deviceId"):
+				shard = get_vehicle_shard(position["deviceId"], shards)
+				positions_by_shard[shard].append(position)
+
+	queue = "traccar"
+	for shard in range(shards):
+		job_name = f"fleet.fleet.traccar.sync_vehicle_shard:{shard}"
+		if is_job_queued(job_name, queue=queue):
+			continue
+		frappe.enqueue(
+			method=sync_vehicle_shard,
+			queue=queue,
+			timeout=SYNC_SHARD_TIMEOUT,
+			job_name=job_name,
+			shard=shard,
+			shards=shards,
+			positions=positions_by_shard[shard] if positions_by_shard else None,
+		)
+
+
+def sync_vehicle_shard(shard, shards, positions=None):
+	"""
+	Syncs the polled Vehicles in one shard and records the run in the shard stats. A cache lock
+	keeps two runs of the same shard from overlapping, e.g. when a slow run is still going as the
+	next tick's job starts.
+
+	:param shard: int; shard to sync
+	:param shards: int; number of shards the fleet is split into
+	:param positions: list | None; the shard's positions, already collected by
+	`enqueue_vehicle_shards`. Without them each device in the shard is requested.
+	:return: None
+	"""
+	lock_key = frappe.cache.make_key(f"{SYNC_SHARD_LOCK_KEY}:{shard}")
+	if not frappe.cache.set(lock_key, 1, nx=True, ex=SYNC_SHARD_TIMEOUT):
+		return
+
+	started = now_datetime()
+	start = time.monotonic()
+	vehicles, synced = [], None
+	try:
+		vehicles = [
+			v
+			for v in get_polled_vehicles()
+			if v.traccar_id and get_vehicle_shard(v.traccar_id, shards) == shard
+		]
+		with metrics.timer("fleet_sync_duration_seconds", job="sync_vehicle_shard"):
+			synced = sync_vehicle_positions(vehicles, bulk=False, positions=positions)
+	finally:
+		frappe.cache.delete(lock_key)
+		frappe.cache.hset(
+			SYNC_SHARD_STATS_KEY,
+			str(shard),
+			{
+				"shards": shards,
+				"started": str(started),
+				"duration": round(time.monotonic() - start, 3),
+				"vehicles": len(vehicles),
+				"positions": synced,
+				"failed": synced is None and bool(vehicles),
+			},
+		)
+
+
+@frappe.whitelist()
+def get_sync_shard_stats():
+	"""
+	Returns the latest run of each sync shard: when it started, how long it took, how many
+	vehicles it covered, how many positions it received and whether Traccar could be reached.
+	Shards beyond the current shard count are left out.
+
+	:return: dict; shard number to stats
+	"""
+	frappe.only_for(["System Manager", "Fleet Manager"])
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	shards = cint(traccar_settings.sync_shards)
+	stats = frappe.cache.hgetall(SYNC_SHARD_STATS_KEY) or {}
+	return {
+		int(shard): run
+		for shard, run in sorted(stats.items(), key=lambda item: int(item[0]))
+		if run.get("shards") == shards
+	}
+
+
+def sync_vehicle_positions(vehicles, bulk=True, positions=None):
+	"""
+	Collects the latest position of the given vehicles and creates a Vehicle Log for each one that
+	has one. With `bulk`, every device's position comes from a single request, otherwise each
+	device is requested concurrently.
+
+	:param vehicles: list; dicts with the "name" and "traccar_id" of each Vehicle to sync
+	:param bulk: bool; collect all positions in one request
+	:param positions: list | None; positions already collected from Traccar, nothing is requested
+	if given
+	:return: int | None; number of positions received for the vehicles, None if Traccar couldn't
+	be reached (errors are logged per Vehicle)
+	"""
+	vehicles_by_device = {str(v.traccar_id): v.name for v in vehicles if v.traccar_id}
+	if not vehicles_by_device:
+		return 0
+
+	if positions is None:
+		positions = collect_positions(None if bulk else vehicles_by_device.keys())
+		if positions is None:
+			return
+
+	positions = [p for p in positions or [] if str(p.get("deviceId")) in vehicles_by_device]
+	ingest_positions(positions, vehicles_by_device)
+	return len(positions)
+
+
+def collect_positions(device_ids=None):
+	"""
+	Collects the latest positions from Traccar, logging a failure rather than raising it.
+
+	:param device_ids: iterable | None; Traccar device IDs to request one by one, by default every
+	device's position is collected in a single request
+	:return: list | None; position JSON objects, None if Traccar couldn't be reached
+	"""
+	try:
+		if device_ids is None:
+			return get_latest_positions() or []
+		return get_device_positions(device_ids)
+	except TraccarUnavailable:
+		# the circuit breaker has already logged the outage
+		metrics.incr("fleet_sync_errors_total", stage="unavailable")
+	except Exception as e:
+		metrics.incr("fleet_sync_errors_total", stage="collect")
+		frappe.log_error(frappe.get_traceback(), _("Failed to sync vehicles with Traccar"))
+
+
+def ingest_positions(positions, vehicles_by_device=None):
+	"""
+	Creates a Vehicle Log for each Traccar position that belongs to a Vehicle, oldest first.
+
+	:param positions: list; Traccar position JSON objects
+	:param vehicles_by_device: dict | None; Traccar device ID (as str) to Vehicle name, defaults to
+	every enabled Vehicle with a Traccar ID
+	:return: None (errors are logged per Vehicle)
+	"""
+	if vehicles_by_device is None:
+		vehicles_by_device = get_vehicles_by_device()
+
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if traccar_settings.bulk_insert_vehicle_logs:
+		bulk_ingest_positions(positions, vehicles_by_device)
+		return
+
+	for position in sorted(positions, key=lambda p: p.get("fixTime") or ""):
+		vehicle = vehicles_by_device.get(str(position.get("deviceId")))
+		if not vehicle:
+			continue
+		try:
+			create_vehicle_log(frappe.get_doc("Vehicle", vehicle), position)
+		except Exception as e:
+			metrics.incr("fleet_sync_errors_total", stage="ingest")
+			frappe.log_error(
+				frappe.get_traceback(), _("Failed to sync vehicle {0} with Traccar").format(vehicle)
+			)
+
+
+def bulk_ingest_positions(positions, vehicles_by_device):
+	"""
+	Writes positions through `insert_vehicle_logs`. A failed batch is rolled back as a whole and
+	logged once.
+	"""
+	vehicle_docs, vehicle_positions = {}, []
+	for position in sorted(positions, key=lambda p: p.get("fixTime") or ""):
+		vehicle = vehicles_by_device.get(str(position.get("deviceId")))
+		if not vehicle:
+			continue
+		if vehicle not in vehicle_docs:
+			vehicle_docs[vehicle] = frappe.get_doc("Vehicle", vehicle)
+		vehicle_positions.append((vehicle_docs[vehicle], position))
+
+	frappe.db.savepoint("bulk_ingest_positions")
+	try:
+		insert_vehicle_logs(vehicle_positions)
+	except Exception as e:
+		frappe.db.rollback(save_point="bulk_ingest_positions")
+		metrics.incr("fleet_sync_errors_total", stage="ingest")
+		frappe.log_error(frappe.get_traceback(), _("Failed to sync vehicles with Traccar"))
+
+
+def get_vehicles_by_device():
+	"""
+	Returns a dict of Traccar device ID (as str) to Vehicle name for every enabled Vehicle
+	"""
+	vehicles = frappe.get_all(
+		"Vehicle", {"disabled": 0, "traccar_id": ["is", "set"]}, ["name", "traccar_id"]
 	)
+	return {str(v.traccar_id): v.name for v in vehicles}
+
+
+def ensure_position_stream():
+	"""
+	Starts the Traccar position stream consumer if streaming is enabled and a consumer is not
+	already queued or running. Scheduled every minute so a consumer that exits or crashes is
+	replaced. The consumer holds its worker for as long as it runs, so it has a queue of its own,
+	POSITION_STREAM_QUEUE, and never keeps polling and outbox jobs on the traccar queue waiting.
+	"""
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings or not traccar_settings.enable_traccar:
+		return
+	if not traccar_settings.enable_position_stream:
+		return
 
-	for v in custom_cron_vehicles:
-		v_doc = frappe.get_doc("Vehicle", v)
-		schedule_poll_frequency(v_doc, update=True)
+	job_name = "fleet.fleet.traccar.consume_position_stream"
+	queue = POSITION_STREAM_QUEUE
+	if not is_job_queued(job_name, queue=queue):
+		frappe.enqueue(
+			method=consume_position_stream,
+			queue=queue,
+			timeout=POSITION_STREAM_RUNTIME + 600,
+			job_name=job_name,
+		)
 
-	for v in other_vehicles:
-		sync_vehicle(v, traccar_settings=traccar_settings)
+
+def is_position_stream_alive():
+	return bool(frappe.cache.get_value(POSITION_STREAM_HEARTBEAT_KEY))
+
+
+def consume_position_stream(runtime=None):
+	"""
+	Subscribes to Traccar's /api/socket push stream and ingests the positions it sends in batches
+	until `runtime` seconds have elapsed, reconnecting with exponential backoff when the socket
+	drops. While connected, a heartbeat in the cache tells `sync_vehicles` to skip polling.
+
+	:param runtime: int | None; seconds to consume for before exiting, bounded so the job finishes
+	inside the traccar_stream queue timeout
+	:return: None
+	"""
+	deadline = time.monotonic() + (runtime or POSITION_STREAM_RUNTIME)
+	backoff = 1
+	while time.monotonic() < deadline:
+		client = get_traccar_client()
+		if not client:
+			return
+		try:
+			stream_positions(client, deadline)
+			backoff = 1
+		except Exception as e:
+			frappe.cache.delete_value(POSITION_STREAM_HEARTBEAT_KEY)
+			if backoff == 1:
+				# only log the first failure of a streak, retries are expected while Traccar is down
+				frappe.log_error(frappe.get_traceback(), _("Traccar position stream disconnected"))
+			time.sleep(min(backoff, max(deadline - time.monotonic(), 0)))
+			backoff = min(backoff * 2, POSITION_STREAM_MAX_BACKOFF)
+
+
+def stream_positions(client, deadline):
+	"""
+	Reads position messages from a single socket connection until `deadline`, flushing them to
+	`ingest_positions` every POSITION_STREAM_BATCH_SIZE positions or
+	POSITION_STREAM_FLUSH_INTERVAL seconds, whichever comes first.
+
+	:param client: TraccarClient
+	:param deadline: float; `time.monotonic()` value to stop reading at
+	:return: None (raises if the connection fails)
+	"""
+	ws = client.open_socket(timeout=POSITION_STREAM_FLUSH_INTERVAL)
+	buffer = []
+	last_flush = time.monotonic()
+	try:
+		while time.monotonic() < deadline:
+			try:
+				message = ws.recv()
+			except websocket.WebSocketTimeoutException:
+				# quiet fleet, make sure the connection is still up before refreshing the heartbeat
+				ws.ping()
+				message = None
+			if message:
+				buffer.extend(json.loads(message).get("positions") or [])
+			frappe.cache.set_value(
+				POSITION_STREAM_HEARTBEAT_KEY, 1, expires_in_sec=POSITION_STREAM_HEARTBEAT_TTL
+			)
+
+			if len(buffer) >= POSITION_STREAM_BATCH_SIZE or (
+				buffer and time.monotonic() - last_flush >= POSITION_STREAM_FLUSH_INTERVAL
+			):
+				ingest_positions(buffer)
+				frappe.db.commit()
+				buffer = []
+				last_flush = time.monotonic()
+	finally:
+		try:
+			if buffer:
+				ingest_positions(buffer)
+				frappe.db.commit()
+		finally:
+			ws.close()
+
+
+@frappe.whitelist(allow_guest=True, methods=["POST"])
+def receive_positions():
+	"""
+	Receiver for Traccar's position forwarding. Accepts a single forwarded position or a list of
+	them, either as Traccar's JSON forward payload ({"position": {...}, "device": {...}}) or as bare
+	position objects, and buffers them for `flush_forwarded_positions` to write in batches.
+
+	Configure Traccar with `forward.url` pointing at this method, `forward.json` set to true and
+	`forward.header` set to "X-Traccar-Token: <Forwarding Token>".
+
+	:return: dict; {"received": number of positions buffered}
+	"""
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings.enable_traccar or not traccar_settings.enable_position_forwarding:
+		raise frappe.PermissionError
+
+	token = frappe.get_request_header("X-Traccar-Token") or ""
+	if not hmac.compare_digest(token.encode(), get_forwarding_token(traccar_settings).encode()):
+		raise frappe.AuthenticationError
+
+	try:
+		payload = json.loads(frappe.request.get_data(as_text=True) or "[]")
+	except json.JSONDecodeError:
+		raise BadRequest(_("Forwarded positions must be JSON"))
+	if isinstance(payload, dict):
+		payload = [payload]
+	if not isinstance(payload, list):
+		raise BadRequest(_("Expected a position object or a list of them"))
+	positions = []
+	for item in payload:
+		position = item.get("position") if isinstance(item, dict) and "position" in item else item
+		if not isinstance(position, dict):
+			raise BadRequest(_("Expected a position object or a list of them"))
+		if position.get("deviceId"):
+			positions.append(position)
+	if positions:
+		# RedisWrapper.rpush only takes one value, push the whole batch through the raw client
+		pipe = frappe.cache.pipeline()
+		pipe.rpush(
+			frappe.cache.make_key(FORWARDED_POSITIONS_KEY), *(json.dumps(p) for p in positions)
+		)
+		pipe.execute()
+		schedule_forwarded_positions_flush()
+	return {"received": len(positions)}
+
+
+# one decrypted token per site for the lifetime of the worker process, keyed on the settings'
+# modified timestamp like the Traccar client
+_forwarding_tokens: dict[str, tuple[str, str]] = {}
+
+
+def get_forwarding_token(traccar_settings):
+	site = frappe.local.site
+	version = str(traccar_settings.modified)
+	cached = _forwarding_tokens.get(site)
+	if not cached or cached[0] != version:
+		token = traccar_settings.get_password("forwarding_token", raise_exception=False) or ""
+		cached = _forwarding_tokens[site] = (version, token)
+	return cached[1]
+
+
+def schedule_forwarded_positions_flush():
+	"""
+	Enqueues `flush_forwarded_positions` on the traccar queue unless a flush is already pending.
+	Uses a short-lived cache flag instead of inspecting the queue, since this runs on every
+	forwarded request.
+	"""
+	flush_key = frappe.cache.make_key(FORWARDED_POSITIONS_FLUSH_KEY)
+	if not frappe.cache.set(flush_key, 1, nx=True, ex=FORWARDED_POSITIONS_FLUSH_TTL):
+		return
+	frappe.enqueue(
+		method=flush_forwarded_positions,
+		queue="traccar",
+		job_name="fleet.fleet.traccar.flush_forwarded_positions",
+	)
+
+
+def flush_forwarded_positions():
+	"""
+	Writes buffered forwarded positions to Vehicle Logs, committing after each batch of
+	FORWARDED_POSITIONS_BATCH_SIZE. Positions are only removed from the buffer once their batch is
+	committed. A cache lock keeps two flushes from reading and trimming the same batch.
+	"""
+	# clear the pending flag first so positions that arrive while flushing schedule another run
+	frappe.cache.delete_value(FORWARDED_POSITIONS_FLUSH_KEY)
+	lock_key = frappe.cache.make_key(FORWARDED_POSITIONS_FLUSH_LOCK_KEY)
+	if not frappe.cache.set(lock_key, 1, nx=True, ex=FORWARDED_POSITIONS_FLUSH_TIMEOUT):
+		return
+	try:
+		vehicles_by_device = get_vehicles_by_device()
+		while True:
+			batch = frappe.cache.lrange(
+				FORWARDED_POSITIONS_KEY, 0, FORWARDED_POSITIONS_BATCH_SIZE - 1
+			)
+			if not batch:
+				break
+			ingest_positions([json.loads(p) for p in batch], vehicles_by_device)
+			frappe.db.commit()
+			frappe.cache.ltrim(FORWARDED_POSITIONS_KEY, len(batch), -1)
+	finally:
+		frappe.cache.delete(lock_key)
+	# a flush scheduled while this one held the lock gave up, pick up what arrived since
+	if frappe.cache.llen(FORWARDED_POSITIONS_KEY):
+		schedule_forwarded_positions_flush()
 
 
 def sync_vehicle(vehicle, traccar_settings=None):
@@ -53,14 +565,20 @@ def sync_vehicle(vehicle, traccar_settings=None):
 
 	vehicle_doc = frappe.get_doc("Vehicle", vehicle)
 	try:
-		position = get_vehicle_position(vehicle_doc)
-		if not position:
-			frappe.log_error(
-				_("No position data found for vehicle {0}").format(vehicle), "Traccar Integration Error"
-			)
-		log = create_vehicle_log(vehicle_doc, position)
+		with metrics.timer("fleet_sync_duration_seconds", job="sync_vehicle"):
+			position = get_vehicle_position(vehicle_doc)
+			if not position:
+				frappe.log_error(
+					_("No position data found for vehicle {0}").format(vehicle),
+					"Traccar Integration Error",
+				)
+			log = create_vehicle_log(vehicle_doc, position)
 
+	except TraccarUnavailable:
+		metrics.incr("fleet_sync_errors_total", stage="unavailable")
+		return
 	except Exception as e:
+		metrics.incr("fleet_sync_errors_total", stage="sync_vehicle")
 		frappe.log_error(
 			frappe.get_traceback(), _("Failed to sync vehicle {0} with Traccar").format(vehicle)
 		)
@@ -71,219 +589,988 @@ def get_vehicle_position(vehicle_doc):
 	Collects last known position of vehicle_doc's Vehicle from Traccar.
 
 	:param vehicle_doc: Vehicle doctype
-	:return: position JSON object if successful, None with raised error if not
+	:return: position JSON object if successful, None with raised error if not. Raises
+	TraccarUnavailable while the circuit breaker is open.
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	device_id = vehicle_doc.get("traccar_id")
 	if not device_id:
 		return
 
 	try:
-		response = requests.get(
-			urljoin(traccar_server_url, f"/api/positions?deviceId={device_id}"),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
-		positions = response.json()
+		with metrics.timer("fleet_vehicle_log_phase_seconds", phase="get_position"):
+			response = client.get(f"/api/positions?deviceId={device_id}")
+			positions = response.json()
 		return positions[-1] if positions else None
 
+	except TraccarUnavailable:
+		# the circuit breaker is open, let the caller skip the tick
+		raise
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
 
 
-def create_vehicle_log(vehicle_doc, position):
-	prior_vl = frappe.get_all(
-		"Vehicle Log",
-		filters={"license_plate": vehicle_doc.name, "docstatus": 1},
-		fields=["employee", "geofence_ids"],
-		order_by="modified desc",
-		limit=1,
+def get_latest_positions():
+	"""
+	Collects the last known position of every device the Traccar user has access to.
+
+	:return: list; position JSON objects if successful, None with raised error if not. Raises
+	TraccarUnavailable while the circuit breaker is open.
+	"""
+	client = get_traccar_client()
+	if not client:
+		return
+
+	try:
+		response = client.get("/api/positions")
+		return response.json()
+
+	except TraccarUnavailable:
+		# the circuit breaker is open, let the caller skip the tick
+		raise
+	except requests.exceptions.RequestException as e:
+		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
+
+
+def get_device_positions(device_ids):
+	"""
+	Collects the last known position of each of the given Traccar devices, one request per device
+	issued concurrently. Devices that fail are logged together in a single error. Raises
+	TraccarUnavailable if the circuit breaker suspended every request.
+
+	:param device_ids: iterable; Traccar device IDs
+	:return: list; position JSON objects for the devices that reported one
+	"""
+	client = get_traccar_client()
+	if not client:
+		return []
+
+	device_ids = list(device_ids)
+	results = run_concurrently(
+		lambda device_id: client.get(f"/api/positions?deviceId={device_id}").json(),
+		[(device_id,) for device_id in device_ids],
+	)
+	positions, failed, unavailable = [], [], None
+	for device_id, result in zip(device_ids, results):
+		if isinstance(result, TraccarUnavailable):
+			unavailable = result
+		elif isinstance(result, Exception):
+			failed.append(str(device_id))
+		elif result:
+			positions.append(result[-1])
+
+	if unavailable and not positions and not failed:
+		raise unavailable
+
+	if failed:
+		metrics.incr("fleet_sync_errors_total", len(failed), stage="collect")
+		frappe.log_error(
+			_("Failed to collect positions from Traccar for device(s) {0}").format(
+				", ".join(failed)
+			),
+			"Traccar Integration Error",
+		)
+	return positions
+
+
+def create_vehicle_log(vehicle_doc, position, prior_log=None):
+	"""
+	Creates and submits a Vehicle Log from a Traccar position.
+
+	:param vehicle_doc: Vehicle doctype
+	:param position: dict; Traccar position JSON object
+	:param prior_log: dict | None; the "employee", "geofence_ids" and "odometer" of the log that
+	precedes this position. Only passed when backfilling history, in which case the position
+	watermark is neither checked nor advanced.
+	:return: Vehicle Log doc | None if the position was skipped
+	"""
+	backfill = prior_log is not None
+	if not backfill:
+		with metrics.timer("fleet_vehicle_log_phase_seconds", phase="watermark"):
+			watermark = get_position_watermark(vehicle_doc.name)
+			is_new = is_new_position(position, watermark)
+		if not is_new:
+			metrics.incr("fleet_positions_duplicate_total")
+			return
+		prior_log = get_prior_vehicle_log(vehicle_doc.name)
+
+	last_odometer = prior_log.odometer if backfill else vehicle_doc.last_odometer
+	frappe.set_user("Traccar")
+	log = frappe.new_doc("Vehicle Log")
+	log.update(get_vehicle_log_values(vehicle_doc, position, prior_log, last_odometer))
+	with metrics.timer("fleet_vehicle_log_phase_seconds", phase="insert"):
+		log.save(ignore_permissions=True)
+	with metrics.timer("fleet_vehicle_log_phase_seconds", phase="submit"):
+		log.submit()
+	if not backfill:
+		defer_position_watermark(vehicle_doc.name, log)
+		observe_position_lag(log)
+	metrics.incr("fleet_positions_ingested_total")
+
+	if log.diagnostic:
+		enqueue_draft_asset_repair(vehicle_doc.name, log.diagnostic)
+
+	return log
+
+
+def get_prior_vehicle_log(vehicle):
+	return (
+		frappe.db.get_value(
+			"Vehicle State", vehicle, ["employee", "geofence_ids", "odometer"], as_dict=True
+		)
+		or frappe._dict()
 	)
-	last_emp = prior_vl[0].employee if prior_vl else None
-	prior_gf_id_str = (prior_vl[0].geofence_ids or "") if prior_vl else ""
+
+
+def observe_position_lag(log):
+	"""
+	Records how long after its fix time a position was logged, which is the sync lag to alert on.
+	"""
+	if log.traccar_fix_time:
+		lag = now_datetime() - get_datetime(log.traccar_fix_time)
+		metrics.observe("fleet_position_lag_seconds", max(lag.total_seconds(), 0))
+
+
+def get_vehicle_log_values(vehicle_doc, position, prior_log, last_odometer):
+	"""
+	Maps a Traccar position onto Vehicle Log fields.
+
+	:param vehicle_doc: Vehicle doctype
+	:param position: dict; Traccar position JSON object
+	:param prior_log: dict; the "employee" and "geofence_ids" of the preceding Vehicle Log
+	:param last_odometer: int | None; odometer reading before this position
+	:return: dict; Vehicle Log field values
+	"""
+	last_emp = prior_log.employee
+	prior_gf_id_str = prior_log.geofence_ids or ""
 	prior_geofence_ids = [int(s.strip()) for s in prior_gf_id_str.split(",") if s]
 	gf_ids = position.get("geofenceIds") or []
-	gf_changes = get_geofence_change(prior_geofence_ids, gf_ids)
+	with metrics.timer("fleet_vehicle_log_phase_seconds", phase="resolve_geofences"):
+		gf_changes = get_geofence_change(prior_geofence_ids, gf_ids)
 
 	timestamp = get_datetime_from_timestamp_string(
 		position.get("fixTime") or get_now_timestamp_string()
 	)
 	attributes = position.get("attributes", {})
 	distance_cf = get_distance_conversion_factor()
+	with metrics.timer("fleet_vehicle_log_phase_seconds", phase="resolve_driver"):
+		driver_emp = resolve_driver_employee(
+			vehicle_doc.name, attributes.get("driverUniqueId"), last_emp
+		)
+
+	return {
+		"doctype": "Vehicle Log",
+		"license_plate": vehicle_doc.name,
+		"date": timestamp.date(),
+		"employee": driver_emp,
+		"odometer": int(position.get("attributes", {}).get("totalDistance", 0) * distance_cf) + 1,
+		"last_odometer": last_odometer or 0,
+		"latitude": position.get("latitude"),
+		"longitude": position.get("longitude"),
+		"battery_level": position.get("attributes", {}).get("batteryLevel"),
+		"fuel_qty": attributes.get("fuel"),
+		"hours": attributes.get("hours") or attributes.get("engineHours"),
+		"engine_temperature": attributes.get("engineTemp") or attributes.get("temp"),
+		"speed": position.get("speed"),
+		"diagnostic": attributes.get("diagnostic", "")[:140],
+		"rpm": attributes.get("rpm"),
+		"geofence_ids": ",".join([str(id) for id in gf_ids]),
+		"geofences_entered": ",".join([gf for gf in gf_changes.entered]),
+		"geofences_exited": ",".join([gf for gf in gf_changes.exited]),
+		"traccar_position_id": position.get("id"),
+		"traccar_fix_time": get_fix_time(position),
+		"ignition": 1 if attributes.get("ignition") else 0,
+	}
+
+
+def enqueue_draft_asset_repair(vehicle, diagnostic):
+	asset_name = frappe.get_value("Asset", {"asset_name": vehicle})
+	if asset_name and not frappe.db.exists(
+		"Asset Repair", {"asset": asset_name, "description": ["like", f"%{diagnostic}%"]}
+	):
+		job_name = f"{asset_name}-{diagnostic[:25]}"
+		queue = "traccar"
+		if not is_job_queued(job_name, queue=queue):
+			frappe.enqueue(
+				method=create_draft_asset_repair,
+				queue=queue,
+				timeout=3600,
+				job_name=job_name,
+				asset_name=asset_name,
+				description=diagnostic,
+			)
+
+
+def insert_vehicle_logs(vehicle_positions):
+	"""
+	High-throughput alternative to `create_vehicle_log` for a batch of positions. Rows are built,
+	deduplicated against the position watermark and validated like the document path, then written
+	as submitted Vehicle Logs with multi-row inserts instead of a save and submit per row. Vehicle
+	Log's on_submit is mirrored by advancing each Vehicle's last odometer and Vehicle State.
+
+	Runs in the caller's transaction, which is responsible for committing.
+
+	:param vehicle_positions: list; (Vehicle doc, position) tuples, oldest first
+	:return: list; names of the inserted Vehicle Logs
+	"""
 	frappe.set_user("Traccar")
-	if attributes.get("driverUniqueId"):
-		driver_emp = frappe.get_value("Driver", attributes.get("driverUniqueId"), "employee")
-	elif last_emp:
-		driver_emp = last_emp
-	else:
-		vd = vehicle_doc.drivers[-1].driver if vehicle_doc.drivers else ""
-		driver_emp = frappe.get_value("Driver", vd, "employee")
+	logs, invalid = [], []
+	prior_logs, watermarks, last_odometers, latest_logs = {}, {}, {}, {}
+	for vehicle_doc, position in vehicle_positions:
+		vehicle = vehicle_doc.name
+		if vehicle not in watermarks:
+			watermarks[vehicle] = get_position_watermark(vehicle)
+			prior_logs[vehicle] = get_prior_vehicle_log(vehicle)
+			last_odometers[vehicle] = vehicle_doc.last_odometer
+		if not is_new_position(position, watermarks[vehicle]):
+			metrics.incr("fleet_positions_duplicate_total")
+			continue
+
+		log = frappe.new_doc("Vehicle Log")
+		log.update(
+			get_vehicle_log_values(
+				vehicle_doc, position, prior_logs[vehicle], last_odometers[vehicle]
+			)
+		)
+		# the same checks Vehicle Log would make on save, get_invalid_links also sets the
+		# fetch_from fields (make, model) that bulk_insert would otherwise leave empty
+		missing = log._get_missing_mandatory_fields()
+		invalid_links, cancelled_links = log.get_invalid_links(is_submittable=True)
+		if (
+			missing
+			or invalid_links
+			or cancelled_links
+			or flt(log.odometer) < flt(log.last_odometer)
+		):
+			invalid.append(f"{vehicle} ({position.get('id')})")
+			continue
 
-	log = frappe.new_doc("Vehicle Log")
-	log.update(
+		logs.append(log)
+		prior_logs[vehicle] = watermarks[vehicle] = latest_logs[vehicle] = log
+		last_odometers[vehicle] = log.odometer
+
+	if invalid:
+		frappe.log_error(
+			_("Skipped invalid positions for {0}").format(", ".join(invalid)),
+			"Traccar Integration Error",
+		)
+	if not logs:
+		return []
+
+	now = now_datetime()
+	rows = []
+	for log, name in zip(logs, reserve_names(logs)):
+		log.update(
+			{
+				"name": name,
+				"owner": frappe.session.user,
+				"modified_by": frappe.session.user,
+				"creation": now,
+				"modified": now,
+				"docstatus": 1,
+			}
+		)
+		rows.append(log.get_valid_dict(convert_dates_to_str=True))
+	fields = list(rows[0].keys())
+	with metrics.timer("fleet_vehicle_log_phase_seconds", phase="bulk_insert"):
+		frappe.db.bulk_insert(
+			"Vehicle Log",
+			fields,
+			[[row.get(f) for f in fields] for row in rows],
+			chunk_size=VEHICLE_LOG_INSERT_CHUNK_SIZE,
+		)
+	metrics.incr("fleet_positions_ingested_total", len(logs))
+	for log in logs:
+		observe_position_lag(log)
+
+	# Vehicle Log's on_submit and the app's own on_submit hook
+	for vehicle, log in latest_logs.items():
+		frappe.db.set_value("Vehicle", vehicle, "last_odometer", log.odometer)
+		update_vehicle_state(log)
+	for log in logs:
+		if log.diagnostic:
+			enqueue_draft_asset_repair(log.license_plate, log.diagnostic)
+
+	# a batch that is rolled back must be retried, so only advance the watermarks on commit
+	for vehicle, log in latest_logs.items():
+		defer_position_watermark(vehicle, log)
+
+	return [log.name for log in logs]
+
+
+def reserve_names(docs):
+	"""
+	Names a batch of new documents of one doctype from its naming series, advancing the series
+	counter once for the whole batch instead of once per document. Falls back to naming each
+	document individually if the series doesn't end in its counter.
+
+	:param docs: list; unsaved documents of the same doctype with `naming_series` set
+	:return: list; names in the same order as `docs`
+	"""
+	series = docs[0].naming_series
+	series = series if "#" in series else f"{series}.#####"
+	if not series.endswith("#"):
+		for doc in docs:
+			set_new_name(doc)
+		return [doc.name for doc in docs]
+
+	digits = len(series) - len(series.rstrip("#"))
+	naming_series = NamingSeries(series)
+	prefix = naming_series.get_prefix()
+	# getseries locks the counter row for the rest of the transaction, so moving the counter on
+	# past the rest of the batch can't race another writer
+	first = int(getseries(prefix, digits))
+	if len(docs) > 1:
+		naming_series.update_counter(first + len(docs) - 1)
+	return [f"{prefix}{number:0{digits}d}" for number in range(first, first + len(docs))]
+
+
+@frappe.whitelist()
+def backfill_vehicle_logs(from_datetime, to_datetime, vehicles=None):
+	"""
+	Recovers positions missed while syncing was down by enqueuing a backfill job per Vehicle on
+	the traccar queue. From the command line:
+
+	bench --site <site> backfill-vehicle-logs --from "2025-06-01 08:00" --to "2025-06-01 12:00"
+
+	:param from_datetime: str | datetime; start of the range, in the system timezone
+	:param to_datetime: str | datetime; end of the range, in the system timezone
+	:param vehicles: list | None; Vehicle names, defaults to every enabled Vehicle with a Traccar ID
+	:return: list; the Vehicles a backfill was enqueued for
+	"""
+	frappe.only_for(["System Manager", "Fleet Manager"])
+	if get_datetime(from_datetime) >= get_datetime(to_datetime):
+		frappe.throw(_("Backfill start must be before its end"))
+
+	vehicles = frappe.parse_json(vehicles) if vehicles else list(get_vehicles_by_device().values())
+	enqueued = []
+	queue = "traccar"
+	for vehicle in vehicles:
+		job_name = f"fleet.fleet.traccar.backfill_vehicle:{vehicle}"
+		if is_job_queued(job_name, queue=queue):
+			continue
+		frappe.enqueue(
+			method=backfill_vehicle,
+			queue=queue,
+			timeout=7200,
+			job_name=job_name,
+			vehicle=vehicle,
+			from_datetime=str(from_datetime),
+			to_datetime=str(to_datetime),
+		)
+		enqueued.append(vehicle)
+	return enqueued
+
+
+def backfill_vehicle(vehicle, from_datetime, to_datetime):
+	"""
+	Pulls a Vehicle's positions for the given range from Traccar's route report in BACKFILL_CHUNK
+	sized windows and logs the ones that have no Vehicle Log yet. Positions that fail validation
+	are skipped and logged. Each window is committed before the next is requested and its end
+	recorded, so a re-run of the same range resumes where the previous one stopped.
+
+	:param vehicle: str; Vehicle name
+	:param from_datetime: str | datetime; start of the range, in the system timezone
+	:param to_datetime: str | datetime; end of the range, in the system timezone
+	:return: int; number of Vehicle Logs created
+	"""
+	client = get_traccar_client()
+	vehicle_doc = frappe.get_doc("Vehicle", vehicle)
+	if not client or not vehicle_doc.traccar_id:
+		return 0
+
+	start, end = get_datetime(from_datetime), get_datetime(to_datetime)
+	progress = frappe.cache.hget(BACKFILL_PROGRESS_KEY, vehicle)
+	if progress and progress.from_datetime == start and progress.to_datetime == end:
+		start = progress.completed_until
+
+	prior_log = frappe.db.get_value(
+		"Vehicle Log",
+		{"license_plate": vehicle, "docstatus": 1, "traccar_fix_time": ["<", start]},
+		["employee", "geofence_ids", "odometer"],
+		order_by="traccar_fix_time desc",
+		as_dict=True,
+	) or frappe._dict()
+
+	created = 0
+	while start < end:
+		chunk_end = min(start + BACKFILL_CHUNK, end)
+		logged = set(
+			frappe.get_all(
+				"Vehicle Log",
+				{
+					"license_plate": vehicle,
+					"docstatus": 1,
+					"traccar_fix_time": ["between", [start, chunk_end]],
+				},
+				pluck="traccar_position_id",
+			)
+		)
+		# backfilled logs are older than the latest, don't let their submit wind the odometer back
+		last_odometer = frappe.db.get_value("Vehicle", vehicle, "last_odometer")
+		skipped = []
+		for position in get_route_positions(client, vehicle_doc.traccar_id, start, chunk_end):
+			if str(position.get("id")) in logged:
+				continue
+			# skip positions that fail validation, so a bad one can't stop every resume
+			frappe.db.savepoint("backfill_position")
+			try:
+				log = create_vehicle_log(vehicle_doc, position, prior_log=prior_log)
+			except Exception as e:
+				frappe.db.rollback(save_point="backfill_position")
+				frappe.clear_messages()
+				skipped.append(f"{position.get('id')} ({position.get('fixTime')}): {e}")
+				continue
+			prior_log = frappe._dict(
+				employee=log.employee, geofence_ids=log.geofence_ids, odometer=log.odometer
+			)
+			created += 1
+		if skipped:
+			frappe.log_error(
+				_("Skipped positions backfilling {0}:\n{1}").format(vehicle, "\n".join(skipped)),
+				"Traccar Integration Error",
+			)
+		if frappe.db.get_value("Vehicle", vehicle, "last_odometer") != last_odometer:
+			frappe.db.set_value("Vehicle", vehicle, "last_odometer", last_odometer)
+		frappe.db.commit()
+
+		frappe.cache.hset(
+			BACKFILL_PROGRESS_KEY,
+			vehicle,
+			frappe._dict(
+				from_datetime=get_datetime(from_datetime),
+				to_datetime=end,
+				completed_until=chunk_end,
+			),
+		)
+		start = chunk_end
+
+	frappe.cache.hdel(BACKFILL_PROGRESS_KEY, vehicle)
+	return created
+
+
+def get_route_positions(client, device_id, from_datetime, to_datetime):
+	"""
+	Yields the positions in Traccar's route report for a device and time range, parsing the
+	response as it streams in rather than loading it whole.
+
+	:param client: TraccarClient
+	:param device_id: int | str; Traccar device ID
+	:param from_datetime: datetime; start of the range, in the system timezone
+	:param to_datetime: datetime; end of the range, in the system timezone
+	:return: generator of position JSON objects
+	"""
+	params = {
+		"deviceId": device_id,
+		"from": get_utc_timestamp_string(from_datetime),
+		"to": get_utc_timestamp_string(to_datetime),
+	}
+	with client.get(
+		"/api/reports/route", params=params, headers={"Accept": "application/json"}, stream=True
+	) as response:
+		yield from iter_json_array(response)
+
+
+def iter_json_array(response, chunk_size=65536):
+	"""
+	Yields the items of a JSON array response body one at a time as chunks arrive.
+
+	:param response: requests.Response opened with stream=True
+	:param chunk_size: int; bytes to read at a time
+	:return: generator of decoded items
+	"""
+	decoder = json.JSONDecoder()
+	response.encoding = response.encoding or "utf-8"
+	buffer, started = "", False
+	for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+		buffer += chunk
+		position = 0
+		if not started:
+			buffer = buffer.lstrip()
+			if not buffer:
+				continue
+			if buffer[0] != "[":
+				raise ValueError(_("Expected a JSON array from Traccar"))
+			started, position = True, 1
+		while True:
+			while position < len(buffer) and buffer[position] in " \t\r\n,":
+				position += 1
+			if position >= len(buffer) or buffer[position] == "]":
+				break
+			try:
+				item, position = decoder.raw_decode(buffer, position)
+			except json.JSONDecodeError:
+				# the rest of this item hasn't arrived yet
+				break
+			yield item
+		buffer = buffer[position:]
+
+
+def get_position_watermark(vehicle):
+	"""
+	Returns the Traccar position id, fix time and coordinates of the last position logged for
+	`vehicle`. Kept in the cache and read from its Vehicle State on a miss. A position logged in
+	the current transaction takes precedence, see `defer_position_watermark`.
+
+	:param vehicle: str; Vehicle name
+	:return: frappe._dict; empty if nothing has been logged from Traccar yet
+	"""
+	pending = get_pending_position_watermarks().get(vehicle)
+	if pending:
+		return pending
+
+	watermark = frappe.cache.hget(POSITION_WATERMARK_KEY, vehicle)
+	if watermark is not None:
+		return watermark
+
+	watermark = frappe.db.get_value(
+		"Vehicle State",
+		vehicle,
+		["traccar_position_id", "traccar_fix_time", "latitude", "longitude"],
+		as_dict=True,
+	) or frappe._dict()
+	frappe.cache.hset(POSITION_WATERMARK_KEY, vehicle, watermark)
+	return watermark
+
+
+def defer_position_watermark(vehicle, log):
+	"""
+	Advances `vehicle`'s watermark to `log` once the transaction commits, so a position whose log
+	is rolled back is ingested again. Until then the watermark is only seen by this transaction.
+
+	:param vehicle: str; Vehicle name
+	:param log: Vehicle Log doc
+	"""
+	pending = get_pending_position_watermarks()
+	if not pending:
+		frappe.db.after_commit.add(write_pending_position_watermarks)
+		frappe.db.after_rollback.add(pending.clear)
+	pending[vehicle] = frappe._dict(
 		{
-			"doctype": "Vehicle Log",
-			"license_plate": vehicle_doc.name,
-			"date": timestamp.date(),
-			"employee": driver_emp,
-			"odometer": int(position.get("attributes", {}).get("totalDistance", 0) * distance_cf) + 1,
-			"last_odometer": vehicle_doc.last_odometer or 0,
-			"latitude": position.get("latitude"),
-			"longitude": position.get("longitude"),
-			"battery_level": position.get("attributes", {}).get("batteryLevel"),
-			"fuel_qty": attributes.get("fuel"),
-			"hours": attributes.get("hours") or attributes.get("engineHours"),
-			"engine_temperature": attributes.get("engineTemp") or attributes.get("temp"),
-			"speed": position.get("speed"),
-			"diagnostic": attributes.get("diagnostic", "")[:140],
-			"rpm": attributes.get("rpm"),
-			"geofence_ids": ",".join([str(id) for id in gf_ids]),
-			"geofences_entered": ",".join([gf for gf in gf_changes.entered]),
-			"geofences_exited": ",".join([gf for gf in gf_changes.exited]),
+			"traccar_position_id": log.traccar_position_id,
+			"traccar_fix_time": log.traccar_fix_time,
+			"latitude": log.latitude,
+			"longitude": log.longitude,
 		}
 	)
-	log.save(ignore_permissions=True)
-	log.submit()
 
-	if log.diagnostic:
-		asset_name = frappe.get_value("Asset", {"asset_name": vehicle_doc.name})
-		if asset_name and not frappe.db.exists(
-			"Asset Repair", {"asset": asset_name, "description": ["like", f"%{log.diagnostic}%"]}
-		):
-			job_name = f"{asset_name}-{log.diagnostic[:25]}"
-			queue = "traccar"
-			if not is_job_queued(job_name, queue=queue):
-				frappe.enqueue(
-					method=create_draft_asset_repair,
-					queue=queue,
-					timeout=3600,
-					job_name=job_name,
-					asset_name=asset_name,
-					description=log.diagnostic,
-				)
+
+def get_pending_position_watermarks():
+	"""
+	:return: dict; Vehicle name to the watermark of the last position logged in the current
+	transaction
+	"""
+	if frappe.flags.pending_position_watermarks is None:
+		frappe.flags.pending_position_watermarks = {}
+	return frappe.flags.pending_position_watermarks
+
+
+def write_pending_position_watermarks():
+	pending = get_pending_position_watermarks()
+	for vehicle, watermark in pending.items():
+		frappe.cache.hset(POSITION_WATERMARK_KEY, vehicle, watermark)
+	pending.clear()
+
+
+def is_new_position(position, watermark):
+	"""
+	Decides whether a Traccar position should be logged given the vehicle's watermark. Positions
+	already logged, or older than the last logged one, are skipped. Positions reported while
+	parked at the last logged coordinates are coalesced into one log per Stationary Log Interval.
+
+	:param position: dict; Traccar position JSON object
+	:param watermark: dict; see `get_position_watermark`
+	:return: bool
+	"""
+	if not watermark or not watermark.traccar_fix_time:
+		return True
+
+	if position.get("id") and str(position.get("id")) == str(watermark.traccar_position_id or ""):
+		return False
+
+	fix_time = get_fix_time(position)
+	if not fix_time:
+		return True
+	if fix_time <= watermark.traccar_fix_time:
+		return False
+
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	interval = traccar_settings.stationary_log_interval
+	if interval and not position.get("speed") and is_same_coordinates(position, watermark):
+		return fix_time - watermark.traccar_fix_time >= datetime.timedelta(minutes=interval)
+
+	return True
+
+
+def is_same_coordinates(position, watermark, precision=5):
+	# five decimal places is roughly a metre
+	return round(flt(position.get("latitude")), precision) == round(
+		flt(watermark.latitude), precision
+	) and round(flt(position.get("longitude")), precision) == round(
+		flt(watermark.longitude), precision
+	)
+
+
+def get_fix_time(position):
+	"""
+	Returns the position's fixTime as a naive datetime in the system timezone, to match how
+	Datetime fields are stored.
+
+	:param position: dict; Traccar position JSON object
+	:return: datetime.datetime | None
+	"""
+	timestamp = get_datetime_from_timestamp_string(position.get("fixTime"))
+	if not timestamp:
+		return
+	if not timestamp.tzinfo:
+		timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+	return convert_utc_to_system_timezone(timestamp).replace(tzinfo=None)
 
 
 def get_traccar_device(device_uniqid):
 	"""
-	Collects device data from Traccar.
+	Collects device data from Traccar, through the cached device mirror. A device missing from the
+	mirror is requested from Traccar directly in case it was created since the mirror was loaded.
 
 	:param device_uniqid: str; Traccar uniqueID for a device (Traccar IMEI on Vehicle)
 	:return: device data JSON object if successful, None with raised error if not
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		response = requests.get(
-			urljoin(traccar_server_url, f"/api/devices?uniqueId={device_uniqid}"),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
-		device = response.json()
+		pipe = frappe.cache.pipeline()
+		pipe.hget(frappe.cache.make_key(TRACCAR_DEVICES_KEY), TRACCAR_DEVICES_LOADED)
+		pipe.hget(frappe.cache.make_key(TRACCAR_DEVICE_IDS_KEY), device_uniqid)
+		loaded, device_id = pipe.execute()
+		if not loaded:
+			devices = get_traccar_device_mirror(refresh=True)
+			device_id = {d["uniqueId"]: d["id"] for d in devices.values()}.get(device_uniqid)
+		if device_id:
+			device = get_mirrored_traccar_device(int(device_id))
+			# the index isn't pruned when a device's uniqueId changes
+			if device and device["uniqueId"] == device_uniqid:
+				return device
+
+		device = client.get(f"/api/devices?uniqueId={device_uniqid}").json()
+		if device:
+			update_traccar_device_mirror(device[0])
 		return device[0] if device else None
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
 
 
-def add_traccar_device(vehicle_doc, method=None):
+def get_traccar_device_mirror(refresh=False):
+	"""
+	Returns Traccar's devices keyed by ID. The mirror is loaded from /api/devices when missing or
+	older than TRACCAR_DEVICES_TTL and kept current by the app's own writes, so reading a device
+	before changing it costs no request. Devices are stored as one hash field each, so a write
+	updates a single device rather than the whole mirror.
+
+	:param refresh: bool; reload the mirror from Traccar
+	:return: dict; Traccar device ID (str) to device JSON object
+	"""
+	if not refresh:
+		pipe = frappe.cache.pipeline()
+		pipe.hgetall(frappe.cache.make_key(TRACCAR_DEVICES_KEY))
+		(stored,) = pipe.execute()
+		if stored.pop(TRACCAR_DEVICES_LOADED.encode(), None):
+			return {k.decode(): json.loads(v) for k, v in stored.items()}
+
+	client = get_traccar_client()
+	devices = client.get("/api/devices").json() or []
+	set_traccar_device_mirror(devices)
+	return {str(d["id"]): d for d in devices}
+
+
+def set_traccar_device_mirror(devices):
+	key = frappe.cache.make_key(TRACCAR_DEVICES_KEY)
+	ids_key = frappe.cache.make_key(TRACCAR_DEVICE_IDS_KEY)
+	mapping = {str(d["id"]): json.dumps(d) for d in devices}
+	mapping[TRACCAR_DEVICES_LOADED] = 1
+	pipe = frappe.cache.pipeline()
+	pipe.delete(key, ids_key)
+	pipe.hset(key, mapping=mapping)
+	if devices:
+		pipe.hset(ids_key, mapping={d["uniqueId"]: d["id"] for d in devices})
+	pipe.expire(key, TRACCAR_DEVICES_TTL)
+	pipe.expire(ids_key, TRACCAR_DEVICES_TTL)
+	pipe.execute()
+
+
+def get_mirrored_traccar_device(device_id):
 	"""
-	Adds a device to Traccar if it doesn't already exist.
+	Returns one device from the mirror, loading the mirror if it has expired.
+
+	:param device_id: int | str; Traccar device ID
+	:return: dict | None; Traccar device JSON object
+	"""
+	pipe = frappe.cache.pipeline()
+	pipe.hmget(frappe.cache.make_key(TRACCAR_DEVICES_KEY), TRACCAR_DEVICES_LOADED, str(device_id))
+	((loaded, device),) = pipe.execute()
+	if not loaded:
+		return get_traccar_device_mirror(refresh=True).get(str(device_id))
+	return json.loads(device) if device else None
+
+
+def update_traccar_device_mirror(*devices):
+	"""
+	Writes devices created or changed in Traccar through to the mirror and its uniqueId index.
+	Until the mirror is (re)loaded the written fields are ignored, as they don't make a complete
+	mirror.
+
+	:param devices: dict; Traccar device JSON objects
+	"""
+	if not devices:
+		return
+	pipe = frappe.cache.pipeline()
+	pipe.hset(
+		frappe.cache.make_key(TRACCAR_DEVICES_KEY),
+		mapping={str(d["id"]): json.dumps(d) for d in devices},
+	)
+	pipe.hset(
+		frappe.cache.make_key(TRACCAR_DEVICE_IDS_KEY),
+		mapping={d["uniqueId"]: d["id"] for d in devices},
+	)
+	pipe.execute()
+
+
+def remove_from_traccar_device_mirror(device_id):
+	key = frappe.cache.make_key(TRACCAR_DEVICES_KEY)
+	pipe = frappe.cache.pipeline()
+	pipe.hget(key, str(device_id))
+	pipe.hdel(key, str(device_id))
+	device, _deleted = pipe.execute()
+	if device:
+		pipe.hdel(frappe.cache.make_key(TRACCAR_DEVICE_IDS_KEY), json.loads(device)["uniqueId"])
+		pipe.execute()
+
+
+# fields that Traccar's copy of a Vehicle is built from; a save that changes none of them has
+# nothing to send
+TRACCAR_DEVICE_FIELDS = ("traccar_imei", "traccar_id", "disabled", "model")
+
+
+def queue_traccar_device_sync(vehicle_doc, method=None, *args):
+	"""
+	Records the Vehicle in the Traccar Outbox when it is new, renamed or one of
+	TRACCAR_DEVICE_FIELDS changed, so saving a Vehicle never waits on Traccar. The device is
+	created or updated, and Traccar ID filled in, shortly after the save is committed.
 
 	:param vehicle_doc: Vehicle doctype
 	:param method: str | None; method name function is called from
-	:return: None (error raised if unsuccessful)
+	:return: None
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	if not vehicle_doc.traccar_imei:
+		return
+	if method != "after_rename" and not (
+		vehicle_doc.is_new()
+		or any(vehicle_doc.has_value_changed(f) for f in TRACCAR_DEVICE_FIELDS)
+	):
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
-	device_uniqid = vehicle_doc.traccar_imei
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings.enable_traccar:
+		return
+	add_to_traccar_outbox("Vehicle", vehicle_doc.name)
+
 
-	if not device_uniqid:
+def reconcile_traccar_devices(vehicles=None, dry_run=False):
+	"""
+	Brings Traccar's devices in line with the Vehicles that have a Traccar IMEI, against a single
+	/api/devices listing that also refreshes the device mirror. Missing devices are created and
+	devices whose name, disabled flag or model differ are updated, with the requests issued
+	concurrently; devices that already match cost nothing. Traccar IDs are written back to the
+	Vehicles in one bulk update.
+
+	Runs hourly to catch drift, and for the Vehicles saved since the last run when the Traccar
+	Outbox is drained.
+
+	:param vehicles: list | None; Vehicle names to reconcile, by default every Vehicle
+	:param dry_run: bool; only report what would change
+	:return: dict; counts of devices "created", "updated", "unchanged" and "failed", and the
+	names of the "failed_vehicles", None if Traccar is not enabled. A dry run counts what would be
+	done and lists the Vehicles to "create", the fields to "update" per Vehicle, the Vehicles to
+	"write_back_id" to, and, when reconciling every Vehicle, the uniqueIds of "orphaned" devices.
+	"""
+	client = get_traccar_client()
+	if not client:
 		return
 
+	filters = {"traccar_imei": ["is", "set"]}
+	if vehicles:
+		filters["name"] = ["in", vehicles]
+	vehicle_list = frappe.get_all(
+		"Vehicle", filters, ["name", "traccar_imei", "traccar_id", "disabled", "model"]
+	)
+	if not vehicle_list:
+		return {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "failed_vehicles": []}
+
 	try:
-		device = get_traccar_device(device_uniqid)
-		if device and not vehicle_doc.traccar_id:
-			vehicle_doc.traccar_id = device["id"]
+		devices = {d["uniqueId"]: d for d in get_traccar_device_mirror(refresh=True).values()}
+	except requests.exceptions.RequestException as e:
+		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
 
+	missing, changed, traccar_ids = [], [], {}
+	for vehicle in vehicle_list:
+		device = devices.get(vehicle.traccar_imei)
 		if not device:
-			data = {
-				"id": int(device_uniqid),  # Traccar creates it's own ID
-				"name": vehicle_doc.name,
-				"uniqueId": device_uniqid,
-				"status": "",
-				"disabled": bool(vehicle_doc.disabled),
-				"lastUpdate": int(time.time()),
-				"positionId": 0,
-				"groupId": 0,
-				"phone": "",
-				"model": vehicle_doc.model,
-				"contact": "",
-				"category": "",
-				"attributes": {},
-			}
-			response = requests.post(
-				urljoin(traccar_server_url, "/api/devices"),
-				headers=headers,
-				timeout=10,
-				json=data,
-			)
-			response.raise_for_status()
-			r = response.json()
-			if r and r["id"]:
-				vehicle_doc.traccar_id = r["id"]
+			missing.append(vehicle)
+			continue
+		changes = get_traccar_changes(device, get_traccar_device_values(vehicle))
+		if changes:
+			changed.append((vehicle, {**device, **changes}))
+		if str(vehicle.traccar_id or "") != str(device["id"]):
+			traccar_ids[vehicle.name] = device["id"]
+
+	if dry_run:
+		imeis = {v.traccar_imei for v in vehicle_list}
+		return {
+			"created": len(missing),
+			"updated": len(changed),
+			"unchanged": len(vehicle_list) - len(missing) - len(changed),
+			"failed": 0,
+			"failed_vehicles": [],
+			"create": [v.name for v in missing],
+			"update": {
+				v.name: sorted(
+					get_traccar_changes(devices[v.traccar_imei], get_traccar_device_values(v))
+				)
+				for v, _device in changed
+			},
+			"write_back_id": sorted(traccar_ids),
+			"orphaned": [] if vehicles else sorted(uid for uid in devices if uid not in imeis),
+		}
 
-	except requests.exceptions.RequestException as e:
-		frappe.throw(_("Traccar server error: {0}").format(str(e)))
+	created = run_concurrently(
+		lambda v: client.post("/api/devices", json=get_new_traccar_device(v)).json(),
+		[(v,) for v in missing],
+	)
+	updated = run_concurrently(
+		lambda device: client.put(f"/api/devices/{device['id']}", json=device).json(),
+		[(device,) for _vehicle, device in changed],
+	)
+
+	update_traccar_device_mirror(
+		*(r for r in created + updated if r and not isinstance(r, Exception) and r.get("id"))
+	)
+	failed = []
+	for vehicle, result in zip(missing, created):
+		if isinstance(result, Exception) or not result.get("id"):
+			failed.append(vehicle.name)
+		else:
+			traccar_ids[vehicle.name] = result["id"]
+	failed_updates = [
+		vehicle.name
+		for (vehicle, _device), result in zip(changed, updated)
+		if isinstance(result, Exception)
+	]
+	failed_creates = len(failed)
+	failed.extend(failed_updates)
+
+	if traccar_ids:
+		frappe.db.bulk_update(
+			"Vehicle",
+			{name: {"traccar_id": str(traccar_id)} for name, traccar_id in traccar_ids.items()},
+			update_modified=False,
+		)
+
+	if failed:
+		frappe.log_error(
+			title="Traccar Integration Error",
+			message=_("Failed to create or update device(s) for Vehicle(s) {0} in Traccar").format(
+				", ".join(failed)
+			),
+		)
+	return {
+		"created": len(missing) - failed_creates,
+		"updated": len(changed) - len(failed_updates),
+		"unchanged": len(vehicle_list) - len(missing) - len(changed),
+		"failed": len(failed),
+		"failed_vehicles": failed,
+	}
+
+
+def get_traccar_device_values(vehicle):
+	"""
+	Returns the Traccar device fields a Vehicle determines.
+
+	:param vehicle: Vehicle doctype or dict with "name", "disabled" and "model"
+	:return: dict
+	"""
+	return {
+		"name": vehicle.name,
+		"disabled": bool(vehicle.disabled),
+		"model": vehicle.model or "",
+	}
+
+
+def get_traccar_changes(obj, values):
+	"""
+	Returns the entries of `values` that differ from the Traccar object.
+
+	:param obj: dict; Traccar device or geofence JSON object
+	:param values: dict; fields and their expected values
+	:return: dict; fields to change, empty if the object already matches
+	"""
+	# Traccar returns unset strings as null
+	return {k: v for k, v in values.items() if (obj.get(k) or type(v)()) != v}
+
+
+def get_new_traccar_device(vehicle):
+	return {
+		"id": int(vehicle.traccar_imei),  # Traccar creates it's own ID
+		"uniqueId": vehicle.traccar_imei,
+		"status": "",
+		"lastUpdate": int(time.time()),
+		"positionId": 0,
+		"groupId": 0,
+		"phone": "",
+		"contact": "",
+		"category": "",
+		"attributes": {},
+		**get_traccar_device_values(vehicle),
+	}
 
 
 def update_traccar_device(device_id, to_update):
 	"""
-	Updates given keys in `to_update` if device exists in Traccar.
+	Updates given keys in `to_update` if device exists in Traccar. The device is compared with the
+	mirror field by field and only PUT when something differs.
 
 	:param device_id: str; Traccar device ID
 	:param to_update: dict; the key-value pairs of data to update in Traccar
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		# Get the device from Traccar to perform an update
-		get_response = requests.get(
-			urljoin(traccar_server_url, f"/api/devices?id={device_id}"),
-			headers=headers,
-			timeout=10,
-		)
-		get_response.raise_for_status()
-		devices = get_response.json()
+		device = get_mirrored_traccar_device(device_id)
+		if not device:
+			# created outside the app since the mirror was loaded
+			devices = client.get(f"/api/devices?id={device_id}").json()
+			device = devices[0] if devices else None
 
-		if not devices:
+		if not device:
 			frappe.throw(_("Device with ID {0} does not exist in Traccar").format(device_id))
 
-		device = devices[0]
-		device.update(to_update)
-		device["lastUpdate"] = int(time.time())
+		changes = get_traccar_changes(device, to_update)
+		if not changes:
+			return
 
-		response = requests.put(
-			urljoin(traccar_server_url, f"/api/devices/{device_id}"),
-			headers=headers,
-			timeout=10,
-			json=device,
-		)
-		response.raise_for_status()
+		try:
+			device = client.put(f"/api/devices/{device_id}", json={**device, **changes}).json()
+		except requests.exceptions.HTTPError:
+			# the mirror may be stale, read the device from Traccar next time
+			remove_from_traccar_device_mirror(device_id)
+			raise
+		update_traccar_device_mirror(device)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
@@ -296,89 +1583,203 @@ def delete_traccar_device(device_id):
 	:param device_id: int | str; Traccar device ID
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		response = requests.delete(
-			urljoin(traccar_server_url, f"/api/devices/{device_id}"),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
+		client.delete(f"/api/devices/{device_id}")
+		remove_from_traccar_device_mirror(device_id)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
 
 
-def get_traccar_driver(driver_uniqid):
+def get_traccar_driver(driver_uniqid, refresh=False):
 	"""
-	Collects driver data from Traccar.
+	Collects driver data from Traccar, through the cached driver index.
 
 	:param driver_uniqid: str; Traccar uniqueID for a driver (name field on Driver)
+	:param refresh: bool; reload the index from Traccar first
 	:return: driver data JSON object if successful, None with raised error if not
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		response = requests.get(
-			urljoin(traccar_server_url, "/api/drivers"),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
-		drivers = response.json()
-		drivers = [d for d in drivers if d["uniqueId"] == driver_uniqid] if drivers else None
-		return drivers[0] if drivers else None
+		return get_traccar_driver_index(refresh).get(driver_uniqid)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
 
 
-def add_traccar_driver(driver_doc, method=None):
+def get_traccar_driver_index(refresh=False):
+	"""
+	Returns Traccar's drivers keyed by uniqueId. The index is loaded from /api/drivers when missing
+	or older than TRACCAR_DRIVERS_TTL and kept current by the app's own writes, so a lookup does not
+	download every driver. A driver created outside the app shows up at the next reload, or sooner
+	when creating it here is rejected as a duplicate, see `sync_traccar_drivers`.
+
+	:param refresh: bool; reload the index from Traccar
+	:return: dict; uniqueId to driver JSON object
+	"""
+	index = None if refresh else frappe.cache.get_value(TRACCAR_DRIVERS_KEY)
+	if index is None:
+		client = get_traccar_client()
+		index = {d["uniqueId"]: d for d in client.get("/api/drivers").json() or []}
+		set_traccar_driver_index(index)
+	return index
+
+
+def set_traccar_driver_index(index):
+	frappe.cache.set_value(TRACCAR_DRIVERS_KEY, index, expires_in_sec=TRACCAR_DRIVERS_TTL)
+
+
+def is_duplicate_error(result):
+	"""
+	:param result: response JSON or exception, as returned by `run_concurrently`
+	:return: bool; whether Traccar rejected a create, which it does for a duplicate uniqueId
+	"""
+	return (
+		isinstance(result, requests.exceptions.HTTPError)
+		and result.response is not None
+		and result.response.status_code == 400
+	)
+
+
+def queue_traccar_driver_sync(driver_doc, method=None):
 	"""
-	Adds a driver to Traccar if it doesn't already exist. The Driver document's name is uniqueId
+	Records the Driver in the Traccar Outbox when it is new or not yet in Traccar, so it is created
+	there after the save without the save waiting on Traccar. The Driver document's name is
+	uniqueId.
 
 	:param driver_doc: Driver doctype
 	:param method: str | None; method name function is called from
-	:return: None (error raised if unsuccessful)
+	:return: None
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	if not driver_doc.is_new() and driver_doc.traccar_user_id:
+		return
+	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings.enable_traccar:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
-	driver_uniqid = driver_doc.name
+	add_to_traccar_outbox("Driver", driver_doc.name)
 
-	try:
-		driver = get_traccar_driver(driver_uniqid)
-		if driver and not driver_doc.traccar_user_id:
-			driver_doc.traccar_user_id = driver["uniqueId"]
 
-		if not driver:
-			data = {
-				"id": 0,  # Traccar creates it's own ID
-				"name": driver_doc.full_name,
-				"uniqueId": driver_uniqid,
-				"attributes": {},
-			}
-			response = requests.post(
-				urljoin(traccar_server_url, "/api/drivers"),
-				headers=headers,
-				timeout=10,
-				json=data,
-			)
-			response.raise_for_status()
-			r = response.json()
-			if r and r["uniqueId"]:
-				driver_doc.traccar_user_id = r["uniqueId"]
+@frappe.whitelist()
+def provision_traccar_drivers():
+	"""
+	Creates every Driver missing from Traccar in one pass, see `sync_traccar_drivers`.
+
+	:return: dict; counts of drivers "created", "existing" in Traccar already and "failed"
+	"""
+	frappe.only_for(["System Manager", "Fleet Manager"])
+	return sync_traccar_drivers()
 
+
+def sync_traccar_drivers(drivers=None, dry_run=False, refresh=None):
+	"""
+	Creates the Drivers missing from Traccar and renames those whose full name differs, with the
+	requests issued concurrently, and fills in Traccar User ID on Drivers that lack it. Syncing
+	every Driver reloads the driver index once up front, syncing given Drivers (as the Traccar
+	Outbox does on save) reads the cached index and only reloads it if Traccar rejects a create as
+	a duplicate.
+
+	:param drivers: list | None; Driver names, by default every Driver
+	:param dry_run: bool; only report what would change
+	:param refresh: bool | None; reload the driver index first, by default when syncing every
+	Driver
+	:return: dict; counts of drivers "created", "updated", "existing" in Traccar already and
+	"failed", and the names of the "failed_drivers", None if Traccar is not enabled. A dry run
+	counts what would be done and lists the Drivers to "create", "update" and "write_back_id" to,
+	and, when syncing every Driver, the uniqueIds of "orphaned" Traccar drivers.
+	"""
+	client = get_traccar_client()
+	if not client:
+		return
+
+	if refresh is None:
+		refresh = not drivers
+	try:
+		index = get_traccar_driver_index(refresh=refresh)
 	except requests.exceptions.RequestException as e:
-		frappe.throw(_("Traccar server error: {0}").format(str(e)))
+		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
+
+	filters = {"name": ["in", drivers]} if drivers else {}
+	driver_list = frappe.get_all("Driver", filters, ["name", "full_name", "traccar_user_id"])
+	missing = [d for d in driver_list if d.name not in index]
+	renamed = [
+		d
+		for d in driver_list
+		if d.name in index and d.full_name and index[d.name].get("name") != d.full_name
+	]
+	if dry_run:
+		names = {d.name for d in driver_list}
+		return {
+			"created": len(missing),
+			"updated": len(renamed),
+			"existing": len(driver_list) - len(missing),
+			"failed": 0,
+			"failed_drivers": [],
+			"create": [d.name for d in missing],
+			"update": [d.name for d in renamed],
+			"write_back_id": [d.name for d in driver_list if not d.traccar_user_id],
+			"orphaned": [] if drivers else sorted(uid for uid in index if uid not in names),
+		}
+
+	created = run_concurrently(
+		lambda d: client.post(
+			"/api/drivers",
+			json={"id": 0, "name": d.full_name, "uniqueId": d.name, "attributes": {}},
+		).json(),
+		[(d,) for d in missing],
+	)
+	updated = run_concurrently(
+		lambda d: client.put(
+			f"/api/drivers/{index[d.name]['id']}", json={**index[d.name], "name": d.full_name}
+		).json(),
+		[(d,) for d in renamed],
+	)
+	if any(is_duplicate_error(result) for result in created):
+		# created outside the app since the index was loaded, use the drivers Traccar already has
+		try:
+			index = get_traccar_driver_index(refresh=True)
+		except requests.exceptions.RequestException:
+			pass
+		else:
+			created = [
+				index.get(d.name, result) if is_duplicate_error(result) else result
+				for d, result in zip(missing, created)
+			]
+	failed = []
+	for driver, result in zip(missing + renamed, created + updated):
+		if isinstance(result, Exception):
+			failed.append(driver.name)
+		else:
+			index[result["uniqueId"]] = result
+	set_traccar_driver_index(index)
+
+	updates = {
+		d.name: {"traccar_user_id": d.name}
+		for d in driver_list
+		if d.name in index and not d.traccar_user_id
+	}
+	if updates:
+		frappe.db.bulk_update("Driver", updates, update_modified=False)
+
+	if failed:
+		frappe.log_error(
+			_("Failed to create or update driver(s) {0} in Traccar").format(", ".join(failed)),
+			"Traccar Integration Error",
+		)
+	failed_creates = len([d for d in missing if d.name in failed])
+	return {
+		"created": len(missing) - failed_creates,
+		"updated": len(renamed) - (len(failed) - failed_creates),
+		"existing": len(driver_list) - len(missing),
+		"failed": len(failed),
+		"failed_drivers": failed,
+	}
 
 
 def get_traccar_geofences(device_uniqid=None, geofence_id=None):
@@ -390,18 +1791,15 @@ def get_traccar_geofences(device_uniqid=None, geofence_id=None):
 	:param geofence_id: int | None; the Traccar ID field on the geofence
 	:return: list; geofence data JSON objects if successful, None with raised error if not
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 	api_url = f"?deviceId={device_uniqid}" if device_uniqid else ""
 	try:
-		response = requests.get(
-			urljoin(traccar_server_url, "/api/geofences" + api_url),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
+		if geofence_id and not device_uniqid:
+			geofence = get_traccar_geofence(geofence_id)
+			return [geofence] if geofence else []
+		response = client.get("/api/geofences" + api_url)
 		geofences = response.json()
 		if geofence_id:
 			geofences = [g for g in geofences if g["id"] == geofence_id]
@@ -411,6 +1809,102 @@ def get_traccar_geofences(device_uniqid=None, geofence_id=None):
 		frappe.throw(_("Failed to connect to Traccar server: {0}").format(str(e)))
 
 
+def get_traccar_geofence(geofence_id, refresh=False):
+	"""
+	Returns one geofence through the geofence mirror. Geofences are fetched one at a time from
+	/api/geofences/{id} when missing from the mirror or older than TRACCAR_GEOFENCES_TTL, so the
+	mirror fills in as geofences are used and the full list is never downloaded.
+
+	:param geofence_id: int | str; Traccar geofence ID
+	:param refresh: bool; fetch the geofence from Traccar even if it is mirrored
+	:return: dict | None; geofence JSON object, None if Traccar has no such geofence
+	"""
+	if not refresh:
+		pipe = frappe.cache.pipeline()
+		pipe.hget(frappe.cache.make_key(TRACCAR_GEOFENCES_KEY), str(geofence_id))
+		(stored,) = pipe.execute()
+		if stored:
+			entry = json.loads(stored)
+			if time.time() - entry["fetched"] < TRACCAR_GEOFENCES_TTL:
+				return entry["geofence"]
+
+	client = get_traccar_client()
+	try:
+		geofence = client.get(f"/api/geofences/{geofence_id}").json()
+	except requests.exceptions.HTTPError as e:
+		if e.response is None or e.response.status_code != 404:
+			raise
+		remove_from_traccar_geofence_mirror(geofence_id)
+		return None
+	update_traccar_geofence_mirror(geofence)
+	return geofence
+
+
+def find_traccar_geofence(name, area):
+	"""
+	Returns the mirrored geofence with this name and area through the area hash index, such as one
+	created by an earlier attempt at the same save.
+
+	:param name: str; geofence name
+	:param area: str; geofence area in WKT format
+	:return: dict | None; geofence JSON object
+	"""
+	area_hash = get_geofence_area_hash(area)
+	pipe = frappe.cache.pipeline()
+	pipe.hget(frappe.cache.make_key(TRACCAR_GEOFENCE_AREAS_KEY), area_hash)
+	(geofence_id,) = pipe.execute()
+	if not geofence_id:
+		return None
+	# the index is not cleaned up when an area changes, so check the geofence still matches
+	geofence = get_traccar_geofence(geofence_id.decode())
+	if (
+		geofence
+		and geofence.get("name") == name
+		and get_geofence_area_hash(geofence.get("area") or "") == area_hash
+	):
+		return geofence
+
+
+def update_traccar_geofence_mirror(*geofences):
+	"""
+	Writes geofences read from or written to Traccar through to the mirror and the area index.
+
+	:param geofences: dict; Traccar geofence JSON objects
+	"""
+	if not geofences:
+		return
+	fetched = time.time()
+	pipe = frappe.cache.pipeline()
+	pipe.hset(
+		frappe.cache.make_key(TRACCAR_GEOFENCES_KEY),
+		mapping={
+			str(g["id"]): json.dumps({"fetched": fetched, "geofence": g}) for g in geofences
+		},
+	)
+	pipe.hset(
+		frappe.cache.make_key(TRACCAR_GEOFENCE_AREAS_KEY),
+		mapping={get_geofence_area_hash(g.get("area") or ""): g["id"] for g in geofences},
+	)
+	pipe.execute()
+
+
+def remove_from_traccar_geofence_mirror(geofence_id):
+	pipe = frappe.cache.pipeline()
+	pipe.hdel(frappe.cache.make_key(TRACCAR_GEOFENCES_KEY), str(geofence_id))
+	pipe.execute()
+
+
+def get_geofence_area_hash(area):
+	"""
+	Returns a hash of a WKT area that ignores differences in whitespace and case.
+
+	:param area: str; area in WKT format
+	:return: str
+	"""
+	area = re.sub(r"\s*([(),])\s*", r"\1", re.sub(r"\s+", " ", area.strip().upper()))
+	return hashlib.sha1(area.encode()).hexdigest()
+
+
 def add_traccar_geofence(doc, shape, coords, device_ids=None, group_ids=None):
 	"""
 	Adds a geofence to Traccar. If `device_ids` or `group_ids` are provided, will link all devices
@@ -428,10 +1922,9 @@ def add_traccar_geofence(doc, shape, coords, device_ids=None, group_ids=None):
 	"POLYGON ((lat1 lon1, lat2 lon2, lat3 lon3, lat1 lon1))"
 	"LINESTRING (lat1 lon1, lat2 lon2, lat3 lon3)"
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 	if shape.lower() not in ["polygon", "linestring"]:
 		frappe.throw(
 			_(
@@ -445,27 +1938,23 @@ def add_traccar_geofence(doc, shape, coords, device_ids=None, group_ids=None):
 
 	try:
 		area = coords_list_to_wkt_format(shape, coords)
-		data = {
-			"name": doc.name,
-			"description": doc.name,
-			"area": area,
-			"attributes": {},
-		}
-		response = requests.post(
-			urljoin(traccar_server_url, "/api/geofences"),
-			headers=headers,
-			timeout=10,
-			json=data,
-		)
-		response.raise_for_status()
-		r = response.json()
+		r = find_traccar_geofence(doc.name, area)
+		if not r:
+			data = {
+				"name": doc.name,
+				"description": doc.name,
+				"area": area,
+				"attributes": {},
+			}
+			response = client.post("/api/geofences", json=data)
+			r = response.json()
+			if r and r["id"]:
+				update_traccar_geofence_mirror(r)
 		if r and r["id"]:
-			if device_ids:
-				for did in device_ids:
-					link_traccar_object("deviceId", did, "geofenceId", r["id"])
-			if group_ids:
-				for gid in group_ids:
-					link_traccar_object("groupId", gid, "geofenceId", r["id"])
+			link_traccar_objects(
+				[{"deviceId": cint(did), "geofenceId": r["id"]} for did in device_ids or []]
+				+ [{"groupId": cint(gid), "geofenceId": r["id"]} for gid in group_ids or []]
+			)
 			return r["id"]
 
 	except requests.exceptions.RequestException as e:
@@ -474,33 +1963,38 @@ def add_traccar_geofence(doc, shape, coords, device_ids=None, group_ids=None):
 
 def update_traccar_geofence(geofence_id, to_update):
 	"""
-	Updates given keys in `to_update` if geofence exists in Traccar.
+	Updates given keys in `to_update` if geofence exists in Traccar. The geofence is read from the
+	mirror and only PUT when a field differs, comparing areas by their hash.
 
 	:param geofence_id: str; Traccar geofence ID
 	:param to_update: dict; the key-value pairs of data to update in Traccar
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		geofences = get_traccar_geofences(geofence_id=geofence_id)
-		if not geofences:
+		geofence = get_traccar_geofence(geofence_id)
+		if not geofence:
 			frappe.log_error(f"Geofence with ID {geofence_id} not found in Traccar for update.")
 			return
 
-		geofence = geofences[0]
-		geofence.update(to_update)
+		changes = get_traccar_changes(geofence, to_update)
+		area_hash = get_geofence_area_hash(geofence.get("area") or "")
+		if "area" in changes and get_geofence_area_hash(changes["area"]) == area_hash:
+			del changes["area"]
+		if not changes:
+			return
 
-		response = requests.put(
-			urljoin(traccar_server_url, f"/api/geofences/{geofence_id}"),
-			headers=headers,
-			timeout=10,
-			json=geofence,
-		)
-		response.raise_for_status()
+		try:
+			geofence.update(changes)
+			geofence = client.put(f"/api/geofences/{geofence_id}", json=geofence).json()
+		except requests.exceptions.HTTPError:
+			# the mirror may be stale, read the geofence from Traccar next time
+			remove_from_traccar_geofence_mirror(geofence_id)
+			raise
+		update_traccar_geofence_mirror(geofence)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
@@ -513,18 +2007,13 @@ def delete_traccar_geofence(geofence_id):
 	:param geofence_id: int | str; Traccar geofence ID
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 
 	try:
-		response = requests.delete(
-			urljoin(traccar_server_url, f"/api/geofences/{geofence_id}"),
-			headers=headers,
-			timeout=10,
-		)
-		response.raise_for_status()
+		client.delete(f"/api/geofences/{geofence_id}")
+		remove_from_traccar_geofence_mirror(geofence_id)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
@@ -541,10 +2030,9 @@ def link_traccar_object(first_param_key, first_param_val, second_param_key, seco
 	:param second_param_val: the ID of the other key that links to first param
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 	if first_param_key not in ["userId", "deviceId", "groupId"]:
 		frappe.throw(
 			_(
@@ -553,13 +2041,7 @@ def link_traccar_object(first_param_key, first_param_val, second_param_key, seco
 		)
 	try:
 		data = {first_param_key: first_param_val, second_param_key: second_param_val}
-		response = requests.post(
-			urljoin(traccar_server_url, "/api/permissions"),
-			headers=headers,
-			timeout=10,
-			json=data,
-		)
-		response.raise_for_status()
+		client.post("/api/permissions", json=data)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
@@ -576,10 +2058,9 @@ def unlink_traccar_object(first_param_key, first_param_val, second_param_key, se
 	:param second_param_val: the ID of the other key that un-links from first param
 	:return: None (error raised if unsuccessful)
 	"""
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	if not traccar_server_url:
+	client = get_traccar_client()
+	if not client:
 		return
-	headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
 	if first_param_key not in ["userId", "deviceId", "groupId"]:
 		frappe.throw(
 			_(
@@ -588,18 +2069,165 @@ def unlink_traccar_object(first_param_key, first_param_val, second_param_key, se
 		)
 	try:
 		data = {first_param_key: first_param_val, second_param_key: second_param_val}
-		response = requests.delete(
-			urljoin(traccar_server_url, "/api/permissions"),
-			headers=headers,
-			timeout=10,
-			json=data,
-		)
-		response.raise_for_status()
+		client.delete("/api/permissions", json=data)
+
+	except requests.exceptions.RequestException as e:
+		frappe.throw(_("Traccar server error: {0}").format(str(e)))
+
+
+def link_traccar_objects(permissions):
+	"""
+	Links objects in Traccar in bulk, PERMISSIONS_BULK_SIZE links per request to
+	/api/permissions/bulk.
+
+	:param permissions: list; dicts with the two keys and IDs of each link, e.g.
+	{"deviceId": 1, "geofenceId": 2}, see `link_traccar_object`
+	:return: None (error raised if unsuccessful)
+	"""
+	send_bulk_permissions("POST", permissions)
+
+
+def unlink_traccar_objects(permissions):
+	"""
+	Un-links objects in Traccar in bulk, PERMISSIONS_BULK_SIZE links per request to
+	/api/permissions/bulk.
+
+	:param permissions: list; dicts with the two keys and IDs of each link, see
+	`unlink_traccar_object`
+	:return: None (error raised if unsuccessful)
+	"""
+	send_bulk_permissions("DELETE", permissions)
+
+
+def send_bulk_permissions(method, permissions):
+	client = get_traccar_client()
+	if not client or not permissions:
+		return
+	try:
+		for i in range(0, len(permissions), PERMISSIONS_BULK_SIZE):
+			batch = permissions[i : i + PERMISSIONS_BULK_SIZE]
+			client.request(method, "/api/permissions/bulk", json=batch)
 
 	except requests.exceptions.RequestException as e:
 		frappe.throw(_("Traccar server error: {0}").format(str(e)))
 
 
+def get_vehicle_traccar_ids(vehicles):
+	"""
+	Returns the Traccar ID of each Vehicle that has one, in a single query.
+
+	:param vehicles: iterable; Vehicle names
+	:return: dict; Vehicle name to Traccar device ID
+	"""
+	vehicles = list(set(vehicles))
+	if not vehicles:
+		return {}
+	filters = {"name": ["in", vehicles], "traccar_id": ["is", "set"]}
+	return dict(frappe.get_all("Vehicle", filters, ["name", "traccar_id"], as_list=True))
+
+
+def get_geofence_device_links(locations=None):
+	"""
+	Returns the device to geofence links the Locations call for: the geofence of every Location
+	synced with Traccar, linked to the device of each Vehicle in its Geofenced Vehicle table.
+
+	:param locations: list | None; Location names, by default every Location
+	:return: set; (Traccar device ID, Traccar geofence ID) tuples
+	"""
+	filters = {"sync_traccar_geofence": 1, "traccar_geofence_id": ["is", "set"]}
+	if locations:
+		filters["name"] = ["in", locations]
+	geofences = {
+		loc.name: cint(loc.traccar_geofence_id)
+		for loc in frappe.get_all("Location", filters, ["name", "traccar_geofence_id"])
+	}
+	if not geofences:
+		return set()
+	rows = frappe.get_all(
+		"Geofence Vehicle",
+		{"parenttype": "Location", "parent": ["in", list(geofences)]},
+		["parent", "vehicle"],
+	)
+	device_ids = get_vehicle_traccar_ids(r.vehicle for r in rows)
+	return {
+		(cint(device_ids[r.vehicle]), geofences[r.parent])
+		for r in rows
+		if device_ids.get(r.vehicle)
+	}
+
+
+def reconcile_geofence_permissions(dry_run=False):
+	"""
+	Brings Traccar's device to geofence links in line with the Locations' Geofenced Vehicle
+	tables. The geofences linked to each device are read concurrently, then missing links are
+	added and surplus ones removed through the bulk permissions endpoint. Only geofences synced
+	from a Location are touched, links to geofences created in Traccar directly are left alone,
+	and devices whose geofences couldn't be read are skipped.
+
+	:param dry_run: bool; only report what would change
+	:return: dict; counts of links "linked", "unlinked" and "unchanged" and devices "failed", None
+	if Traccar is not enabled. A dry run counts what would be done and lists the (Vehicle,
+	Location) pairs to "link" and "unlink".
+	"""
+	client = get_traccar_client()
+	if not client:
+		return
+
+	managed = {
+		cint(loc.traccar_geofence_id): loc.name
+		for loc in frappe.get_all(
+			"Location",
+			{"sync_traccar_geofence": 1, "traccar_geofence_id": ["is", "set"]},
+			["name", "traccar_geofence_id"],
+		)
+	}
+	desired = get_geofence_device_links()
+	vehicles = {
+		cint(v.traccar_id): v.name
+		for v in frappe.get_all("Vehicle", {"traccar_id": ["is", "set"]}, ["name", "traccar_id"])
+	}
+	device_ids = sorted(vehicles)
+	results = run_concurrently(
+		lambda device_id: client.get(f"/api/geofences?deviceId={device_id}").json(),
+		[(d,) for d in device_ids],
+	)
+
+	current, failed = set(), set()
+	for device_id, result in zip(device_ids, results):
+		if isinstance(result, Exception):
+			failed.add(device_id)
+			continue
+		current.update((device_id, g["id"]) for g in result or [] if g["id"] in managed)
+
+	to_link = sorted(link for link in desired - current if link[0] not in failed)
+	to_unlink = sorted(current - desired)
+	if dry_run:
+		return {
+			"linked": len(to_link),
+			"unlinked": len(to_unlink),
+			"unchanged": len(current & desired),
+			"failed": len(failed),
+			"link": [(vehicles.get(d, d), managed.get(g, g)) for d, g in to_link],
+			"unlink": [(vehicles.get(d, d), managed.get(g, g)) for d, g in to_unlink],
+		}
+	link_traccar_objects([{"deviceId": d, "geofenceId": g} for d, g in to_link])
+	unlink_traccar_objects([{"deviceId": d, "geofenceId": g} for d, g in to_unlink])
+
+	if failed:
+		frappe.log_error(
+			title="Traccar Integration Error",
+			message=_("Failed to read the geofences of device(s) {0} from Traccar").format(
+				", ".join(str(d) for d in sorted(failed))
+			),
+		)
+	return {
+		"linked": len(to_link),
+		"unlinked": len(to_unlink),
+		"unchanged": len(current & desired),
+		"failed": len(failed),
+	}
+
+
 def create_draft_asset_repair(asset_name, description):
 	company, cost_center = frappe.db.get_value("Asset", asset_name, ["company", "cost_center"])
 	ar = frappe.new_doc("Asset Repair")
@@ -611,19 +2239,338 @@ def create_draft_asset_repair(asset_name, description):
 	ar.save()
 
 
+class TraccarUnavailable(requests.exceptions.ConnectionError):
+	"""
+	Raised in place of a Traccar API call while the circuit breaker is open. Subclasses
+	ConnectionError so existing `requests` error handling applies.
+	"""
+
+
+class CircuitBreaker:
+	"""
+	Circuit breaker shared by every worker of a site through the cache. Consecutive connection
+	errors, timeouts and 5xx responses open it once they reach CIRCUIT_FAILURE_THRESHOLD; while
+	open, calls raise `TraccarUnavailable` without touching the network. When the backoff elapses
+	a single call is let through as a probe: success closes the breaker, failure reopens it with
+	the backoff doubled up to CIRCUIT_MAX_BACKOFF.
+
+	An outage writes one Error Log when the breaker opens, which is updated with the outage length
+	and the number of suspended calls when it closes. Inside `run_concurrently` those writes wait
+	until the calls have finished, see `defer_db_write`.
+	"""
+
+	def __init__(self, name):
+		self.name = name
+
+	def key(self, suffix):
+		return frappe.cache.make_key(f"{self.name}:{suffix}")
+
+	def get_state(self):
+		value = frappe.cache.get(self.key("state"))
+		return json.loads(value) if value else None
+
+	def before_call(self):
+		"""
+		Raises TraccarUnavailable while the breaker is open.
+
+		:return: bool; True if this call is the half-open probe
+		"""
+		state = self.get_state()
+		if not state:
+			return False
+		if time.time() >= state["open_until"] and frappe.cache.set(
+			self.key("probe"), 1, nx=True, ex=CIRCUIT_PROBE_TTL
+		):
+			return True
+		frappe.cache.incr(self.key("skipped"))
+		raise TraccarUnavailable(
+			_("Traccar is unavailable, calls are suspended until {0}").format(
+				datetime.datetime.fromtimestamp(state["open_until"]).strftime("%H:%M:%S")
+			)
+		)
+
+	def record_success(self, probing=False):
+		if probing:
+			self.close()
+		else:
+			frappe.cache.delete(self.key("failures"))
+
+	def record_failure(self, error, probing=False):
+		if probing:
+			state = self.get_state() or {"backoff": CIRCUIT_BASE_BACKOFF}
+			state["backoff"] = min(state["backoff"] * 2, CIRCUIT_MAX_BACKOFF)
+			state["open_until"] = time.time() + state["backoff"]
+			state["last_error"] = str(error)
+			frappe.cache.set(self.key("state"), json.dumps(state))
+			frappe.cache.delete(self.key("probe"))
+			return
+
+		failures_key = self.key("failures")
+		failures = frappe.cache.incr(failures_key)
+		if failures == 1:
+			frappe.cache.expire(failures_key, CIRCUIT_MAX_BACKOFF)
+		if failures >= CIRCUIT_FAILURE_THRESHOLD:
+			self.open(error, failures)
+
+	def open(self, error, failures):
+		now = time.time()
+		state = {
+			"opened_at": now,
+			"open_until": now + CIRCUIT_BASE_BACKOFF,
+			"backoff": CIRCUIT_BASE_BACKOFF,
+			"last_error": str(error),
+		}
+		# only the worker that opens the breaker logs the outage
+		if not frappe.cache.set(self.key("state"), json.dumps(state), nx=True):
+			return
+		frappe.cache.delete(self.key("failures"), self.key("skipped"))
+
+		def log_outage():
+			error_log = frappe.log_error(
+				title=_("Traccar Unavailable"),
+				message=_(
+					"Traccar calls suspended after {0} consecutive failures. Last error: {1}"
+				).format(failures, error),
+			)
+			current = self.get_state()
+			# don't bring back a breaker that closed in the meantime
+			if error_log and current and current["opened_at"] == now:
+				current["error_log"] = error_log.name
+				frappe.cache.set(self.key("state"), json.dumps(current))
+
+		defer_db_write(log_outage)
+
+	def close(self):
+		state = self.get_state()
+		skipped = cint(frappe.cache.get(self.key("skipped")))
+		frappe.cache.delete(
+			self.key("state"), self.key("probe"), self.key("failures"), self.key("skipped")
+		)
+		if not state or not state.get("error_log"):
+			return
+		summary = _(
+			"Traccar recovered after {0} minutes. {1} calls were suspended. Last error: {2}"
+		).format(
+			round((time.time() - state["opened_at"]) / 60, 1), skipped, state.get("last_error")
+		)
+
+		def log_recovery():
+			if not frappe.db.exists("Error Log", state["error_log"]):
+				return
+			error = frappe.db.get_value("Error Log", state["error_log"], "error")
+			frappe.db.set_value(
+				"Error Log",
+				state["error_log"],
+				"error",
+				f"{error}\n\n{summary}",
+				update_modified=False,
+			)
+
+		defer_db_write(log_recovery)
+
+
+class TraccarClient:
+	"""
+	Keep-alive client for the Traccar REST API. Requests share a pooled `requests.Session` that
+	carries the Basic credentials, so connections and the decrypted password are reused across
+	calls. Non-2xx responses raise `requests.exceptions.HTTPError`.
+
+	Use `get_traccar_client` rather than instantiating directly so each worker process keeps one
+	client per site.
+
+	Calls go through the site's CircuitBreaker, so while Traccar is down they fail fast with
+	`TraccarUnavailable` instead of waiting out the request timeout.
+	"""
+
+	def __init__(self, server_url, username, password, pool_size=10, timeout=10, retries=3):
+		self.server_url = server_url
+		self.timeout = timeout
+		self.credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+		self.session = requests.Session()
+		self.session.headers.update(
+			{"Authorization": f"Basic {self.credentials}", "Content-Type": "application/json"}
+		)
+		# urllib3 only retries idempotent methods by default, so POSTs are never replayed
+		adapter = HTTPAdapter(
+			pool_connections=pool_size,
+			pool_maxsize=pool_size,
+			max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+		)
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+		self.breaker = CircuitBreaker(CIRCUIT_BREAKER_KEY)
+
+	@classmethod
+	def from_settings(cls, traccar_settings):
+		return cls(
+			traccar_settings.traccar_server_url,
+			traccar_settings.username,
+			traccar_settings.get_password(),
+			pool_size=max(
+				traccar_settings.connection_pool_size or 10,
+				traccar_settings.max_concurrent_requests or 0,
+			),
+			timeout=traccar_settings.request_timeout or 10,
+			retries=traccar_settings.request_retries or 0,
+		)
+
+	def request(self, method, path, **kwargs):
+		kwargs.setdefault("timeout", self.timeout)
+		probing = self.breaker.before_call()
+		# ids are folded out of the path to keep the number of series bounded
+		endpoint = re.sub(r"/\d+", "/{id}", path.split("?", 1)[0])
+		try:
+			with metrics.timer("fleet_traccar_request_seconds", method=method, endpoint=endpoint):
+				response = self.session.request(method, urljoin(self.server_url, path), **kwargs)
+		except (
+			requests.exceptions.ConnectionError,
+			requests.exceptions.Timeout,
+			requests.exceptions.RetryError,
+		) as e:
+			self.breaker.record_failure(e, probing)
+			raise
+		if response.status_code >= 500:
+			self.breaker.record_failure(f"{response.status_code} {response.reason}", probing)
+		else:
+			self.breaker.record_success(probing)
+		response.raise_for_status()
+		return response
+
+	def get(self, path, **kwargs):
+		return self.request("GET", path, **kwargs)
+
+	def post(self, path, **kwargs):
+		return self.request("POST", path, **kwargs)
+
+	def put(self, path, **kwargs):
+		return self.request("PUT", path, **kwargs)
+
+	def delete(self, path, **kwargs):
+		return self.request("DELETE", path, **kwargs)
+
+	def open_socket(self, timeout=None):
+		"""
+		Opens a connection to Traccar's /api/socket push stream. The socket is authenticated by
+		session cookie rather than Basic credentials, so a session is created first.
+
+		:param timeout: float | None; seconds a read may block before timing out
+		:return: websocket.WebSocket
+		"""
+		username, password = base64.b64decode(self.credentials).decode().split(":", 1)
+		self.post(
+			"/api/session",
+			data={"email": username, "password": password},
+			headers={"Content-Type": "application/x-www-form-urlencoded"},
+		)
+		cookie = "; ".join(f"{k}={v}" for k, v in self.session.cookies.items())
+		socket_url = urljoin(self.server_url, "/api/socket").replace("http", "ws", 1)
+		return websocket.create_connection(
+			socket_url, cookie=cookie, timeout=timeout or self.timeout
+		)
+
+	def close(self):
+		self.session.close()
+
+
+# one client per site for the lifetime of the worker process, keyed on the settings' modified
+# timestamp so a saved change to Traccar Integration rebuilds it
+_clients: dict[str, tuple[str, "TraccarClient"]] = {}
+
+
+def get_traccar_client(traccar_settings=None):
+	"""
+	Returns the pooled TraccarClient for the current site.
+
+	:param traccar_settings: Traccar Integration doc | None; defaults to the cached settings
+	:return: TraccarClient | None if Traccar is not enabled
+	"""
+	if not traccar_settings:
+		traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+	if not traccar_settings or not traccar_settings.enable_traccar:
+		return None
+
+	site = frappe.local.site
+	version = str(traccar_settings.modified)
+	cached = _clients.get(site)
+	if cached and cached[0] == version:
+		return cached[1]
+
+	if cached:
+		cached[1].close()
+	client = TraccarClient.from_settings(traccar_settings)
+	_clients[site] = (version, client)
+	return client
+
+
+def run_concurrently(func, args_list, concurrency=None):
+	"""
+	Calls `func(*args)` for every `args` in `args_list` on a thread pool of at most `concurrency`
+	workers. Intended for per-device Traccar requests, so `func` should only do HTTP work through
+	the TraccarClient: the database connection is not safe to share between threads. Database
+	writes that circuit breaker transitions make during the calls are run afterwards on the
+	calling thread.
+
+	:param func: callable; run in a worker thread with the caller's frappe context
+	:param args_list: sequence of tuples; positional arguments for each call
+	:param concurrency: int | None; defaults to Max Concurrent Requests in Traccar Integration
+	:return: list; results in the same order as `args_list`, with exceptions returned in place
+	"""
+	if not args_list:
+		return []
+	if not concurrency:
+		traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+		concurrency = traccar_settings.max_concurrent_requests or 16
+
+	deferred = []
+	token = _deferred_db_writes.set(deferred)
+	try:
+		# each call needs its own copy, a context can't be entered by two threads at once
+		contexts = [contextvars.copy_context() for _args in args_list]
+		with ThreadPoolExecutor(max_workers=min(concurrency, len(args_list))) as executor:
+			results = list(
+				executor.map(_call_in_context, contexts, itertools.repeat(func), args_list)
+			)
+	finally:
+		_deferred_db_writes.reset(token)
+
+	for write in deferred:
+		write()
+	return results
+
+
+def _call_in_context(context, func, args):
+	try:
+		return context.run(func, *args)
+	except Exception as e:
+		return e
+
+
+# set by run_concurrently to collect database writes from its worker threads
+_deferred_db_writes = contextvars.ContextVar("deferred_db_writes", default=None)
+
+
+def defer_db_write(write):
+	"""
+	Runs `write` now, or after the calls if inside `run_concurrently`.
+
+	:param write: callable; writes to the database
+	"""
+	deferred = _deferred_db_writes.get()
+	if deferred is None:
+		write()
+	else:
+		deferred.append(write)
+
+
 def get_server_url_and_credentials():
 	"""
 	Returns tuple with Traccar server url and access credentials
 	"""
-	traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
-	if not traccar_settings or not traccar_settings.enable_traccar:
+	client = get_traccar_client()
+	if not client:
 		return None, None
 
-	credentials = base64.b64encode(
-		f"{traccar_settings.username}:{traccar_settings.get_password()}".encode()
-	).decode()
-
-	return traccar_settings.traccar_server_url, credentials
+	return client.server_url, client.credentials
 
 
 def get_now_timestamp_string():
@@ -634,6 +2581,14 @@ def get_now_timestamp_string():
 	return timestamp
 
 
+def get_utc_timestamp_string(dt):
+	"""
+	Given a naive datetime in the system timezone, returns a UTC timestamp string in ISO 8601 format
+	"""
+	dt = dt.replace(tzinfo=ZoneInfo(get_system_timezone()))
+	return dt.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 def get_datetime_from_timestamp_string(timestamp):
 	"""
 	Given a string in ISO 8601 format, returns a datetime.datetime object.
@@ -679,19 +2634,230 @@ def get_geofence_change(prior_geofence_ids, current_geofence_ids):
 	position data
 	:return: dict | None; {"entered": [geofence_name, ...], "exited": [geofence_name, ,,,]}
 	"""
-	prior = set(prior_geofence_ids) if prior_geofence_ids else set()
-	current = set(current_geofence_ids) if current_geofence_ids else set()
+	prior = {str(gfid) for gfid in prior_geofence_ids} if prior_geofence_ids else set()
+	current = {str(gfid) for gfid in current_geofence_ids} if current_geofence_ids else set()
 	if prior == current:
 		entered, exited = [], []
 	else:
-		entered = [
-			loc
-			for gfid in list(current - prior)
-			if (loc := frappe.get_value("Location", {"traccar_geofence_id": gfid}))
-		]
-		exited = [
-			loc
-			for gfid in list(prior - current)
-			if (loc := frappe.get_value("Location", {"traccar_geofence_id": gfid}))
-		]
+		locations = get_geofence_locations()
+		entered = [locations[gfid] for gfid in current - prior if gfid in locations]
+		exited = [locations[gfid] for gfid in prior - current if gfid in locations]
 	return frappe._dict({"entered": entered, "exited": exited})
+
+
+def get_geofence_locations():
+	"""
+	Returns a dict of Traccar geofence ID (as str) to Location name.
+
+	:return: dict
+	"""
+	return get_cached_map(
+		GEOFENCE_LOCATIONS_KEY,
+		lambda: {
+			str(loc.traccar_geofence_id): loc.name
+			for loc in frappe.get_all(
+				"Location", {"traccar_geofence_id": ["is", "set"]}, ["name", "traccar_geofence_id"]
+			)
+		},
+	)
+
+
+def clear_geofence_location_cache(doc=None, method=None, *args):
+	"""
+	Invalidates the geofence ID to Location map once the change is committed, so a concurrent
+	reader can't rebuild it from the old state. Hooked to Location changes that affect it.
+	"""
+
+	def clear():
+		clear_cached_map(GEOFENCE_LOCATIONS_KEY)
+		clear_cached_map(CUSTOMER_GEOFENCES_KEY)
+
+	frappe.db.after_commit.add(clear)
+
+
+def get_customer_geofences():
+	"""
+	Returns a dict of Traccar geofence ID (as str) to Customer for geofenced Locations that share
+	an Address with a Customer.
+
+	:return: dict
+	"""
+
+	def build():
+		addresses = {}
+		for link in frappe.get_all(
+			"Dynamic Link",
+			{"parenttype": "Address", "link_doctype": ["in", ["Customer", "Location"]]},
+			["parent", "link_doctype", "link_name"],
+		):
+			addresses.setdefault(link.parent, {})[link.link_doctype] = link.link_name
+		geofence_ids = {location: gfid for gfid, location in get_geofence_locations().items()}
+		return {
+			geofence_ids[links["Location"]]: links["Customer"]
+			for links in addresses.values()
+			if links.get("Customer") and links.get("Location") in geofence_ids
+		}
+
+	return get_cached_map(CUSTOMER_GEOFENCES_KEY, build)
+
+
+def clear_customer_geofence_cache(doc=None, method=None, *args):
+	"""
+	Invalidates the geofence ID to Customer map once the change is committed. Hooked to Address.
+	"""
+	frappe.db.after_commit.add(lambda: clear_cached_map(CUSTOMER_GEOFENCES_KEY))
+
+
+def get_adaptive_poll_intervals(vehicles, traccar_settings=None):
+	"""
+	Chooses how long to wait before polling each vehicle again from its Vehicle State: the moving
+	interval while it is moving, has the ignition on or is inside a customer geofence, the parked
+	interval once it hasn't moved for the Parked After period, and the idle interval otherwise.
+	Vehicles without a state yet are polled on the moving interval.
+
+	:param vehicles: list; Vehicle names
+	:param traccar_settings: Traccar Integration doc | None
+	:return: dict; Vehicle name to minutes until its next poll
+	"""
+	if not traccar_settings:
+		traccar_settings = frappe.get_cached_doc("Traccar Integration", "Traccar Integration")
+
+	states = {
+		s.name: s
+		for s in frappe.get_all(
+			"Vehicle State",
+			{"name": ["in", vehicles]},
+			["name", "speed", "ignition", "last_moved", "geofence_ids"],
+		)
+	}
+	customer_geofences = get_customer_geofences()
+	parked_before = now_datetime() - datetime.timedelta(minutes=cint(traccar_settings.parked_after))
+
+	intervals = {}
+	for vehicle in vehicles:
+		state = states.get(vehicle)
+		if (
+			not state
+			or is_moving(state.speed, state.ignition, traccar_settings)
+			or any(
+				gfid.strip() in customer_geofences for gfid in (state.geofence_ids or "").split(",")
+			)
+		):
+			interval = traccar_settings.moving_poll_interval
+		elif state.last_moved and get_datetime(state.last_moved) > parked_before:
+			interval = traccar_settings.idle_poll_interval
+		else:
+			interval = traccar_settings.parked_poll_interval
+		intervals[vehicle] = max(cint(interval), 1)
+	return intervals
+
+
+def resolve_driver_employee(vehicle, driver_unique_id=None, last_employee=None):
+	"""
+	Returns the Employee driving a vehicle: the Driver reported by Traccar, else the prior Vehicle
+	Log's employee, else the Employee of the vehicle's last Vehicle Driver row. Lookups are served
+	from cached maps so batches of positions resolve without queries.
+
+	:param vehicle: str; Vehicle name
+	:param driver_unique_id: str | None; driverUniqueId attribute of the Traccar position
+	:param last_employee: str | None; employee on the prior Vehicle Log
+	:return: str | None; Employee name
+	"""
+	if driver_unique_id:
+		return get_driver_employees().get(driver_unique_id)
+	if last_employee:
+		return last_employee
+	return get_driver_employees().get(get_vehicle_drivers().get(vehicle))
+
+
+def get_driver_employees():
+	"""
+	Returns a dict of Driver name (the Traccar driver uniqueId) to Employee.
+
+	:return: dict
+	"""
+	return get_cached_map(
+		DRIVER_EMPLOYEES_KEY,
+		lambda: {
+			d.name: d.employee
+			for d in frappe.get_all("Driver", {"employee": ["is", "set"]}, ["name", "employee"])
+		},
+	)
+
+
+def get_vehicle_drivers():
+	"""
+	Returns a dict of Vehicle name to the Driver on its last Vehicle Driver row.
+
+	:return: dict
+	"""
+
+	def build():
+		drivers = {}
+		for row in frappe.get_all(
+			"Vehicle Driver",
+			{"parenttype": "Vehicle", "driver": ["is", "set"]},
+			["parent", "driver"],
+			order_by="idx asc",
+		):
+			drivers[row.parent] = row.driver
+		return drivers
+
+	return get_cached_map(VEHICLE_DRIVERS_KEY, build)
+
+
+def clear_driver_employee_cache(doc=None, method=None, *args):
+	"""
+	Invalidates the Driver to Employee map once the change is committed. Hooked to Driver.
+	"""
+	frappe.db.after_commit.add(lambda: clear_cached_map(DRIVER_EMPLOYEES_KEY))
+
+
+def clear_vehicle_driver_cache(doc=None, method=None, *args):
+	"""
+	Invalidates the Vehicle to Driver map once the change is committed. Hooked to Vehicle, which
+	owns the Vehicle Driver rows.
+	"""
+	frappe.db.after_commit.add(lambda: clear_cached_map(VEHICLE_DRIVERS_KEY))
+
+
+# (site, key): (loaded at, map) for the lifetime of the worker process
+_cached_maps: dict[tuple[str, str], tuple[float, dict]] = {}
+
+
+def get_cached_map(key, build):
+	"""
+	Returns a lookup dict kept in the cache, rebuilt with `build` on a miss, and held in process
+	for CACHED_MAP_TTL seconds between cache reads so long-running ingestion jobs see
+	invalidations from other workers.
+
+	:param key: str; cache key
+	:param build: callable; returns the dict from the database, keys and values must be str
+	:return: dict
+	"""
+	local_key = (frappe.local.site, key)
+	cached = _cached_maps.get(local_key)
+	if cached and time.monotonic() - cached[0] < CACHED_MAP_TTL:
+		return cached[1]
+
+	# read past frappe.local.cache, which lives as long as the job does
+	cache_key = frappe.cache.make_key(key)
+	value = frappe.cache.get(cache_key)
+	if value:
+		mapping = json.loads(value)
+	else:
+		mapping = build()
+		frappe.cache.set(cache_key, json.dumps(mapping))
+
+	_cached_maps[local_key] = (time.monotonic(), mapping)
+	return mapping
+
+
+def clear_cached_map(key):
+	"""
+	Drops a map built by get_cached_map from the cache and from this process.
+
+	:param key: str; cache key
+	"""
+	frappe.cache.delete_value(key)
+	_cached_maps.pop((frappe.local.site, key), None)
@@ -151,19 +151,48 @@ doc_events = {
 	"Address": {
 		"validate": [
 			"fleet.fleet.overrides.address.validate_single_location_in_links",
-		]
+		],
+		"on_update": [
+			"fleet.fleet.traccar.clear_customer_geofence_cache",
+		],
+		"on_trash": [
+			"fleet.fleet.traccar.clear_customer_geofence_cache",
+		],
 	},
 	"Driver": {
 		"before_save": [
-			"fleet.fleet.traccar.add_traccar_driver",
-		]
+			"fleet.fleet.traccar.queue_traccar_driver_sync",
+		],
+		"on_update": [
+			"fleet.fleet.traccar.clear_driver_employee_cache",
+		],
+		"on_trash": [
+			"fleet.fleet.traccar.clear_driver_employee_cache",
+		],
+		"after_rename": [
+			"fleet.fleet.traccar.clear_driver_employee_cache",
+		],
 	},
 	"Location": {
 		"validate": [
 			"fleet.fleet.overrides.location.validate_geofence_geometry",
 			"fleet.fleet.overrides.location.validate_geofenced_vehicles_have_traccar_id",
 			"fleet.fleet.overrides.location.sync_traccar_geofence",
-		]
+		],
+		"on_trash": [
+			"fleet.fleet.traccar.clear_geofence_location_cache",
+		],
+		"after_rename": [
+			"fleet.fleet.traccar.clear_geofence_location_cache",
+		],
+	},
+	"Vehicle Log": {
+		"on_submit": [
+			"fleet.fleet.doctype.vehicle_state.vehicle_state.update_vehicle_state",
+		],
+		"on_cancel": [
+			"fleet.fleet.doctype.vehicle_state.vehicle_state.rebuild_vehicle_state",
+		],
 	},
 	"Vehicle": {
 		"validate": [
@@ -171,7 +200,20 @@ doc_events = {
 		],
 		"before_save": [
 			"fleet.fleet.overrides.vehicle.check_schedule_poll_frequency",
-			"fleet.fleet.traccar.add_traccar_device",
+			"fleet.fleet.traccar.queue_traccar_device_sync",
+		],
+		"on_update": [
+			"fleet.fleet.traccar.clear_vehicle_driver_cache",
+		],
+		"on_trash": [
+			"fleet.fleet.traccar.clear_vehicle_driver_cache",
+			"fleet.fleet.overrides.vehicle.remove_from_poll_schedule",
+		],
+		"after_rename": [
+			"fleet.fleet.traccar.clear_vehicle_driver_cache",
+			"fleet.fleet.overrides.vehicle.reschedule_renamed_vehicle",
+			"fleet.fleet.traccar.queue_traccar_device_sync",
+			"fleet.fleet.doctype.vehicle_state.vehicle_state.rename_vehicle_state",
 		],
 	},
 }
@@ -183,8 +225,17 @@ scheduler_events = {
 	"cron": {
 		"* * * * *": [
 			"fleet.fleet.traccar.sync_vehicles",
+			"fleet.fleet.traccar.ensure_position_stream",
+			"fleet.fleet.doctype.traccar_outbox.traccar_outbox.drain_traccar_outbox",
 		],
-	}
+	},
+	"hourly": [
+		"fleet.fleet.traccar.reconcile_traccar_devices",
+		"fleet.fleet.traccar.reconcile_geofence_permissions",
+	],
+	"daily": [
+		"fleet.fleet.reconcile.report_traccar_drift",
+	],
 }
 
 # Testing
@@ -218,12 +269,12 @@ scheduler_events = {
 # Request Events
 # ----------------
 # before_request = ["fleet.utils.before_request"]
-# after_request = ["fleet.utils.after_request"]
+after_request = ["fleet.fleet.metrics.flush"]
 
 # Job Events
 # ----------
 # before_job = ["fleet.utils.before_job"]
-# after_job = ["fleet.utils.after_job"]
+after_job = ["fleet.fleet.metrics.flush"]
 
 # User Data Protection
 # --------------------
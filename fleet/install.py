@@ -94,18 +94,19 @@ def get_user_confirmation():
 			print("Please enter 'yes' or 'no'.")
 
 
-def add_custom_queue():
+def add_custom_queue(setup_supervisor=True):
+	# traccar_stream only runs the long-lived position stream consumer, so it can't hold up the
+	# polling and outbox jobs on traccar
+	queues = {"traccar": {"timeout": 8000}, "traccar_stream": {"timeout": 8000}}
 	sites_path = os.getcwd()
 	common_site_config_path = os.path.join(sites_path, "common_site_config.json")
-	workers = frappe.conf.workers
+	workers = frappe.conf.workers or {}
 
-	if workers and "traccar" in workers.keys():
+	if all(queue in workers.keys() for queue in queues):
 		return
 
-	if workers:
-		workers["traccar"] = {"timeout": 8000}
-	else:
-		workers = {"traccar": {"timeout": 8000}}
+	for queue, config in queues.items():
+		workers.setdefault(queue, config)
 
 	update_site_config("workers", workers, validate=False, site_config_path=common_site_config_path)
 
@@ -113,6 +114,10 @@ def add_custom_queue():
 	if not (frappe.conf.restart_supervisor_on_update or frappe.conf.restart_systemd_on_update):
 		return
 
+	if not setup_supervisor:
+		print("Added the traccar_stream queue, please run 'bench setup supervisor'.")
+		return
+
 	if not get_user_confirmation():
 		print("Please run 'bench setup supervisor' manually.")
 		return
@@ -0,0 +1,9 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+from fleet.install import add_custom_queue
+
+
+def execute():
+	# migrations can't prompt, so supervisor is left to the user
+	add_custom_queue(setup_supervisor=False)
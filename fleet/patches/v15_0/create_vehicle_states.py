@@ -0,0 +1,14 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.modules.utils import sync_customizations
+
+from fleet.fleet.doctype.vehicle_state.vehicle_state import refresh_vehicle_state
+
+
+def execute():
+	# Vehicle Log's Traccar fields are needed to pick the latest log
+	sync_customizations("fleet")
+	for vehicle in frappe.get_all("Vehicle", pluck="name"):
+		refresh_vehicle_state(vehicle)
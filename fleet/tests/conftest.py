@@ -0,0 +1,127 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import frappe
+import pytest
+from frappe.utils import get_bench_path
+
+from fleet.fleet.traccar import (
+	BACKFILL_PROGRESS_KEY,
+	CIRCUIT_BREAKER_KEY,
+	FORWARDED_POSITIONS_FLUSH_KEY,
+	FORWARDED_POSITIONS_FLUSH_LOCK_KEY,
+	FORWARDED_POSITIONS_KEY,
+	POSITION_WATERMARK_KEY,
+	TRACCAR_DEVICE_IDS_KEY,
+	TRACCAR_DEVICES_KEY,
+	TRACCAR_DRIVERS_KEY,
+	TRACCAR_GEOFENCE_AREAS_KEY,
+	TRACCAR_GEOFENCES_KEY,
+	get_distance_conversion_factor,
+	reconcile_traccar_devices,
+)
+from fleet.tests.fake_traccar import FakeTraccar
+
+
+@pytest.fixture(scope="session", autouse=True)
+def db_instance():
+	currentsite = "test_site"
+	sites = Path(get_bench_path()) / "sites"
+	if (sites / "currentsite.txt").is_file():
+		currentsite = (sites / "currentsite.txt").read_text().strip()
+	frappe.init(site=currentsite, sites_path=sites)
+	frappe.connect()
+	# nothing a test writes is committed, each test is rolled back by `isolated`
+	frappe.db.commit = MagicMock()
+	yield frappe.db
+	frappe.destroy()
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+	"""
+	Runs each test as Administrator from the committed fixtures, with jobs left to the test to run,
+	and rolls back whatever it wrote.
+	"""
+	frappe.set_user("Administrator")
+	monkeypatch.setattr(frappe, "enqueue", MagicMock())
+	yield
+	frappe.db.rollback()
+	frappe.clear_document_cache("Traccar Integration", "Traccar Integration")
+	# ingestion switches to the Traccar user
+	frappe.set_user("Administrator")
+
+
+@pytest.fixture()
+def fake_traccar():
+	"""
+	Serves a FakeTraccar for the test, with Traccar Integration pointed at it and the app's
+	Traccar caches cleared so nothing carries over from another server.
+	"""
+	with FakeTraccar() as fake:
+		frappe.cache.delete_value(
+			[
+				BACKFILL_PROGRESS_KEY,
+				FORWARDED_POSITIONS_FLUSH_KEY,
+				FORWARDED_POSITIONS_FLUSH_LOCK_KEY,
+				FORWARDED_POSITIONS_KEY,
+				POSITION_WATERMARK_KEY,
+				TRACCAR_DEVICE_IDS_KEY,
+				TRACCAR_DEVICES_KEY,
+				TRACCAR_DRIVERS_KEY,
+				TRACCAR_GEOFENCE_AREAS_KEY,
+				TRACCAR_GEOFENCES_KEY,
+			]
+		)
+		frappe.cache.delete_keys(CIRCUIT_BREAKER_KEY)
+		settings = frappe.get_single("Traccar Integration")
+		settings.enable_traccar = 1
+		settings.traccar_server_url = fake.url
+		settings.username = "admin"
+		settings.password = "admin"
+		settings.request_retries = 0
+		settings.enable_position_stream = 0
+		settings.bulk_insert_vehicle_logs = 0
+		settings.save()
+		yield fake
+
+
+@pytest.fixture()
+def traccar_vehicle(fake_traccar):
+	"""
+	A Vehicle with a device in the fake Traccar, created by reconciling the fleet against it. Its
+	Vehicle State is dropped so positions from earlier tests don't count as already logged.
+	"""
+	reconcile_traccar_devices()
+	vehicle = frappe.get_all(
+		"Vehicle",
+		{"disabled": 0, "traccar_imei": ["is", "set"], "traccar_id": ["is", "set"]},
+		pluck="name",
+		limit=1,
+	)[0]
+	frappe.db.delete("Vehicle State", {"vehicle": vehicle})
+	return frappe.get_doc("Vehicle", vehicle)
+
+
+def add_position(fake, vehicle_doc, fix_time=None, distance=1000, **fields):
+	"""
+	Records a position in the fake for a Vehicle's device, `distance` past its last odometer so it
+	passes Vehicle Log validation, and north of the depot by the same distance so consecutive
+	positions aren't coalesced as parked.
+
+	:return: dict; the position
+	"""
+	odometer = (vehicle_doc.last_odometer or 0) + distance
+	attributes = {"totalDistance": odometer / get_distance_conversion_factor()}
+	attributes.update(fields.pop("attributes", {}))
+	return fake.state.add_position(
+		int(vehicle_doc.traccar_id),
+		-31.95 + distance / 100000,
+		115.86,
+		fix_time=fix_time,
+		attributes=attributes,
+		**fields,
+	)
@@ -0,0 +1,577 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+"""
+In-memory stand-in for the Traccar REST API, for load and integration testing without a Traccar
+server or network access. Covers the endpoints the app uses: devices, positions, drivers,
+geofences, permissions, session and the route report, plus the OsmAnd protocol on `/` that
+`simulate_gps_data.py` reports positions with. The /api/socket push stream is not implemented.
+
+Run it in-process:
+
+	with FakeTraccar(latency=0.02, failure_rate=0.01) as fake:
+		fake.seed(devices=2000)
+		...  # point Traccar Integration's server URL at fake.url
+
+or on localhost:
+
+	python -m fleet.tests.fake_traccar --port 8082 --devices 2000 --latency 0.02
+
+Latency and failures can be changed while it runs by POSTing JSON to /fake/config, e.g.
+{"down": true} to simulate an outage, and state is cleared with POST /fake/reset.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CONFIG_KEYS = ("latency", "jitter", "failure_rate", "failure_status", "down")
+
+
+class FakeTraccarState:
+	"""
+	Traccar's data model held in dicts keyed by ID. All access goes through `lock` since the server
+	handles requests on threads.
+	"""
+
+	def __init__(self, max_history=1000):
+		self.lock = threading.RLock()
+		self.max_history = max_history
+		self.reset()
+
+	def reset(self):
+		with self.lock:
+			self.ids = itertools.count(1)
+			self.devices = {}
+			self.drivers = {}
+			self.geofences = {}
+			self.positions = {}  # device id: [position, ...] oldest first
+			self.permissions = set()  # frozenset of (key, id) pairs
+			self.requests = 0
+
+	def add(self, collection, data):
+		with self.lock:
+			obj = dict(data)
+			obj["id"] = next(self.ids)
+			obj.setdefault("attributes", {})
+			collection[obj["id"]] = obj
+			return obj
+
+	def add_device(self, data):
+		device = {
+			"name": "",
+			"uniqueId": "",
+			"status": "offline",
+			"disabled": False,
+			"lastUpdate": None,
+			"positionId": 0,
+			"groupId": 0,
+			"phone": None,
+			"model": None,
+			"contact": None,
+			"category": None,
+		}
+		device.update(data)
+		with self.lock:
+			if any(d["uniqueId"] == device["uniqueId"] for d in self.devices.values()):
+				raise ValueError(f"Duplicate uniqueId {device['uniqueId']}")
+			return self.add(self.devices, device)
+
+	def add_position(self, device_id, latitude, longitude, fix_time=None, **fields):
+		"""
+		Records a position for a device, as if it had been reported by the device.
+
+		:param device_id: int; Traccar device ID
+		:param latitude: float
+		:param longitude: float
+		:param fix_time: datetime | None; defaults to now, timezone aware
+		:param fields: speed, course, altitude or attributes
+		:return: dict; position
+		"""
+		now = datetime.datetime.now(datetime.timezone.utc)
+		fix_time = fix_time or now
+		with self.lock:
+			device = self.devices[device_id]
+			position = {
+				"deviceId": device_id,
+				"protocol": "osmand",
+				"serverTime": format_time(now),
+				"deviceTime": format_time(fix_time),
+				"fixTime": format_time(fix_time),
+				"outdated": False,
+				"valid": True,
+				"latitude": latitude,
+				"longitude": longitude,
+				"altitude": fields.get("altitude", 0),
+				"speed": fields.get("speed", 0),
+				"course": fields.get("course", 0),
+				"address": None,
+				"accuracy": 0,
+				"network": None,
+				"geofenceIds": self.get_geofence_ids(device_id, latitude, longitude) or None,
+				"attributes": fields.get("attributes", {}),
+			}
+			position["id"] = next(self.ids)
+			history = self.positions.setdefault(device_id, [])
+			history.append(position)
+			del history[: -self.max_history]
+			device.update(
+				{
+					"positionId": position["id"],
+					"lastUpdate": position["serverTime"],
+					"status": "online",
+				}
+			)
+			return position
+
+	def get_geofence_ids(self, device_id, latitude, longitude):
+		linked = self.get_linked_geofences(device_id)
+		return [
+			gid
+			for gid in sorted(linked)
+			if area_contains(self.geofences[gid]["area"], latitude, longitude)
+		]
+
+	def get_linked_geofences(self, device_id):
+		return self.get_linked(device_id, "geofenceId", self.geofences)
+
+	def get_linked(self, device_id, key, collection):
+		"""
+		:return: set; ids of the objects in `collection` linked to the device by `key` permissions
+		"""
+		with self.lock:
+			permissions = [dict(p) for p in self.permissions]
+			return {
+				p[key]
+				for p in permissions
+				if p.get("deviceId") == device_id and p.get(key) in collection
+			}
+
+	def seed(self, devices=100, drivers=0, latitude=-31.95, longitude=115.86, spread=0.5):
+		"""
+		Adds devices with one position each scattered around a point, and optionally drivers.
+
+		:return: list; the new devices
+		"""
+		added = []
+		with self.lock:
+			start = len(self.devices)
+			for i in range(start, start + devices):
+				device = self.add_device({"name": f"Device {i}", "uniqueId": f"{100000000 + i}"})
+				self.add_position(
+					device["id"],
+					latitude + random.uniform(-spread, spread),
+					longitude + random.uniform(-spread, spread),
+					speed=random.choice([0, 0, 0, random.uniform(5, 60)]),
+					attributes={"totalDistance": random.uniform(0, 1e7), "batteryLevel": 90},
+				)
+				added.append(device)
+			for i in range(drivers):
+				self.add(self.drivers, {"name": f"Driver {i}", "uniqueId": f"DRV-{i}"})
+		return added
+
+
+class FakeTraccarHandler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def log_message(self, format, *args):
+		if self.server.verbose:
+			super().log_message(format, *args)
+
+	def do_GET(self):
+		self.dispatch("GET")
+
+	def do_POST(self):
+		self.dispatch("POST")
+
+	def do_PUT(self):
+		self.dispatch("PUT")
+
+	def do_DELETE(self):
+		self.dispatch("DELETE")
+
+	def dispatch(self, method):
+		url = urlparse(self.path)
+		query = parse_qs(url.query)
+		body = self.read_body()
+		parts = [p for p in url.path.split("/") if p]
+
+		if parts[:1] == ["fake"]:
+			return self.control(method, parts[1:], body)
+
+		config = self.server.config
+		with self.server.state.lock:
+			self.server.state.requests += 1
+		if config["down"]:
+			# drop the connection, like a stopped server behind a proxy that still accepts
+			self.close_connection = True
+			self.connection.close()
+			return
+		delay = config["latency"] + random.uniform(0, config["jitter"])
+		if delay:
+			time.sleep(delay)
+		if config["failure_rate"] and random.random() < config["failure_rate"]:
+			return self.respond(config["failure_status"], {"error": "Injected failure"})
+
+		if not parts:
+			return self.osmand(query, body)
+		if parts[0] != "api" or len(parts) < 2:
+			return self.respond(404)
+		handler = getattr(self, f"api_{parts[1]}", None)
+		if not handler:
+			return self.respond(404)
+		try:
+			return handler(method, parts[2:], query, body)
+		except KeyError:
+			return self.respond(404)
+		except ValueError as e:
+			return self.respond(400, {"error": str(e)})
+
+	def read_body(self):
+		length = int(self.headers.get("Content-Length") or 0)
+		if not length:
+			return None
+		raw = self.rfile.read(length).decode()
+		if "application/json" in (self.headers.get("Content-Type") or ""):
+			return json.loads(raw) if raw else None
+		return {k: v[-1] for k, v in parse_qs(raw).items()}
+
+	def respond(self, status, data=None, headers=None):
+		payload = b"" if data is None else json.dumps(data).encode()
+		self.send_response(status)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(payload)))
+		for key, value in (headers or {}).items():
+			self.send_header(key, value)
+		self.end_headers()
+		self.wfile.write(payload)
+
+	def control(self, method, parts, body):
+		server = self.server
+		if parts == ["config"]:
+			if method == "POST":
+				server.configure(**{k: v for k, v in (body or {}).items() if k in CONFIG_KEYS})
+			return self.respond(200, server.config)
+		if parts == ["reset"] and method == "POST":
+			server.state.reset()
+			return self.respond(204)
+		if parts == ["seed"] and method == "POST":
+			devices = server.state.seed(**(body or {}))
+			return self.respond(200, {"devices": len(devices)})
+		if parts == ["stats"]:
+			state = server.state
+			return self.respond(
+				200,
+				{
+					"requests": state.requests,
+					"devices": len(state.devices),
+					"positions": sum(len(p) for p in state.positions.values()),
+				},
+			)
+		return self.respond(404)
+
+	def osmand(self, query, body):
+		params = {k: v[-1] for k, v in query.items()}
+		params.update(body or {})
+		state = self.server.state
+		with state.lock:
+			device = next(
+				(d for d in state.devices.values() if d["uniqueId"] == str(params.get("id"))), None
+			)
+			if not device:
+				return self.respond(400)
+			reserved = {"id", "lat", "lon", "timestamp", "speed", "bearing", "altitude"}
+			attributes = {k: to_number(v) for k, v in params.items() if k not in reserved}
+			# the renames Traccar's OsmAnd decoder makes
+			for param, attribute in (("odometer", "totalDistance"), ("batt", "batteryLevel")):
+				if param in attributes:
+					attributes[attribute] = attributes.pop(param)
+			timestamp = params.get("timestamp")
+			state.add_position(
+				device["id"],
+				float(params["lat"]),
+				float(params["lon"]),
+				fix_time=(
+					datetime.datetime.fromtimestamp(int(timestamp), datetime.timezone.utc)
+					if timestamp
+					else None
+				),
+				speed=float(params.get("speed") or 0),
+				course=float(params.get("bearing") or 0),
+				altitude=float(params.get("altitude") or 0),
+				attributes=attributes,
+			)
+		return self.respond(200)
+
+	def crud(self, collection, method, parts, query, body, filters=None):
+		state = self.server.state
+		with state.lock:
+			if method == "GET" and not parts:
+				objs = list(collection.values())
+				if "id" in query:
+					ids = {int(i) for i in query["id"]}
+					objs = [o for o in objs if o["id"] in ids]
+				for key in filters or ():
+					if key in query:
+						objs = [o for o in objs if str(o.get(key)) in query[key]]
+				return self.respond(200, objs)
+			if method == "GET":
+				return self.respond(200, collection[int(parts[0])])
+			if method == "POST" and not parts:
+				return self.respond(200, state.add(collection, body or {}))
+			if method == "PUT" and parts:
+				obj = collection[int(parts[0])]
+				obj.update({k: v for k, v in (body or {}).items() if k != "id"})
+				return self.respond(200, obj)
+			if method == "DELETE" and parts:
+				object_id = int(parts[0])
+				del collection[object_id]
+				state.permissions = {
+					p for p in state.permissions if object_id not in dict(p).values()
+				}
+				return self.respond(204)
+		return self.respond(405)
+
+	def api_devices(self, method, parts, query, body):
+		if method == "POST" and not parts:
+			return self.respond(200, self.server.state.add_device(body or {}))
+		return self.crud(self.server.state.devices, method, parts, query, body, ["uniqueId"])
+
+	def api_drivers(self, method, parts, query, body):
+		state = self.server.state
+		if method == "POST" and not parts:
+			with state.lock:
+				unique_id = (body or {}).get("uniqueId")
+				if any(d["uniqueId"] == unique_id for d in state.drivers.values()):
+					raise ValueError(f"Duplicate uniqueId {unique_id}")
+				return self.respond(200, state.add(state.drivers, body or {}))
+		if method == "GET" and not parts and "deviceId" in query:
+			with state.lock:
+				linked = state.get_linked(int(query["deviceId"][0]), "driverId", state.drivers)
+				return self.respond(200, [state.drivers[did] for did in sorted(linked)])
+		return self.crud(state.drivers, method, parts, query, body, ["uniqueId"])
+
+	def api_geofences(self, method, parts, query, body):
+		state = self.server.state
+		if method == "GET" and not parts and "deviceId" in query:
+			with state.lock:
+				linked = state.get_linked_geofences(int(query["deviceId"][0]))
+				return self.respond(200, [state.geofences[gid] for gid in sorted(linked)])
+		return self.crud(state.geofences, method, parts, query, body)
+
+	def api_positions(self, method, parts, query, body):
+		if method != "GET":
+			return self.respond(405)
+		state = self.server.state
+		with state.lock:
+			if "id" in query:
+				ids = {int(i) for i in query["id"]}
+				positions = [
+					p for history in state.positions.values() for p in history if p["id"] in ids
+				]
+			elif "deviceId" in query:
+				device_id = int(query["deviceId"][0])
+				history = state.positions.get(device_id) or []
+				positions = history[-1:]
+			else:
+				positions = [history[-1] for history in state.positions.values() if history]
+		return self.respond(200, positions)
+
+	def api_permissions(self, method, parts, query, body):
+		if method not in ("POST", "DELETE"):
+			return self.respond(405)
+		items = body if parts == ["bulk"] else [body]
+		state = self.server.state
+		with state.lock:
+			for item in items or []:
+				permission = frozenset((item or {}).items())
+				if len(permission) != 2:
+					raise ValueError("A permission links exactly two objects")
+				if method == "POST":
+					state.permissions.add(permission)
+				else:
+					state.permissions.discard(permission)
+		return self.respond(204)
+
+	def api_reports(self, method, parts, query, body):
+		if method != "GET" or parts != ["route"]:
+			return self.respond(404)
+		start = parse_time(query["from"][0])
+		end = parse_time(query["to"][0])
+		state = self.server.state
+		with state.lock:
+			device_ids = [int(i) for i in query.get("deviceId", [])] or list(state.positions)
+			positions = [
+				p
+				for device_id in device_ids
+				for p in state.positions.get(device_id, [])
+				if start <= parse_time(p["fixTime"]) <= end
+			]
+		return self.respond(200, positions)
+
+	def api_session(self, method, parts, query, body):
+		if method == "POST":
+			return self.respond(
+				200,
+				{"id": 1, "name": "admin", "email": (body or {}).get("email")},
+				{"Set-Cookie": "JSESSIONID=fake; Path=/"},
+			)
+		return self.respond(204 if method == "DELETE" else 405)
+
+
+class FakeTraccar(ThreadingHTTPServer):
+	"""
+	Fake Traccar server. `start()` serves on a background thread, `stop()` shuts it down, and it
+	works as a context manager. `state` holds the data; use it to seed or inspect directly.
+
+	:param host: str
+	:param port: int; 0 picks a free port, see `url`
+	:param latency: float; seconds added to every API response
+	:param jitter: float; up to this many random seconds added on top of `latency`
+	:param failure_rate: float; share of API requests answered with `failure_status`
+	:param failure_status: int; HTTP status of injected failures
+	:param down: bool; drop every API connection, as during an outage
+	:param max_history: int; positions kept per device for route reports
+	:param verbose: bool; log each request to stderr
+	"""
+
+	daemon_threads = True
+
+	def __init__(
+		self,
+		host="127.0.0.1",
+		port=0,
+		latency=0.0,
+		jitter=0.0,
+		failure_rate=0.0,
+		failure_status=503,
+		down=False,
+		max_history=1000,
+		verbose=False,
+	):
+		super().__init__((host, port), FakeTraccarHandler)
+		self.state = FakeTraccarState(max_history=max_history)
+		self.verbose = verbose
+		self.config = {}
+		self.configure(
+			latency=latency,
+			jitter=jitter,
+			failure_rate=failure_rate,
+			failure_status=failure_status,
+			down=down,
+		)
+		self.thread = None
+
+	@property
+	def url(self):
+		host, port = self.server_address[:2]
+		return f"http://{host}:{port}"
+
+	def configure(self, **config):
+		self.config.update(config)
+
+	def seed(self, **kwargs):
+		return self.state.seed(**kwargs)
+
+	def start(self):
+		self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+		self.thread.start()
+		return self
+
+	def stop(self):
+		self.shutdown()
+		self.server_close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.stop()
+
+
+def format_time(dt):
+	return dt.astimezone(datetime.timezone.utc).isoformat(timespec="milliseconds")
+
+
+def parse_time(value):
+	return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def to_number(value):
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return value
+
+
+def area_contains(area, latitude, longitude):
+	"""
+	Whether a Traccar WKT area ("lat lon" order) contains a point. Supports CIRCLE and POLYGON.
+	"""
+	shape, _, coords = area.partition("(")
+	shape = shape.strip().upper()
+	coords = coords.strip("() ")
+	if shape == "CIRCLE":
+		center, radius = coords.split(",")
+		lat, lon = (float(c) for c in center.split())
+		return haversine(lat, lon, latitude, longitude) <= float(radius)
+	if shape == "POLYGON":
+		points = [tuple(float(c) for c in pair.split()) for pair in coords.split(",")]
+		inside = False
+		for (lat1, lon1), (lat2, lon2) in zip(points, points[1:] + points[:1]):
+			if (lon1 > longitude) != (lon2 > longitude):
+				crossing = (lat2 - lat1) * (longitude - lon1) / (lon2 - lon1) + lat1
+				if latitude < crossing:
+					inside = not inside
+		return inside
+	return False
+
+
+def haversine(lat1, lon1, lat2, lon2):
+	radius = 6371000
+	phi1, phi2 = math.radians(lat1), math.radians(lat2)
+	dphi = math.radians(lat2 - lat1)
+	dlambda = math.radians(lon2 - lon1)
+	a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+	return 2 * radius * math.asin(math.sqrt(a))
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run a fake Traccar server")
+	parser.add_argument("--host", default="127.0.0.1")
+	parser.add_argument("--port", type=int, default=8082)
+	parser.add_argument("--devices", type=int, default=0, help="devices to seed")
+	parser.add_argument("--drivers", type=int, default=0, help="drivers to seed")
+	parser.add_argument("--latency", type=float, default=0.0)
+	parser.add_argument("--jitter", type=float, default=0.0)
+	parser.add_argument("--failure-rate", type=float, default=0.0)
+	parser.add_argument("--failure-status", type=int, default=503)
+	parser.add_argument("--verbose", action="store_true")
+	args = parser.parse_args()
+
+	server = FakeTraccar(
+		args.host,
+		args.port,
+		latency=args.latency,
+		jitter=args.jitter,
+		failure_rate=args.failure_rate,
+		failure_status=args.failure_status,
+		verbose=args.verbose,
+	)
+	server.seed(devices=args.devices, drivers=args.drivers)
+	print(f"Fake Traccar listening on {server.url}")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.server_close()
+
+
+if __name__ == "__main__":
+	main()
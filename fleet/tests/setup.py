@@ -16,6 +16,7 @@ from frappe.exceptions import ValidationError
 from frappe.utils.data import getdate
 from test_utils.utils.chart_of_accounts import setup_chart_of_accounts
 
+from fleet.fleet.doctype.traccar_outbox.traccar_outbox import drain_traccar_outbox
 from fleet.fleet.traccar import get_traccar_driver, link_traccar_object
 from fleet.tests.fixtures.locations_and_routes import (
 	farm_geojson,
@@ -543,7 +544,12 @@ def create_vehicles(settings=None):
 		driver_idx += 1
 		doc.save()
 
-		# Link drivers to vehicle in Traccar
+	# Create every driver and device in Traccar now rather than waiting on the queued drain
+	drain_traccar_outbox()
+
+	# Link drivers to vehicle in Traccar
+	for vehicle in vehicles:
+		doc = frappe.get_doc("Vehicle", vehicle.get("name"))
 		for d in doc.drivers:
 			d_name = d.driver
 			driver = get_traccar_driver(d_name)
@@ -673,6 +679,9 @@ def create_addresses_and_locations(settings=None):
 				addr.append("links", {"link_doctype": l.doctype, "link_name": l.name})
 			addr.save()
 
+	# Create the geofences in Traccar
+	drain_traccar_outbox()
+
 	# Link Farm Office location to Company Address
 	co_addr = frappe.get_doc("Address", {"is_your_company_address": 1})
 	l_name = frappe.get_value("Location", {"location_name": "Farm Office"})
@@ -2,116 +2,361 @@
 # For license information, please see license.txt
 
 
+import asyncio
+import functools
 import math
 import random
 import time
-from itertools import cycle
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
 import frappe
 import requests
+from requests.adapters import HTTPAdapter
 
 from fleet.fleet.traccar import get_server_url_and_credentials
 from fleet.tests.fixtures.locations_and_routes import routes
 
+# simulated devices use the uniqueIds fake_traccar seeds devices with
+DEVICE_ID_START = 100000000
+KNOTS_TO_METERS_PER_SECOND = 0.514444
+PROGRESS_INTERVAL = 10  # seconds
 
-def simulate(port=5055):
-	traccar_server_url, credentials = get_server_url_and_credentials()
-	traccar_server_url = traccar_server_url or f"http://localhost:{port}"
-	if credentials:
-		headers = {"Authorization": f"Basic {credentials}", "Content-Type": "application/json"}
+
+def simulate(
+	port=5055,
+	devices=None,
+	rate=None,
+	seed=None,
+	duration=None,
+	concurrency=50,
+	url=None,
+	timeout=10,
+):
+	"""
+	Load generator that reports GPS positions to Traccar's OsmAnd endpoint. Devices move along the
+	`routes` fixtures, interpolated between route points at their speed, and report round-robin at
+	the target rate over a pool of keep-alive connections. Runs until `duration` elapses or it is
+	interrupted, then prints and returns the achieved throughput and latency percentiles.
+
+	:param port: int; OsmAnd port on localhost, used when no server URL is configured
+	:param devices: int | None; number of simulated devices, with uniqueIds counting up from
+	DEVICE_ID_START, by default the site's Vehicles with a Traccar IMEI
+	:param rate: float | None; target positions per second across all devices, defaults to one
+	position per device every 5 seconds
+	:param seed: int | None; random seed, for repeatable runs
+	:param duration: float | None; seconds to run for, None runs until interrupted
+	:param concurrency: int; requests in flight at once, and the connection pool size
+	:param url: str | None; OsmAnd server URL, overrides Traccar Integration
+	:param timeout: float; request timeout in seconds
+	:return: dict; run report
+	"""
+	rng = random.Random(seed)
+	if url:
+		traccar_server_url, credentials = url, None
 	else:
-		headers = {"Content-Type": "application/json"}
+		traccar_server_url, credentials = get_server_url_and_credentials()
+	traccar_server_url = traccar_server_url or f"http://localhost:{port}"
+	headers = {"Authorization": f"Basic {credentials}"} if credentials else {}
+
+	sim_devices = get_simulated_devices(devices, rng)
+	if not sim_devices:
+		print("No devices to simulate")
+		return
+	rate = float(rate or len(sim_devices) / 5)
+
+	stats = SimulationStats()
+	print(
+		f"Simulating {len(sim_devices)} devices at {rate:g} positions/s against "
+		f"{traccar_server_url}"
+	)
+	try:
+		asyncio.run(
+			send_positions(
+				sim_devices,
+				urljoin(traccar_server_url, "/"),
+				headers,
+				rate,
+				duration,
+				concurrency,
+				timeout,
+				stats,
+			)
+		)
+	except KeyboardInterrupt:
+		print("\nStopping simulator...")
+
+	report = stats.report()
+	print_report(report, rate)
+	return report
+
+
+def get_simulated_devices(devices, rng):
+	if devices:
+		return [
+			SimulatedDevice(
+				str(DEVICE_ID_START + i),
+				routes[i % len(routes)]["route"],
+				rng,
+				diesel=rng.random() < 0.3,
+			)
+			for i in range(int(devices))
+		]
 
 	vehicles = frappe.get_all(
 		"Vehicle",
-		filters={"disabled": False},
-		fields=[
-			"name",
-			"chassis_no",
-			"last_odometer",
-			# "gps_location",  # class property, need to grab off instance
-			"make",
-			"fuel_type",
-			"traccar_imei",
-			"traccar_id",
-		],
+		filters={"disabled": False, "traccar_imei": ["is", "set"]},
+		fields=["name", "last_odometer", "make", "fuel_type", "traccar_imei"],
 	)
-	vehicle_routes = frappe._dict({r["vehicle"]: cycle(r["route"]) for r in routes})
-	usage_dict = {v.name: v.last_odometer for v in vehicles}
-	last_position = {r["vehicle"]: r["route"][-1] for r in routes}
-	driver_dict = {
-		v.name: frappe.get_value("Vehicle Driver", {"parent": v.name}, "driver") for v in vehicles
+	vehicle_routes = {r["vehicle"]: r["route"] for r in routes}
+	drivers = {
+		d.parent: d.driver
+		for d in frappe.get_all(
+			"Vehicle Driver", {"parenttype": "Vehicle"}, ["parent", "driver"], order_by="idx asc"
+		)
 	}
+	return [
+		SimulatedDevice(
+			v.traccar_imei,
+			vehicle_routes.get(v.name) or routes[i % len(routes)]["route"],
+			rng,
+			diesel=v.fuel_type == "Diesel",
+			engine_hours=v.make in ["Kubota", "Bobcat"],
+			usage=v.last_odometer or 0,
+			driver=drivers.get(v.name, ""),
+			alarm="check-engine" if v.name == "3812947" else None,
+		)
+		for i, v in enumerate(vehicles)
+	]
 
-	try:
+
+class SimulatedDevice:
+	"""
+	A device moving along a route at a steady speed, starting at a random point on it.
+	"""
+
+	def __init__(
+		self,
+		unique_id,
+		route,
+		rng,
+		diesel=False,
+		engine_hours=False,
+		usage=0,
+		driver="",
+		alarm=None,
+	):
+		self.unique_id = unique_id
+		self.route = route
+		self.rng = rng
+		self.diesel = diesel
+		self.engine_hours = engine_hours
+		self.usage = float(usage)
+		self.driver = driver
+		self.alarm = alarm
+		# Traccar default is knots (1 knot = 1.15 mph = 1.852 km/h)
+		self.speed = rng.randint(5, 15) if diesel else rng.randint(30, 70)
+		self.fuel = rng.uniform(20, 100)
+		self.route_length = get_route_length(route)
+		self.segment = rng.randrange(len(route))
+		self.progress = 0.0  # meters along the current segment
+		self.last_report = None
+
+	def next_position(self, now):
+		"""
+		Moves the device on by the time since its last report and returns OsmAnd parameters.
+
+		:param now: float; epoch seconds
+		:return: dict
+		"""
+		elapsed = now - self.last_report if self.last_report else 0
+		self.last_report = now
+		speed = max(self.speed + self.rng.uniform(-3, 3), 0)
+		meters = speed * KNOTS_TO_METERS_PER_SECOND * elapsed
+		lat, lon, bearing = self.advance(meters)
+
+		if self.engine_hours:
+			self.usage += elapsed / 3600
+		else:
+			# Traccar distance default is km
+			self.usage += meters / 1000
+		self.fuel = max(self.fuel - meters / 100000, 0)
+
+		data = {
+			"id": self.unique_id,
+			"timestamp": int(now),
+			"lat": round(lat, 6),
+			"lon": round(lon, 6),
+			"altitude": self.rng.randint(10, 300),
+			"bearing": round(bearing, 1),
+			"speed": round(speed, 1),
+			"batt": round(
+				self.rng.uniform(23.8, 24.2) if self.diesel else self.rng.uniform(11.8, 12.4), 2
+			),
+			"temp": round(
+				self.rng.uniform(85, 95) if self.diesel else self.rng.uniform(75, 85), 2
+			),
+			"fuel": round(self.fuel, 2),
+			"hours" if self.engine_hours else "odometer": round(self.usage, 2),
+			"driverUniqueId": self.driver,
+		}
+		if self.alarm:
+			data["alarm"] = self.alarm  # or 'malfunction' is also commonly used
+		return data
+
+	def advance(self, meters):
+		"""
+		Moves `meters` along the route, wrapping around at its end.
+
+		:return: tuple; latitude, longitude and bearing of the new position
+		"""
+		if not self.route_length:
+			lat, lon = self.route[0]
+			return lat, lon, 0
+		# whole laps end where they started
+		meters %= self.route_length
 		while True:
-			for vehicle in vehicles:
-				# Get latest fuel level
-				fuel_log = frappe.get_all(
-					"Vehicle Log",
-					filters={"license_plate": vehicle.name},
-					fields=["fuel_qty"],
-					order_by="date desc",
-					limit=1,
-				)
-				fuel_level = fuel_log[0].fuel_qty if fuel_log else 0
-				lat_0, lon_0 = last_position[vehicle.name]
-				lat_1, lon_1 = next(vehicle_routes[vehicle.name])
-				bearing = get_bearing(lat_0, lon_0, lat_1, lon_1)
-				last_position[vehicle.name] = (lat_1, lon_1)
-				# usage = float(vehicle.last_odometer)  # replace usage dict if syncing vehicles
-				usage = usage_dict[vehicle.name]
-
-				if vehicle.make in ["Kubota", "Bobcat"]:
-					usage += round(random.uniform(0.01, 0.05), 2)  # Engine hours
-					usage_param = "hours"
-				else:
-					# Traccar distance default is km
-					usage += round(random.uniform(0.05, 0.3), 2)  # Odometer distance
-					usage_param = "odometer"
-				usage_dict[vehicle.name] = usage
-				batt = (
-					round(random.uniform(23.8, 24.2), 2)
-					if vehicle.fuel_type == "Diesel"
-					else round(random.uniform(11.8, 12.4), 2)
-				)
-				temp = (
-					round(random.uniform(85, 95), 2)
-					if vehicle.fuel_type == "Diesel"
-					else round(random.uniform(75, 85), 2)
-				)
-				speed = (  # Traccar default is knots (1 knot = 1.15 mph = 1.852 km/h)
-					random.randint(5, 15) if vehicle.fuel_type == "Diesel" else random.randint(30, 70)
-				)
-				altitude = random.randint(10, 300)
-
-				data = {
-					"id": vehicle.traccar_imei,
-					"timestamp": int(time.time()),
-					"lat": lat_1,
-					"lon": lon_1,
-					"altitude": altitude,
-					"bearing": bearing,
-					"speed": speed,
-					"batt": batt,
-					"temp": temp,
-					"fuel": fuel_level,
-					usage_param: usage,
-					"driverUniqueId": driver_dict.get(vehicle.name, ""),
-				}
-				if vehicle.name == "3812947":
-					data["alarm"] = "check-engine"  # or 'malfunction' is also commonly used
-
-				response = requests.post(urljoin(traccar_server_url, "/"), headers=headers, data=data)
-				response.raise_for_status()
-				print(
-					f"Vehicle: {vehicle.name}, Position: {lat_1}, {lon_1}, Speed: {speed}, Usage: {usage}, Fuel: {fuel_level}"
-				)
-
-			time.sleep(5)
-	except KeyboardInterrupt:
-		print("\nStopping simulator...")
+			(lat0, lon0) = self.route[self.segment]
+			(lat1, lon1) = self.route[(self.segment + 1) % len(self.route)]
+			length = get_distance(lat0, lon0, lat1, lon1)
+			if self.progress + meters < length:
+				self.progress += meters
+				break
+			meters -= length - self.progress
+			self.progress = 0.0
+			self.segment = (self.segment + 1) % len(self.route)
+
+		fraction = self.progress / length if length else 0
+		lat = lat0 + (lat1 - lat0) * fraction
+		lon = lon0 + (lon1 - lon0) * fraction
+		return lat, lon, get_bearing(lat0, lon0, lat1, lon1)
+
+
+class SimulationStats:
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.finished = None
+		self.latencies = []
+		self.failed = 0
+		self.errors = {}
+
+	def record(self, latency, error=None):
+		self.latencies.append(latency)
+		if error:
+			self.failed += 1
+			self.errors[error] = self.errors.get(error, 0) + 1
+
+	def report(self):
+		elapsed = (self.finished or time.perf_counter()) - self.started
+		latencies = sorted(self.latencies)
+		sent = len(latencies)
+		return {
+			"sent": sent,
+			"succeeded": sent - self.failed,
+			"failed": self.failed,
+			"errors": self.errors,
+			"elapsed": round(elapsed, 3),
+			"throughput": round((sent - self.failed) / elapsed, 2) if elapsed else 0,
+			"latency_ms": {
+				name: round(percentile(latencies, p) * 1000, 2)
+				for name, p in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+			},
+		}
+
+
+async def send_positions(devices, url, headers, rate, duration, concurrency, timeout, stats):
+	"""
+	Sends one position every 1/`rate` seconds, round-robin over the devices. Requests run on a
+	thread pool sharing one pooled session; once `concurrency` are in flight, sending waits, so a
+	server that can't keep up shows as throughput below the target rather than unbounded queueing.
+	"""
+	loop = asyncio.get_running_loop()
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+	session.mount("http://", adapter)
+	session.mount("https://", adapter)
+	post = functools.partial(session.post, url, headers=headers, timeout=timeout)
+	semaphore = asyncio.Semaphore(concurrency)
+	pending = set()
+
+	async def send(data):
+		started = time.perf_counter()
+		error = None
+		try:
+			response = await loop.run_in_executor(executor, functools.partial(post, data=data))
+			if not response.ok:
+				error = f"HTTP {response.status_code}"
+		except requests.exceptions.RequestException as e:
+			error = type(e).__name__
+		finally:
+			semaphore.release()
+		stats.record(time.perf_counter() - started, error)
+
+	with ThreadPoolExecutor(max_workers=concurrency) as executor:
+		start = loop.time()
+		deadline = start + duration if duration else None
+		next_progress = start + PROGRESS_INTERVAL
+		count = 0
+		try:
+			while deadline is None or loop.time() < deadline:
+				delay = start + count / rate - loop.time()
+				if delay > 0:
+					await asyncio.sleep(delay)
+				await semaphore.acquire()
+				data = devices[count % len(devices)].next_position(time.time())
+				task = loop.create_task(send(data))
+				pending.add(task)
+				task.add_done_callback(pending.discard)
+				count += 1
+				if loop.time() >= next_progress:
+					next_progress += PROGRESS_INTERVAL
+					report = stats.report()
+					print(
+						f"{report['sent']} sent, {report['failed']} failed, "
+						f"{report['throughput']:g} positions/s"
+					)
+		finally:
+			if pending:
+				await asyncio.gather(*pending, return_exceptions=True)
+			stats.finished = time.perf_counter()
+			session.close()
+
+
+def print_report(report, rate):
+	latency = report["latency_ms"]
+	print(
+		f"Sent {report['sent']} positions in {report['elapsed']:g}s: {report['succeeded']} "
+		f"succeeded, {report['failed']} failed"
+	)
+	print(f"Throughput: {report['throughput']:g} positions/s (target {rate:g})")
+	print("Latency (ms): " + ", ".join(f"{name} {value:g}" for name, value in latency.items()))
+	if report["errors"]:
+		print("Errors: " + ", ".join(f"{e} x{n}" for e, n in report["errors"].items()))
+
+
+def percentile(values, p):
+	"""
+	Nearest-rank percentile of sorted values.
+	"""
+	if not values:
+		return 0
+	rank = max(math.ceil(p / 100 * len(values)), 1)
+	return values[rank - 1]
+
+
+def get_route_length(route):
+	return sum(get_distance(*route[i], *route[(i + 1) % len(route)]) for i in range(len(route)))
+
+
+def get_distance(lat1, lon1, lat2, lon2):
+	"""
+	Great-circle distance in meters.
+	"""
+	phi1, phi2 = math.radians(lat1), math.radians(lat2)
+	dphi = math.radians(lat2 - lat1)
+	dlambda = math.radians(lon2 - lon1)
+	a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+	return 2 * 6371000 * math.asin(math.sqrt(a))
 
 
 def get_bearing(lat1, lon1, lat2, lon2):
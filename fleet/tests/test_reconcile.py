@@ -0,0 +1,47 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import frappe
+
+from fleet.fleet.reconcile import has_drift, reconcile
+
+ORPHANED_IMEI = "000000000000000"
+
+
+def get_tracked_vehicles():
+	return frappe.get_all("Vehicle", {"traccar_imei": ["is", "set"]}, ["name", "traccar_imei"])
+
+
+def test_dry_run_reports_the_diff_without_applying_it(fake_traccar):
+	fake_traccar.state.add_device({"name": "Scrapped", "uniqueId": ORPHANED_IMEI})
+	vehicles = get_tracked_vehicles()
+
+	report = reconcile(dry_run=True)
+
+	assert report["dry_run"]
+	assert sorted(report["devices"]["create"]) == sorted(v.name for v in vehicles)
+	assert report["devices"]["orphaned"] == [ORPHANED_IMEI]
+	assert has_drift(report)
+	# nothing was created in Traccar
+	assert [d["uniqueId"] for d in fake_traccar.state.devices.values()] == [ORPHANED_IMEI]
+	assert not fake_traccar.state.drivers
+
+
+def test_reconcile_applies_the_diff(fake_traccar):
+	report = reconcile(dry_run=False)
+
+	assert not report["devices"]["failed"]
+	assert not report["drivers"]["failed"]
+	devices = {d["uniqueId"]: d["id"] for d in fake_traccar.state.devices.values()}
+	for vehicle in get_tracked_vehicles():
+		traccar_id = frappe.db.get_value("Vehicle", vehicle.name, "traccar_id")
+		assert traccar_id == str(devices[vehicle.traccar_imei])
+
+	report = reconcile(dry_run=True)
+
+	for step in ("devices", "drivers"):
+		for key in ("create", "update", "write_back_id", "orphaned"):
+			assert not report[step][key], (step, key)
+	assert not report["geofences"]["create"]
+	assert not report["geofence_permissions"]["link"]
+	assert not report["geofence_permissions"]["unlink"]
@@ -0,0 +1,359 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import datetime
+import json
+
+import frappe
+import pytest
+from frappe.utils import now_datetime
+from werkzeug.exceptions import BadRequest
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from fleet.fleet.traccar import (
+	BACKFILL_PROGRESS_KEY,
+	CIRCUIT_BREAKER_KEY,
+	CIRCUIT_FAILURE_THRESHOLD,
+	FORWARDED_POSITIONS_FLUSH_LOCK_KEY,
+	FORWARDED_POSITIONS_KEY,
+	POSITION_WATERMARK_KEY,
+	CircuitBreaker,
+	TraccarClient,
+	TraccarUnavailable,
+	backfill_vehicle,
+	bulk_ingest_positions,
+	create_vehicle_log,
+	enqueue_vehicle_shards,
+	flush_forwarded_positions,
+	get_fix_time,
+	get_latest_positions,
+	get_position_watermark,
+	get_traccar_device,
+	get_traccar_device_mirror,
+	get_vehicle_position,
+	get_vehicle_shard,
+	insert_vehicle_logs,
+	is_new_position,
+	receive_positions,
+	sync_vehicle,
+	sync_vehicle_positions,
+	sync_vehicle_shard,
+)
+from fleet.tests.conftest import add_position
+
+FORWARDING_TOKEN = "test-forwarding-token"
+
+
+def fix_times(count, start=None):
+	"""
+	:return: list; timezone aware fix times a minute apart, from half an hour ago by default
+	"""
+	start = start or datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=30)
+	return [start + datetime.timedelta(minutes=i) for i in range(count)]
+
+
+def get_logged_position_ids(vehicle):
+	return {
+		str(p)
+		for p in frappe.get_all(
+			"Vehicle Log",
+			{"license_plate": vehicle, "docstatus": 1, "traccar_position_id": ["is", "set"]},
+			pluck="traccar_position_id",
+		)
+	}
+
+
+@pytest.fixture()
+def forwarding(fake_traccar):
+	settings = frappe.get_single("Traccar Integration")
+	settings.enable_position_forwarding = 1
+	settings.forwarding_token = FORWARDING_TOKEN
+	settings.save()
+	request = getattr(frappe.local, "request", None)
+	yield
+	frappe.local.request = request
+
+
+def forward(data, token=FORWARDING_TOKEN):
+	"""
+	Calls `receive_positions` as Traccar's position forwarding would.
+	"""
+	builder = EnvironBuilder(
+		method="POST",
+		data=data if isinstance(data, str) else json.dumps(data),
+		content_type="application/json",
+		headers={"X-Traccar-Token": token},
+	)
+	frappe.local.request = Request(builder.get_environ())
+	return receive_positions()
+
+
+def test_receive_positions_buffers_the_whole_batch(forwarding, fake_traccar, traccar_vehicle):
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(3))
+	]
+	# Traccar's JSON forward payload and bare positions are both accepted
+	payload = [{"position": positions[0], "device": {"id": positions[0]["deviceId"]}}]
+	payload += positions[1:]
+
+	assert forward(payload) == {"received": 3}
+	buffered = [json.loads(p) for p in frappe.cache.lrange(FORWARDED_POSITIONS_KEY, 0, -1)]
+	assert [p["id"] for p in buffered] == [p["id"] for p in positions]
+	# one flush is scheduled for the batch
+	frappe.enqueue.assert_called_once()
+
+
+def test_receive_positions_rejects_malformed_payloads(forwarding, fake_traccar, traccar_vehicle):
+	position = add_position(fake_traccar, traccar_vehicle)
+
+	with pytest.raises(BadRequest):
+		forward("not json")
+	with pytest.raises(BadRequest):
+		forward(position["id"])
+	with pytest.raises(BadRequest):
+		forward([position, "not a position"])
+	with pytest.raises(frappe.AuthenticationError):
+		forward([position], token="wrong")
+	assert not frappe.cache.lrange(FORWARDED_POSITIONS_KEY, 0, -1)
+
+
+def test_flush_forwarded_positions_logs_the_batch(forwarding, fake_traccar, traccar_vehicle):
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(3))
+	]
+	forward(positions)
+
+	flush_forwarded_positions()
+
+	assert {str(p["id"]) for p in positions} <= get_logged_position_ids(traccar_vehicle.name)
+	assert not frappe.cache.lrange(FORWARDED_POSITIONS_KEY, 0, -1)
+
+
+def test_flush_forwarded_positions_leaves_the_batch_to_a_running_flush(
+	forwarding, fake_traccar, traccar_vehicle
+):
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(2))
+	]
+	forward(positions)
+	lock_key = frappe.cache.make_key(FORWARDED_POSITIONS_FLUSH_LOCK_KEY)
+	frappe.cache.set(lock_key, 1)
+	try:
+		flush_forwarded_positions()
+	finally:
+		frappe.cache.delete(lock_key)
+
+	assert len(frappe.cache.lrange(FORWARDED_POSITIONS_KEY, 0, -1)) == 2
+	assert not {str(p["id"]) for p in positions} & get_logged_position_ids(traccar_vehicle.name)
+
+
+def test_backfill_skips_invalid_positions(fake_traccar, traccar_vehicle):
+	vehicle = traccar_vehicle.name
+	start = now_datetime() - datetime.timedelta(hours=3)
+	end = now_datetime() - datetime.timedelta(hours=1)
+	history = fix_times(
+		4, datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=2)
+	)
+	# the third position's odometer goes backwards and fails Vehicle Log validation
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=distance)
+		for fix_time, distance in zip(history, (1000, 1010, 500, 1020))
+	]
+	error_logs = frappe.db.count("Error Log")
+
+	assert backfill_vehicle(vehicle, start, end) == 3
+
+	logged = get_logged_position_ids(vehicle)
+	assert {str(positions[i]["id"]) for i in (0, 1, 3)} <= logged
+	assert str(positions[2]["id"]) not in logged
+	assert frappe.db.count("Error Log") == error_logs + 1
+	# the range completed, so its progress is cleared
+	assert frappe.cache.hget(BACKFILL_PROGRESS_KEY, vehicle) is None
+	# backfilled history doesn't move the Vehicle's odometer
+	last_odometer = frappe.db.get_value("Vehicle", vehicle, "last_odometer")
+	assert last_odometer == traccar_vehicle.last_odometer
+
+
+def test_backfill_resumes_from_progress(fake_traccar, traccar_vehicle):
+	vehicle = traccar_vehicle.name
+	start = now_datetime() - datetime.timedelta(hours=3)
+	end = now_datetime() - datetime.timedelta(hours=1)
+	history = fix_times(
+		4, datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=2)
+	)
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(history)
+	]
+	# an earlier run stopped between the second and third positions
+	frappe.cache.hset(
+		BACKFILL_PROGRESS_KEY,
+		vehicle,
+		frappe._dict(
+			from_datetime=start,
+			to_datetime=end,
+			completed_until=get_fix_time(positions[1]) + datetime.timedelta(seconds=30),
+		),
+	)
+
+	assert backfill_vehicle(vehicle, start, end) == 2
+
+	logged = get_logged_position_ids(vehicle)
+	assert {str(p["id"]) for p in positions[2:]} <= logged
+	assert not {str(p["id"]) for p in positions[:2]} & logged
+	assert frappe.cache.hget(BACKFILL_PROGRESS_KEY, vehicle) is None
+
+
+def test_watermark_advances_on_commit(fake_traccar, traccar_vehicle):
+	vehicle = traccar_vehicle.name
+	first, second = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(2))
+	]
+
+	assert create_vehicle_log(traccar_vehicle, first)
+	# the rest of the transaction sees the new watermark, other workers only once it commits
+	assert create_vehicle_log(traccar_vehicle, first) is None
+	assert not frappe.cache.hget(POSITION_WATERMARK_KEY, vehicle)
+	assert create_vehicle_log(traccar_vehicle, second)
+	frappe.db.after_commit.run()
+	watermark = frappe.cache.hget(POSITION_WATERMARK_KEY, vehicle)
+	assert str(watermark.traccar_position_id) == str(second["id"])
+
+
+def test_watermark_is_dropped_on_rollback(fake_traccar, traccar_vehicle):
+	vehicle = traccar_vehicle.name
+	position = add_position(fake_traccar, traccar_vehicle)
+
+	assert create_vehicle_log(traccar_vehicle, position)
+	assert not is_new_position(position, get_position_watermark(vehicle))
+	frappe.db.after_rollback.run()
+	# the position is ingested again once its log is rolled back
+	assert is_new_position(position, get_position_watermark(vehicle))
+
+
+def test_bulk_insert_advances_watermark_on_commit(fake_traccar, traccar_vehicle):
+	vehicle = traccar_vehicle.name
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(3))
+	]
+	watermark = get_position_watermark(vehicle)
+
+	names = insert_vehicle_logs([(traccar_vehicle, p) for p in positions])
+
+	assert len(names) == 3
+	# fetch_from fields are filled like a document insert would
+	make, model = frappe.db.get_value("Vehicle", vehicle, ["make", "model"])
+	assert frappe.db.get_value("Vehicle Log", names[-1], ["make", "model"]) == (make, model)
+	assert frappe.db.get_value("Vehicle", vehicle, "last_odometer") == frappe.db.get_value(
+		"Vehicle Log", names[-1], "odometer"
+	)
+	# the watermark only moves once the batch is committed
+	assert frappe.cache.hget(POSITION_WATERMARK_KEY, vehicle) == watermark
+	frappe.db.after_commit.run()
+	watermark = get_position_watermark(vehicle)
+	assert str(watermark.traccar_position_id) == str(positions[-1]["id"])
+	assert watermark.traccar_fix_time == get_fix_time(positions[-1])
+
+
+def test_failed_bulk_insert_is_retried(fake_traccar, traccar_vehicle, monkeypatch):
+	vehicle = traccar_vehicle.name
+	positions = [
+		add_position(fake_traccar, traccar_vehicle, fix_time=fix_time, distance=1000 + i)
+		for i, fix_time in enumerate(fix_times(2))
+	]
+	vehicles_by_device = {str(traccar_vehicle.traccar_id): vehicle}
+	watermark = get_position_watermark(vehicle)
+
+	def fail(log):
+		raise frappe.ValidationError("Vehicle State unavailable")
+
+	with monkeypatch.context() as m:
+		m.setattr("fleet.fleet.traccar.update_vehicle_state", fail)
+		bulk_ingest_positions(positions, vehicles_by_device)
+
+	# the batch was rolled back and left nothing to advance the watermark on commit
+	assert not {str(p["id"]) for p in positions} & get_logged_position_ids(vehicle)
+	frappe.db.after_commit.run()
+	assert get_position_watermark(vehicle) == watermark
+
+	bulk_ingest_positions(positions, vehicles_by_device)
+	assert {str(p["id"]) for p in positions} <= get_logged_position_ids(vehicle)
+
+
+@pytest.fixture()
+def open_circuit(fake_traccar):
+	breaker = CircuitBreaker(CIRCUIT_BREAKER_KEY)
+	breaker.open(Exception("Traccar is down"), CIRCUIT_FAILURE_THRESHOLD)
+	yield breaker
+	breaker.close()
+
+
+def test_open_circuit_skips_the_sync_tick(open_circuit, traccar_vehicle):
+	vehicles = [frappe._dict(name=traccar_vehicle.name, traccar_id=traccar_vehicle.traccar_id)]
+	error_logs = frappe.db.count("Error Log")
+
+	# the breaker's error reaches the callers rather than a ValidationError
+	with pytest.raises(TraccarUnavailable):
+		get_latest_positions()
+	with pytest.raises(TraccarUnavailable):
+		get_vehicle_position(traccar_vehicle)
+
+	assert sync_vehicle_positions(vehicles, bulk=True) is None
+	sync_vehicle(traccar_vehicle.name)
+	# the outage was logged once when the breaker opened, the skipped tick logs nothing
+	assert frappe.db.count("Error Log") == error_logs
+
+
+def test_shards_share_one_position_download(fake_traccar, traccar_vehicle, monkeypatch):
+	add_position(fake_traccar, traccar_vehicle)
+	device = str(traccar_vehicle.traccar_id)
+	logs = frappe.db.count("Vehicle Log", {"license_plate": traccar_vehicle.name})
+	requested = []
+	get = TraccarClient.get
+
+	def record_get(client, path, **kwargs):
+		requested.append(path)
+		return get(client, path, **kwargs)
+
+	monkeypatch.setattr(TraccarClient, "get", record_get)
+	monkeypatch.setattr("fleet.fleet.traccar.is_job_queued", lambda *args, **kwargs: False)
+
+	enqueue_vehicle_shards(2)
+
+	assert requested == ["/api/positions"]
+	jobs = {call.kwargs["shard"]: call.kwargs for call in frappe.enqueue.call_args_list}
+	assert sorted(jobs) == [0, 1]
+	shard = get_vehicle_shard(device, 2)
+	assert device in {str(p["deviceId"]) for p in jobs[shard]["positions"]}
+	assert device not in {str(p["deviceId"]) for p in jobs[1 - shard]["positions"]}
+
+	# the shard job ingests its slice without requesting Traccar again
+	sync_vehicle_shard(shard, 2, positions=jobs[shard]["positions"])
+	assert requested == ["/api/positions"]
+	assert frappe.db.count("Vehicle Log", {"license_plate": traccar_vehicle.name}) == logs + 1
+
+
+def test_device_is_read_through_the_uniqueid_index(fake_traccar, traccar_vehicle, monkeypatch):
+	get_traccar_device_mirror(refresh=True)
+	requested = []
+	get = TraccarClient.get
+
+	def record_get(client, path, **kwargs):
+		requested.append(path)
+		return get(client, path, **kwargs)
+
+	monkeypatch.setattr(TraccarClient, "get", record_get)
+
+	device = get_traccar_device(traccar_vehicle.traccar_imei)
+	assert str(device["id"]) == str(traccar_vehicle.traccar_id)
+	assert requested == []
+
+	# a device unknown to the mirror is requested from Traccar
+	assert get_traccar_device("not-a-device") is None
+	assert requested == ["/api/devices?uniqueId=not-a-device"]
@@ -0,0 +1,114 @@
+# Copyright (c) 2025, AgriTheory and contributors
+# For license information, please see license.txt
+
+import datetime
+import json
+
+import frappe
+import pytest
+from frappe.utils import get_datetime, now_datetime
+
+from fleet.fleet.doctype.traccar_outbox.traccar_outbox import (
+	add_to_traccar_outbox,
+	coalesce_geofence_changes,
+	get_due_references,
+	get_pending_entries,
+	retry_entries,
+	send_references,
+)
+from fleet.fleet.traccar import TraccarClient, get_traccar_driver_index, set_traccar_driver_index
+
+LOCATION = "Test Outbox Location"
+
+
+def get_entries():
+	return frappe.get_all(
+		"Traccar Outbox",
+		filters={"reference_doctype": "Location", "reference_name": LOCATION},
+		fields=["name", "payload", "attempts", "next_attempt", "status"],
+		order_by="creation asc",
+	)
+
+
+def test_backing_off_entry_holds_back_newer_entries():
+	add_to_traccar_outbox("Location", LOCATION, {"area": True, "link": ["V1"], "unlink": []})
+	add_to_traccar_outbox("Location", LOCATION, {"area": False, "link": [], "unlink": ["V1"]})
+	older, newer = get_entries()
+	# the older entry failed and is backing off, the newer one is due
+	frappe.db.set_value(
+		"Traccar Outbox",
+		older.name,
+		{"attempts": 1, "next_attempt": now_datetime() + datetime.timedelta(minutes=5)},
+	)
+
+	assert ("Location", LOCATION) not in get_due_references(limit=500)
+
+	frappe.db.set_value(
+		"Traccar Outbox",
+		older.name,
+		"next_attempt",
+		now_datetime() - datetime.timedelta(seconds=1),
+	)
+	assert ("Location", LOCATION) in get_due_references(limit=500)
+	entries = get_pending_entries([("Location", LOCATION)])
+	assert [e.name for e in entries] == [older.name, newer.name]
+	# sent together, the unlink recorded last wins over the earlier link
+	assert coalesce_geofence_changes(entries) == {"area": True, "link": [], "unlink": ["V1"]}
+
+
+def test_retry_backs_off_per_document():
+	add_to_traccar_outbox("Location", LOCATION, {"area": True, "link": [], "unlink": []})
+	add_to_traccar_outbox("Location", LOCATION, {"area": False, "link": ["V1"], "unlink": []})
+	older, newer = get_entries()
+	frappe.db.set_value("Traccar Outbox", older.name, "attempts", 2)
+	entries = get_pending_entries([("Location", LOCATION)])
+
+	retry_entries("Location", {LOCATION: (entries, "Traccar unavailable")})
+
+	entries = get_entries()
+	assert {e.attempts for e in entries} == {3}
+	assert len({e.next_attempt for e in entries}) == 1
+	assert get_datetime(entries[0].next_attempt) > now_datetime()
+	assert {e.status for e in entries} == {"Pending"}
+	assert [json.loads(e.payload)["link"] for e in entries] == [[], ["V1"]]
+
+
+@pytest.fixture()
+def outbox_driver(fake_traccar):
+	"""
+	A Driver not yet in Traccar, with the driver index already loaded
+	"""
+	driver = frappe.get_all("Driver", pluck="name", limit=1)[0]
+	frappe.db.set_value("Driver", driver, "traccar_user_id", None)
+	set_traccar_driver_index({})
+	return driver
+
+
+def test_driver_sync_uses_the_cached_index(fake_traccar, outbox_driver, monkeypatch):
+	requested = []
+	get = TraccarClient.get
+
+	def record_get(client, path, **kwargs):
+		requested.append(path)
+		return get(client, path, **kwargs)
+
+	monkeypatch.setattr(TraccarClient, "get", record_get)
+
+	assert send_references("Driver", {outbox_driver: []}) == {}
+
+	assert "/api/drivers" not in requested
+	assert outbox_driver in {d["uniqueId"] for d in fake_traccar.state.drivers.values()}
+	assert outbox_driver in get_traccar_driver_index()
+	assert frappe.db.get_value("Driver", outbox_driver, "traccar_user_id") == outbox_driver
+
+
+def test_driver_created_outside_the_app_is_picked_up(fake_traccar, outbox_driver):
+	state = fake_traccar.state
+	existing = state.add(state.drivers, {"name": "Created in Traccar", "uniqueId": outbox_driver})
+
+	# Traccar rejects the create as a duplicate, the reloaded index has the driver
+	assert send_references("Driver", {outbox_driver: []}) == {}
+
+	assert len(state.drivers) == 1
+	assert get_traccar_driver_index()[outbox_driver]["id"] == existing["id"]
+	assert frappe.db.get_value("Driver", outbox_driver, "traccar_user_id") == outbox_driver